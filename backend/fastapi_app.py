@@ -4,6 +4,7 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel, field_validator
 from typing import Optional, List
 from datetime import datetime, timedelta
+import asyncio
 import random
 import os
 import json
@@ -21,18 +22,22 @@ from urllib.parse import unquote as decodeURIComponent
 from collections import deque
 from threading import Lock
 
+import orjson
+
 # Load environment variables from .env file (for local development)
 load_dotenv()
 
 # Import custom modules
-from logger_config import get_logger
-from sharepoint_helper import SharePointHelper
+from logger_config import get_logger, apply_color_formatter
+from sharepoint_helper import SharePointHelper, close_async_client
 from token_manager import get_token_manager
 
 # Import utility modules
 # Import background scheduler tasks
 # Setup logging
 logging.basicConfig(level=logging.INFO)
+# Colors only on TTY console - file/JSON logs stay free of ANSI escape codes
+apply_color_formatter()
 logger = logging.getLogger(__name__)
 
 # Get structured logger
@@ -176,10 +181,12 @@ from utils.transport_handler import TransportRequestHandler
 # Initialize Token Manager (if enabled)
 token_manager_config = config.get('default', {}).get('token_manager', {})
 if token_manager_config.get('enabled', True):
-    logger.info("\033[94mâ„¹ Token Manager enabled - tokens will be fetched from REST API\033[0m")
+    logger.info("ℹ Token Manager enabled - tokens will be fetched from REST API")
     token_manager = get_token_manager(config.get('default', {}))
+    # Stop background token refresh timer and close Token API connections when exiting the app
+    atexit.register(token_manager.close)
 else:
-    logger.info("\033[93mâš  Token Manager disabled - using SHAREPOINT_ACCESS_TOKEN from env\033[0m")
+    logger.info("⚠ Token Manager disabled - using SHAREPOINT_ACCESS_TOKEN from env")
     token_manager = None
 
 def get_access_token() -> str:
@@ -197,7 +204,7 @@ def get_access_token() -> str:
         try:
             return token_manager.get_token()
         except Exception as e:
-            logger.warning(f"\033[93mâš  Token Manager failed: {e}, falling back to env variable\033[0m")
+            logger.warning(f"⚠ Token Manager failed: {e}, falling back to env variable")
     
     # Opcja 2: Fallback - token z zmiennej Å›rodowiskowej
     env_token = os.getenv('SHAREPOINT_ACCESS_TOKEN')
@@ -211,6 +218,26 @@ def get_access_token() -> str:
         "2. Set SHAREPOINT_ACCESS_TOKEN env variable manually"
     )
 
+async def get_access_token_async() -> str:
+    """
+    Async version of get_access_token() - token fetch does not block the event loop
+    
+    Returns:
+        str: Access Token (z REST API lub z env variable)
+    """
+    if token_manager:
+        try:
+            return await token_manager.get_token_async()
+        except Exception as e:
+            logger.warning(f"Token Manager failed: {e}, falling back to env variable")
+    
+    env_token = os.getenv('SHAREPOINT_ACCESS_TOKEN')
+    if env_token:
+        return env_token
+    
+    # Same error as sync path
+    return get_access_token()
+
 # Initialize TransportRequestHandler (single instance for entire app)
 # All helpers (Excel, Email, JSON, Attachments) initialized ONCE here
 # No need to pass 10+ parameters to every function anymore!
@@ -219,9 +246,10 @@ transport_handler = TransportRequestHandler(
     logger_instance=logger,
     app_logger_instance=app_logger,
     performance_metrics_instance=performance_metrics,
-    get_access_token_func=get_access_token
+    get_access_token_func=get_access_token,
+    get_access_token_async_func=get_access_token_async
 )
-logger.info("\033[92m✓ TransportRequestHandler initialized with all helpers\033[0m")
+logger.info("✓ TransportRequestHandler initialized with all helpers")
 
 # Initialize SchedulerManager for background tasks
 from utils.scheduler_manager import SchedulerManager
@@ -229,9 +257,10 @@ scheduler_manager = SchedulerManager(
     config=config,
     transport_config=transport_config,
     get_access_token_func=get_access_token,
-    app_logger_instance=app_logger
+    app_logger_instance=app_logger,
+    json_helper=transport_handler.json_helper
 )
-logger.info("\033[92m✓ SchedulerManager initialized\033[0m")
+logger.info("✓ SchedulerManager initialized")
 
 # Get server config
 server_config = transport_config.get('server', {})
@@ -253,7 +282,7 @@ app = FastAPI(
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     error_detail = f"{type(exc).__name__}: {str(exc)}"
-    logger.error(f"\033[91mâœ— Unhandled exception in {request.url.path}: {error_detail}\033[0m")
+    logger.error(f"✗ Unhandled exception in {request.url.path}: {error_detail}")
     logger.error(f"Traceback: {traceback.format_exc()}")
     
     return JSONResponse(
@@ -418,8 +447,8 @@ async def submit_transport_request(
             logger.info("Using data as-is (not Base64 encoded)")
             data_to_parse = data
         
-        # Parse JSON data
-        data_dict = json.loads(data_to_parse)
+        # Parse JSON data (orjson.JSONDecodeError subclasses json.JSONDecodeError)
+        data_dict = orjson.loads(data_to_parse)
         logger.info(f"Parsed JSON: {data_dict}")
         req = TransportRequest(**data_dict)
         logger.info("Data validation successful")
@@ -720,7 +749,7 @@ def token_refresh():
                 "error": "Token Manager is disabled - cannot refresh token"
             }
         
-        logger.info("\033[94mâ„¹ Manual token refresh requested\033[0m")
+        logger.info("ℹ Manual token refresh requested")
         new_token = token_manager.get_token(force_refresh=True)
         
         return {
@@ -739,6 +768,14 @@ def token_refresh():
             "error_type": type(e).__name__
         }
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued Excel rows and close shared async HTTP clients"""
+    await asyncio.to_thread(transport_handler.close)
+    await close_async_client()
+    if token_manager:
+        await token_manager.aclose()
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize background scheduler on application startup"""
@@ -776,7 +813,7 @@ async def startup_event():
     
     # Start scheduler
     scheduler.start()
-    logger.info(f"\033[94mâ„¹ Background scheduler started - sync interval: {sync_interval_hours} hour(s), cleanup interval: {cleanup_interval_hours} hour(s)\033[0m")
+    logger.info(f"ℹ Background scheduler started - sync interval: {sync_interval_hours} hour(s), cleanup interval: {cleanup_interval_hours} hour(s)")
     app_logger.log_info("Background scheduler started", {
         'scheduler': 'background_tasks',
         'sync_interval_hours': sync_interval_hours,
@@ -798,7 +835,7 @@ async def startup_event():
         id='initial_sync',
         name='Initial sync on startup'
     )
-    logger.info("\033[94mâ„¹ Initial sync scheduled for 30 seconds after startup\033[0m")
+    logger.info("ℹ Initial sync scheduled for 30 seconds after startup")
 
 
 @app.get("/api/sync/trigger")
@@ -1000,14 +1037,14 @@ def debug_verify(payload: dict):
         debug_config = transport_config.get('debug', {})
         token_length = debug_config.get('token_length', 32)
         token = hashlib.sha256(f"{secret_key}{timestamp}".encode()).hexdigest()[:token_length]
-        logger.info(f"\033[92mâœ“ Debug access granted (token: {token[:8]}...)\033[0m")
+        logger.info(f"✓ Debug access granted (token: {token[:8]}...)")
         return {
             "success": True,
             "token": token,
             "message": "Debug access granted"
         }
     else:
-        logger.warning(f"\033[93mâš  Debug access denied (invalid key)\033[0m")
+        logger.warning(f"⚠ Debug access denied (invalid key)")
         raise HTTPException(status_code=403, detail="Invalid debug secret key")
 
 @app.get("/api/data/json")
@@ -1028,14 +1065,14 @@ def get_json_data(token: str = None):
         paths_config = transport_config.get('paths', {})
         json_path = Path(paths_config.get('json_backup_file', '/tmp/transport_requests.json'))
         
-        logger.info(f"\033[94mℹ Looking for JSON backup at: {json_path}\033[0m")
+        logger.info(f"ℹ Looking for JSON backup at: {json_path}")
         
         # Get debug info from JSONHelper (clean OOP approach)
         debug_info = transport_handler.json_helper.debug_info()
         
         if json_path.exists():
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # JSON Lines backup with updates replayed (JSONHelper owns the format)
+            data = transport_handler.json_helper.load_records()
             
             return {
                 "success": True,
@@ -1082,26 +1119,15 @@ def delete_json_records(request: DeleteRecordsRequest, token: str = None):
         if not json_path.exists():
             raise HTTPException(status_code=404, detail="JSON file not found")
         
-        # Read current data
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Filter out selected records
-        initial_count = len(data)
-        request_ids_set = set(request.request_ids)
-        filtered_data = [record for record in data if record.get('Request_ID') not in request_ids_set]
-        deleted_count = initial_count - len(filtered_data)
+        # Filter out selected records and compact file (via JSONHelper)
+        deleted_count, remaining_count = transport_handler.json_helper.delete_records(request.request_ids)
         
-        # Write back to file
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(filtered_data, f, indent=2, ensure_ascii=False)
-        
-        logger.info(f"\033[94mâ„¹ Deleted {deleted_count} records from JSON backup (requested: {len(request.request_ids)})\033[0m")
+        logger.info(f"ℹ Deleted {deleted_count} records from JSON backup (requested: {len(request.request_ids)})")
         
         return {
             "success": True,
             "deleted_count": deleted_count,
-            "remaining_records": len(filtered_data),
+            "remaining_records": remaining_count,
             "requested_ids": len(request.request_ids)
         }
         
@@ -1281,7 +1307,7 @@ async def clear_logs(token: str = None):
             try:
                 log_file.unlink()
                 cleared_files.append(log_file.name)
-                logger.info(f"\033[94mâ„¹ Cleared log file: {log_file.name}\033[0m")
+                logger.info(f"ℹ Cleared log file: {log_file.name}")
             except Exception as e:
                 logger.error(f"Failed to delete {log_file.name}: {e}")
         
@@ -1290,7 +1316,7 @@ async def clear_logs(token: str = None):
         if hasattr(app_logger, 'logger') and hasattr(app_logger.logger, 'handlers'):
             app_logger.logger.handlers.clear()
             app_logger._setup_file_handlers()
-            logger.info("\033[94mâ„¹ Logger reinitialized after clearing logs\033[0m")
+            logger.info("ℹ Logger reinitialized after clearing logs")
         
         return {
             "success": True,
@@ -1315,15 +1341,17 @@ async def get_form_labels():
         if not frontend_public.exists():
             raise HTTPException(status_code=404, detail="Form labels file not found")
         
-        with open(frontend_public, 'r', encoding='utf-8') as f:
-            labels_data = json.load(f)
+        # Parsed straight from bytes (no text-mode decode pass first)
+        with open(frontend_public, 'rb') as f:
+            raw = f.read()
+        labels_data = orjson.loads(raw)
         
         return {
             "success": True,
             "labels": labels_data
         }
     except Exception as e:
-        logger.error(f"\033[91mâœ— Failed to load form labels: {e}\033[0m")
+        logger.error(f"✗ Failed to load form labels: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -1349,13 +1377,13 @@ async def update_form_labels(labels_data: dict, token: str = None):
             backup_path = frontend_public.parent / f"form-labels.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
             import shutil
             shutil.copy2(frontend_public, backup_path)
-            logger.info(f"\033[94mâ„¹ Created backup: {backup_path.name}\033[0m")
+            logger.info(f"ℹ Created backup: {backup_path.name}")
         
         # Write new labels
         with open(frontend_public, 'w', encoding='utf-8') as f:
             json.dump(labels_data, f, indent=2, ensure_ascii=False)
         
-        logger.info("\033[92mâœ“ Form labels updated successfully\033[0m")
+        logger.info("✓ Form labels updated successfully")
         
         return {
             "success": True,
@@ -1363,7 +1391,7 @@ async def update_form_labels(labels_data: dict, token: str = None):
             "backup_created": frontend_public.exists()
         }
     except Exception as e:
-        logger.error(f"\033[91mâœ— Failed to update form labels: {e}\033[0m")
+        logger.error(f"✗ Failed to update form labels: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -1373,4 +1401,10 @@ if __name__ == "__main__":
     server_config = transport_config.get('server', {})
     host = server_config.get('host', '0.0.0.0')
     port = server_config.get('port', 8000)
-    uvicorn.run(app, host=host, port=port, reload=False)
+    # uvloop (z uvicorn[standard]) - szybsza pętla zdarzeń dla równoległych uploadów; brak na Windows
+    try:
+        import uvloop  # noqa: F401
+        loop_impl = "uvloop"
+    except ImportError:
+        loop_impl = "asyncio"
+    uvicorn.run(app, host=host, port=port, reload=False, loop=loop_impl)
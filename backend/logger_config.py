@@ -4,7 +4,6 @@ Provides structured logging with JSON format and CSV export capabilities
 """
 
 import logging
-import json
 import csv
 import os
 import yaml
@@ -17,6 +16,58 @@ SUCCESS_LEVEL = 25
 logging.addLevelName(SUCCESS_LEVEL, 'SUCCESS')
 import traceback
 
+import orjson
+
+
+class ColorFormatter(logging.Formatter):
+    """
+    Console formatter - adds ANSI colors only when the stream is a TTY
+    
+    Log messages stay plain text, so file/JSON handlers never receive escape sequences.
+    Color is picked from the leading status icon (✓ ℹ ⚠ ✗), otherwise from the level.
+    """
+    RESET = "\033[0m"
+    ICON_COLORS = {
+        '✓': "\033[92m",
+        'ℹ': "\033[94m",
+        '⚠': "\033[93m",
+        '✗': "\033[91m",
+    }
+    LEVEL_COLORS = {
+        SUCCESS_LEVEL: "\033[92m",
+        logging.WARNING: "\033[93m",
+        logging.ERROR: "\033[91m",
+        logging.CRITICAL: "\033[91m",
+    }
+    
+    def __init__(self, fmt: str = None, datefmt: str = None, stream=None):
+        super().__init__(fmt, datefmt)
+        isatty = getattr(stream, 'isatty', None)
+        self.use_color = bool(isatty and isatty())
+    
+    def format(self, record):
+        formatted = super().format(record)
+        # Messages that still carry their own escape codes are left as they are
+        if not self.use_color or '\033[' in formatted:
+            return formatted
+        color = self.ICON_COLORS.get(record.message[:1]) or self.LEVEL_COLORS.get(record.levelno)
+        return f"{color}{formatted}{self.RESET}" if color else formatted
+
+
+def apply_color_formatter(logger: logging.Logger = None):
+    """
+    Switch console (stream) handlers of a logger to ColorFormatter, keeping their format string
+    
+    Args:
+        logger: Logger to update (default: root logger)
+    """
+    target = logger or logging.getLogger()
+    for handler in target.handlers:
+        if isinstance(handler, logging.StreamHandler) and not isinstance(handler, logging.FileHandler):
+            fmt = handler.formatter._fmt if handler.formatter else None
+            datefmt = handler.formatter.datefmt if handler.formatter else None
+            handler.setFormatter(ColorFormatter(fmt, datefmt, stream=handler.stream))
+
 
 class StructuredLogger:
     """Advanced logger with JSON and CSV output capabilities"""
@@ -59,7 +110,7 @@ class StructuredLogger:
         # Console handler FIRST - so we can see what's happening
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(
-            logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+            ColorFormatter('%(asctime)s - %(levelname)s - %(message)s', stream=console_handler.stream)
         )
         self.logger.addHandler(console_handler)
         
@@ -70,9 +121,9 @@ class StructuredLogger:
             test_file = self.log_dir / ".write_test"
             test_file.write_text("test")
             test_file.unlink()
-            self.logger.info(f"\033[92m✓ Log directory verified: {self.log_dir}\033[0m")
+            self.logger.info(f"✓ Log directory verified: {self.log_dir}")
         except Exception as e:
-            self.logger.warning(f"\033[93m⚠ Cannot write to logs directory {self.log_dir}: {e}\033[0m")
+            self.logger.warning(f"⚠ Cannot write to logs directory {self.log_dir}: {e}")
             # Fallback to /tmp for container environments
             self.log_dir = Path("/tmp/logs")
             self.log_dir.mkdir(parents=True, exist_ok=True)
@@ -84,15 +135,15 @@ class StructuredLogger:
             json_handler = logging.FileHandler(json_log_path, encoding='utf-8')
             json_handler.setFormatter(self._get_json_formatter())
             self.logger.addHandler(json_handler)
-            self.logger.info(f"\033[92m✓ JSON log handler initialized: {json_log_path}\033[0m")
+            self.logger.info(f"✓ JSON log handler initialized: {json_log_path}")
             
             # Write a test log entry to ensure file is created immediately
-            self.logger.info("\033[94mℹ Logger initialized - test entry\033[0m")
+            self.logger.info("ℹ Logger initialized - test entry")
             # Force flush to disk
             for handler in self.logger.handlers:
                 handler.flush()
         except Exception as e:
-            self.logger.error(f"\033[91m✗ Failed to create JSON log handler: {e}\033[0m")
+            self.logger.error(f"✗ Failed to create JSON log handler: {e}")
             # Continue without file logging - at least console will work
         
     def _get_json_formatter(self):
@@ -112,7 +163,8 @@ class StructuredLogger:
                 if hasattr(record, 'extra_data'):
                     log_entry.update(record.extra_data)
                     
-                return json.dumps(log_entry, ensure_ascii=False)
+                # Every log line goes through here - orjson serializes in C
+                return orjson.dumps(log_entry, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
                 
         return JSONFormatter()
     
@@ -251,8 +303,15 @@ class StructuredLogger:
         
         self.logger.handle(record)
     
+    def isEnabledFor(self, level: int) -> bool:
+        """Check if messages of level would be logged (skip building costly messages otherwise)"""
+        return self.logger.isEnabledFor(level)
+    
     def log_info(self, message: str, extra_data: Dict[str, Any] = None):
         """Log general information"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         log_data = {
             'event_type': 'INFO',
             'extra_data': extra_data or {}
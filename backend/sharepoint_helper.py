@@ -3,17 +3,145 @@ SharePoint Helper - simplified class for SharePoint integration via MS Graph API
 Standalone implementation without external dependencies.
 """
 
+import asyncio
+import httpx
+import io
 import requests
 import re
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, BinaryIO, Union
 import logging
 
+import orjson
+
 # Configure logging
 logging.basicConfig(level=logging.DEBUG, format='%(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# (connect, read) timeouts in seconds - a hung Graph connection must never block a worker forever
+DEFAULT_TIMEOUT = (5, 60)
+DOWNLOAD_TIMEOUT = (10, 300)
+# Streamed download chunk written straight to disk (file never held whole in memory)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Items per page when listing folder children ($top; Graph returns @odata.nextLink for more)
+CHILDREN_PAGE_SIZE = 200
+
+# Graph simple upload (single PUT) limit - bigger payloads go through an upload session
+SIMPLE_UPLOAD_MAX_BYTES = 4 * 1024 * 1024
+# Upload session fragment size (must be a multiple of 320 KiB; ~8 MB - fewer round trips, fragments
+# of one session cannot be sent in parallel so size is the only lever)
+UPLOAD_CHUNK_SIZE = 25 * 320 * 1024
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize request payload to UTF-8 JSON bytes"""
+    return orjson.dumps(obj)
+
+
+def _recipients(emails) -> list:
+    """Build MS Graph recipient list ([{"emailAddress": {"address": ...}}, ...])"""
+    return [{"emailAddress": {"address": email}} for email in emails] if emails else []
+
+
+# Transient Graph errors retried by urllib3 (before response reaches Python code, honoring Retry-After).
+# Only idempotent methods - POST (sendMail, createUploadSession) is never replayed.
+# Locked workbook (423) is not transient in this sense - handled by the save retry loop.
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+RETRY_METHODS = frozenset({'GET', 'HEAD', 'PUT', 'PATCH', 'DELETE'})
+
+
+def _build_session() -> requests.Session:
+    """Create requests.Session with keep-alive connection pool for MS Graph"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False  # Last response returned - callers check status_code
+        )
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+# Shared connection pool for ALL sync Graph calls - SharePointHelper is created per operation,
+# the session (and its keep-alive TLS connections) outlives it; auth headers are passed per request
+_session = _build_session()
+
+# Stable Graph metadata (site IDs, workbook drive/item IDs) shared by all SharePointHelper
+# instances - saves 1-2 lookups per Excel operation; entries expire after METADATA_CACHE_TTL
+METADATA_CACHE_TTL = 3600
+_metadata_cache: Dict[tuple, tuple] = {}
+_metadata_cache_lock = threading.Lock()
+
+
+def _metadata_get(key: tuple):
+    """Get cached metadata value (None if missing or expired)"""
+    with _metadata_cache_lock:
+        entry = _metadata_cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+
+def _metadata_set(key: tuple, value):
+    """Cache metadata value for METADATA_CACHE_TTL seconds"""
+    with _metadata_cache_lock:
+        _metadata_cache[key] = (time.monotonic() + METADATA_CACHE_TTL, value)
+
+
+def _metadata_invalidate(key: tuple):
+    """Drop cached metadata (e.g. after 404 - file moved/replaced)"""
+    with _metadata_cache_lock:
+        _metadata_cache.pop(key, None)
+
+
+# Shared async HTTP/2 client (one per event loop) - auth headers are passed per request
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Get (or lazily create) shared async HTTP/2 client for MS Graph
+    
+    All async calls multiplex over a small pool of connections to graph.microsoft.com,
+    so independent requests from concurrent submissions run in parallel.
+    Must be called from inside a running event loop.
+    
+    Returns:
+        httpx.AsyncClient: Shared client
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT[1], connect=DEFAULT_TIMEOUT[0]),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+        )
+        _async_client_loop = loop
+    return _async_client
+
+
+async def close_async_client():
+    """Close shared async HTTP client (application shutdown)"""
+    global _async_client, _async_client_loop
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+        _async_client_loop = None
+
 
 class SharePointHelper:
     """Helper class for SharePoint/Teams integration via MS Graph API"""
@@ -25,12 +153,8 @@ class SharePointHelper:
         Args:
             access_token: Azure AD access token for MS Graph API
         """
-        self.access_token = access_token
-        self.access_token_expired_date = datetime.now() + timedelta(hours=2)
-        self.base_headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Accept": "application/json"
-        }
+        self._session = _session
+        self.set_access_token(access_token)
     
     def get_access_token(self) -> str:
         """
@@ -41,6 +165,30 @@ class SharePointHelper:
         """
         return self.access_token
     
+    def set_access_token(self, access_token: str):
+        """
+        Set access token and rebuild request headers (built once, reused by every call)
+        
+        Args:
+            access_token: Azure AD access token for MS Graph API
+        """
+        self.access_token = access_token
+        self.access_token_expired_date = datetime.now() + timedelta(hours=2)
+        self._bearer = f"Bearer {access_token}"
+        self.base_headers = {
+            "Authorization": self._bearer,
+            "Accept": "application/json"
+        }
+        self._json_headers = {
+            "Authorization": self._bearer,
+            "Accept": "application/json",
+            "Content-Type": "application/json"
+        }
+        self._octet_headers = {
+            "Authorization": self._bearer,
+            "Content-Type": "application/octet-stream"
+        }
+    
     def get_folder(self, url: str) -> Dict[str, Any]:
         """
         Get folder/file object from SharePoint by URL
@@ -55,14 +203,14 @@ class SharePointHelper:
             folder = sp.get_folder("https://yourcompany.sharepoint.com/sites/...")
         """
         try:
-            msgraph_url = self._sharepoint_to_msgraph(url)
+            msgraph_url = self._sharepoint_to_msgraph(url, trailing_colon=True)
             logger.info(f"Getting folder: {msgraph_url}")
             
-            response = requests.get(msgraph_url, headers=self.base_headers)
+            response = self._session.get(msgraph_url, headers=self.base_headers, timeout=DEFAULT_TIMEOUT)
             
             if response.status_code == 200:
                 folder_data = response.json()
-                logger.info(f"\033[92m✓ Folder retrieved: {folder_data.get('name', 'Unknown')}\033[0m")
+                logger.info(f"✓ Folder retrieved: {folder_data.get('name', 'Unknown')}")
                 return folder_data
             else:
                 error_msg = f"Error getting folder: {response.status_code} - {response.text}"
@@ -92,70 +240,91 @@ class SharePointHelper:
             
             logger.info(f"Downloading file: {folder.get('name', 'Unknown')}")
             
-            response = requests.get(download_url)
-            
-            if response.status_code == 200:
-                local_path.parent.mkdir(parents=True, exist_ok=True)
-                with open(local_path, 'wb') as f:
-                    f.write(response.content)
-                logger.info(f"\033[92m✓ File downloaded to: {local_path}\033[0m")
-                return local_path
-            else:
-                error_msg = f"Download failed: {response.status_code} - {response.text}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
+            self._stream_to_file(download_url, local_path)
+            logger.info(f"✓ File downloaded to: {local_path}")
+            return local_path
                 
         except Exception as e:
             logger.error(f"Failed to download file: {e}")
             raise
     
-    def download_file_from_folder(self, download_path: str, folder: Dict[str, Any], file_name: str) -> Path:
+    def download_file_from_folder(self, download_path: str, folder: Dict[str, Any], file_name: str,
+                                  chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> Path:
         """
-        Download specific file from a folder
+        Download specific file from a folder (streamed to disk chunk by chunk)
         
         Args:
             download_path: Local directory path
             folder: Parent folder object
             file_name: Name of file to download
+            chunk_size: Bytes written per chunk
             
         Returns:
             Path: Path to downloaded file
         """
         try:
-            # Build MS Graph URL for the file
-            url = folder['webUrl']
-            msgraph_command = self._sharepoint_to_msgraph(url)
-            
-            # Remove trailing colon if present
-            if msgraph_command.endswith(':'):
-                msgraph_command = msgraph_command[:-1]
-            
-            # Add file name
+            msgraph_command = self._sharepoint_to_msgraph(folder['webUrl'])
             file_url = f"{msgraph_command}/{file_name}:/content"
+            local_path = Path(download_path) / file_name
             
             logger.info(f"Downloading file: {file_name}")
+            self._stream_to_file(file_url, local_path, headers=self.base_headers, chunk_size=chunk_size)
             
-            response = requests.get(file_url, headers=self.base_headers)
-            
-            if response.status_code == 200:
-                download_dir = Path(download_path)
-                download_dir.mkdir(parents=True, exist_ok=True)
-                local_path = download_dir / file_name
-                
-                with open(local_path, 'wb') as f:
-                    f.write(response.content)
-                
-                logger.info(f"\033[92m✓ File downloaded to: {local_path}\033[0m")
-                return local_path
-            else:
-                error_msg = f"Download failed: {response.status_code} - {response.text}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
+            logger.info(f"✓ File downloaded to: {local_path}")
+            return local_path
                 
         except Exception as e:
             logger.error(f"Failed to download file from folder: {e}")
             raise
     
+    def _stream_to_file(self, url: str, local_path: Path, headers: Optional[Dict[str, str]] = None,
+                        chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> None:
+        """
+        GET url with stream=True and write the body to local_path chunk by chunk
+        
+        Args:
+            url: Download URL (Graph :/content or pre-authenticated downloadUrl)
+            local_path: Target file path (parent directories are created)
+            headers: Optional request headers
+            chunk_size: Bytes per iter_content chunk
+        """
+        with self._session.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT, stream=True) as response:
+            if response.status_code != 200:
+                error_msg = f"Download failed: {response.status_code} - {response.text}"
+                logger.error(error_msg)
+                raise Exception(error_msg)
+            
+            local_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(local_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+    
+    def download_bytes(self, folder: Dict[str, Any], file_name: str) -> bytes:
+        """
+        Download specific file from a folder into memory (no temp file)
+        
+        Args:
+            folder: Parent folder object
+            file_name: Name of file to download
+            
+        Returns:
+            bytes: File content
+        """
+        # Build MS Graph URL for the file
+        msgraph_command = self._sharepoint_to_msgraph(folder['webUrl'])
+        file_url = f"{msgraph_command}/{file_name}:/content"
+        
+        logger.info(f"Downloading file: {file_name}")
+        
+        response = self._session.get(file_url, headers=self.base_headers, timeout=DOWNLOAD_TIMEOUT)
+        
+        if response.status_code != 200:
+            error_msg = f"Download failed: {response.status_code} - {response.text}"
+            logger.error(error_msg)
+            raise Exception(error_msg)
+        
+        return response.content
+    
     def upload_file(self, file_path: Path, folder: Dict[str, Any], custom_filename: str = None) -> Dict[str, Any]:
         """
         Upload file to SharePoint folder
@@ -168,35 +337,70 @@ class SharePointHelper:
         Returns:
             dict: Uploaded file object
         """
-        try:
-            if not file_path.exists():
-                raise FileNotFoundError(f"File not found: {file_path}")
-            
-            # Use custom filename or original filename
-            upload_filename = custom_filename if custom_filename else file_path.name
-            
-            # Build upload URL
-            url = folder['webUrl']
-            msgraph_url = self._sharepoint_to_msgraph(url)
-            
-            # Remove trailing colon if present
-            if msgraph_url.endswith(':'):
-                msgraph_url = msgraph_url[:-1]
-            
-            upload_url = f"{msgraph_url}/{upload_filename}:/content"
-            
-            logger.info(f"Uploading file: {upload_filename}")
-            
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/octet-stream"
-            }
+        if not file_path.exists():
+            logger.error(f"Failed to upload file: File not found: {file_path}")
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        # Use custom filename or original filename
+        upload_filename = custom_filename if custom_filename else file_path.name
+        
+        # File is streamed - big files go through an upload session one chunk at a time
+        with open(file_path, 'rb') as f:
+            return self.upload_bytes(f, folder, upload_filename)
+    
+    def upload_bytes(self, content: Union[bytes, BinaryIO], folder: Dict[str, Any], filename: str) -> Dict[str, Any]:
+        """
+        Upload in-memory content to SharePoint folder (no temp file on disk)
+        
+        Payloads up to 4 MB use a single PUT, bigger ones an upload session with chunked PUTs.
+        
+        Args:
+            content: File content, or seekable binary stream (e.g. BytesIO after wb.save) -
+                     a stream is read chunk by chunk, never copied whole
+            folder: Target folder object from get_folder()
+            filename: Name of file in SharePoint
             
-            with open(file_path, 'rb') as f:
-                response = requests.put(upload_url, data=f, headers=headers)
+        Returns:
+            dict: Uploaded file object
+        """
+        try:
+            msgraph_url = self._sharepoint_to_msgraph(folder['webUrl'])
+            # BytesIO over bytes shares the buffer (no copy)
+            stream = content if hasattr(content, 'read') else io.BytesIO(content)
+            total = stream.seek(0, io.SEEK_END)
+            stream.seek(0)
+            # Read timeout grows with payload size (~1 MB/s worst case)
+            timeout = (DEFAULT_TIMEOUT[0], total // 1_000_000 + 30)
+            
+            logger.info(f"Uploading file: {filename} ({total} bytes)")
+            
+            if total <= SIMPLE_UPLOAD_MAX_BYTES:
+                response = self._session.put(f"{msgraph_url}/{filename}:/content", data=stream.read(),
+                                        headers=self._octet_headers, timeout=timeout)
+            else:
+                session_response = self._session.post(
+                    f"{msgraph_url}/{filename}:/createUploadSession",
+                    json={"item": {"@microsoft.graph.conflictBehavior": "replace"}},
+                    headers=self._json_headers,
+                    timeout=DEFAULT_TIMEOUT
+                )
+                if session_response.status_code != 200:
+                    raise Exception(f"Failed to create upload session: {session_response.status_code} - {session_response.text}")
+                upload_url = session_response.json()['uploadUrl']
+                
+                # Fragments must be sent in order; uploadUrl is pre-authenticated (no Authorization header)
+                for start in range(0, total, UPLOAD_CHUNK_SIZE):
+                    chunk = stream.read(UPLOAD_CHUNK_SIZE)
+                    end = start + len(chunk) - 1
+                    response = self._session.put(upload_url, data=chunk, headers={
+                        "Content-Length": str(len(chunk)),
+                        "Content-Range": f"bytes {start}-{end}/{total}"
+                    }, timeout=(DEFAULT_TIMEOUT[0], len(chunk) // 1_000_000 + 30))
+                    if response.status_code not in [200, 201, 202]:
+                        break
             
             if response.status_code in [200, 201]:
-                logger.info(f"\033[92m✓ File uploaded: {upload_filename}\033[0m")
+                logger.info(f"✓ File uploaded: {filename}")
                 return response.json()
             else:
                 error_msg = f"Upload failed: {response.status_code} - {response.text}"
@@ -228,23 +432,27 @@ class SharePointHelper:
                 ["REQ-123", "2025-11-14", "Value1", "Value2"]
             )
         """
-        try:
-            # Get file item ID
-            msgraph_folder = self._sharepoint_to_msgraph(folder_url)
-            if msgraph_folder.endswith(':'):
-                msgraph_folder = msgraph_folder[:-1]
-            
-            file_url = f"{msgraph_folder}/{excel_file_name}"
-            
-            logger.info(f"Excel API: Getting file metadata for {excel_file_name}")
-            file_response = requests.get(file_url, headers=self.base_headers)
+        return self.add_excel_rows(folder_url, excel_file_name, worksheet_name, [row_values])
+    
+    def add_excel_rows(self, folder_url: str, excel_file_name: str, worksheet_name: str, rows: list) -> Dict[str, Any]:
+        """
+        Append several rows to Excel file in ONE range write (same lookups as a single row)
+        
+        Args:
+            folder_url: SharePoint folder URL
+            excel_file_name: Name of Excel file
+            worksheet_name: Name of worksheet
+            rows: List of rows, each a list of cell values (same length)
             
-            if file_response.status_code != 200:
-                raise Exception(f"Failed to get file: {file_response.status_code} - {file_response.text}")
+        Returns:
+            dict: Response from API with written range info
             
-            file_data = file_response.json()
-            drive_id = file_data['parentReference']['driveId']
-            item_id = file_data['id']
+        Raises:
+            requests.HTTPError: If the range write is rejected (response attached)
+        """
+        try:
+            # Get file item ID (cached)
+            drive_id, item_id = self._get_drive_item(folder_url, excel_file_name)
             
             # Build Excel API URL for adding row
             # https://graph.microsoft.com/v1.0/drives/{drive-id}/items/{item-id}/workbook/worksheets/{worksheet}/tables/{table}/rows/add
@@ -259,7 +467,7 @@ class SharePointHelper:
             
             # First get usedRange to know the dynamic range to check
             used_range_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{item_id}/workbook/worksheets/{worksheet_name}/usedRange"
-            range_response = requests.get(used_range_url, headers=self.base_headers)
+            range_response = self._session.get(used_range_url, headers=self.base_headers, timeout=DEFAULT_TIMEOUT)
             
             if range_response.status_code == 200:
                 used_range = range_response.json()
@@ -268,19 +476,11 @@ class SharePointHelper:
                 
                 # Now get column A values up to usedRange limit
                 col_a_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{item_id}/workbook/worksheets/{worksheet_name}/range(address='A1:A{max_row}')"
-                col_a_response = requests.get(col_a_url, headers=self.base_headers)
+                col_a_response = self._session.get(col_a_url, headers=self.base_headers, timeout=DEFAULT_TIMEOUT)
                 
                 if col_a_response.status_code == 200:
                     col_a_data = col_a_response.json()
-                    values = col_a_data.get('values', [])
-                    
-                    # Find last non-empty row in column A (scan backwards for efficiency)
-                    last_row = 1  # Default to header row
-                    for idx in range(len(values) - 1, -1, -1):  # Scan backwards
-                        row = values[idx]
-                        if row and row[0] and str(row[0]).strip():  # Check if cell has value
-                            last_row = idx + 1  # +1 because Excel rows are 1-indexed
-                            break
+                    last_row = self._find_last_row(col_a_data.get('values', []))
                     
                     logger.info(f"Excel API: Last row with data in column A: {last_row} (out of {max_row} total)")
                 else:
@@ -295,43 +495,31 @@ class SharePointHelper:
             # Calculate next row
             next_row = last_row + 1
             
-            # Build column range (A to column letter based on row_values length)
-            def col_letter(n):
-                """Convert column number to Excel column letter (1='A', 27='AA', etc.)"""
-                result = ""
-                while n > 0:
-                    n -= 1
-                    result = chr(65 + (n % 26)) + result
-                    n //= 26
-                return result
-            
-            last_col = col_letter(len(row_values))
-            cell_range = f"A{next_row}:{last_col}{next_row}"
+            # Build range (A to column letter based on row length, one sheet row per row)
+            last_col = self._col_letter(max(len(row) for row in rows))
+            cell_range = f"A{next_row}:{last_col}{next_row + len(rows) - 1}"
             
-            logger.info(f"Excel API: Inserting row at range {cell_range}")
+            logger.info(f"Excel API: Inserting {len(rows)} row(s) at range {cell_range}")
             
             # Update the range with new values
             update_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{item_id}/workbook/worksheets/{worksheet_name}/range(address='{cell_range}')"
             
             # Prepare payload - values must be 2D array
             payload = {
-                "values": [row_values]  # Wrap in array for single row
+                "values": rows
             }
             
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.patch(update_url, json=payload, headers=headers)
+            response = self._session.patch(update_url, data=_json_dumps(payload), headers=self._json_headers, timeout=DEFAULT_TIMEOUT)
             
             if response.status_code in [200, 201]:
-                logger.info(f"\033[92m✓ Excel API: Row added successfully at {cell_range}\033[0m")
+                logger.info(f"✓ Excel API: {len(rows)} row(s) added successfully at {cell_range}")
                 return response.json()
             else:
+                if response.status_code == 404:
+                    _metadata_invalidate(('item', folder_url, excel_file_name))
                 error_msg = f"Excel API failed: {response.status_code} - {response.text}"
                 logger.error(error_msg)
-                raise Exception(error_msg)
+                raise requests.HTTPError(error_msg, response=response)
                 
         except Exception as e:
             logger.error(f"Failed to add Excel row via API: {e}")
@@ -365,31 +553,19 @@ class SharePointHelper:
             )
         """
         try:
-            # Get file item ID
-            msgraph_folder = self._sharepoint_to_msgraph(folder_url)
-            if msgraph_folder.endswith(':'):
-                msgraph_folder = msgraph_folder[:-1]
-            
-            file_url = f"{msgraph_folder}/{excel_file_name}"
-            
-            logger.info(f"Excel API: Getting file metadata for {excel_file_name}")
-            file_response = requests.get(file_url, headers=self.base_headers)
-            
-            if file_response.status_code != 200:
-                raise Exception(f"Failed to get file: {file_response.status_code} - {file_response.text}")
-            
-            file_data = file_response.json()
-            drive_id = file_data['parentReference']['driveId']
-            item_id = file_data['id']
+            # Get file item ID (cached)
+            drive_id, item_id = self._get_drive_item(folder_url, excel_file_name)
             
             # Find row by searching ID column
             logger.info(f"Excel API: Searching for {id_value} in column {id_column}")
             
             # Get usedRange to know how many rows to check
             used_range_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{item_id}/workbook/worksheets/{worksheet_name}/usedRange"
-            range_response = requests.get(used_range_url, headers=self.base_headers)
+            range_response = self._session.get(used_range_url, headers=self.base_headers, timeout=DEFAULT_TIMEOUT)
             
             if range_response.status_code != 200:
+                if range_response.status_code == 404:
+                    _metadata_invalidate(('item', folder_url, excel_file_name))
                 raise Exception(f"Failed to get usedRange: {range_response.status_code}")
             
             used_range = range_response.json()
@@ -397,20 +573,15 @@ class SharePointHelper:
             
             # Get ID column values
             id_col_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{item_id}/workbook/worksheets/{worksheet_name}/range(address='{id_column}1:{id_column}{max_row}')"
-            id_col_response = requests.get(id_col_url, headers=self.base_headers)
+            id_col_response = self._session.get(id_col_url, headers=self.base_headers, timeout=DEFAULT_TIMEOUT)
             
             if id_col_response.status_code != 200:
                 raise Exception(f"Failed to get ID column: {id_col_response.status_code}")
             
             id_col_data = id_col_response.json()
-            values = id_col_data.get('values', [])
             
             # Find matching row
-            target_row = None
-            for idx, row in enumerate(values):
-                if row and row[0] and str(row[0]).strip() == str(id_value).strip():
-                    target_row = idx + 1  # +1 because Excel is 1-indexed
-                    break
+            target_row = self._find_row_by_id(id_col_data.get('values', []), id_value)
             
             if target_row is None:
                 raise Exception(f"Row with {id_column}='{id_value}' not found")
@@ -418,11 +589,6 @@ class SharePointHelper:
             logger.info(f"Excel API: Found {id_value} at row {target_row}, updating cells...")
             
             # Update each specified cell
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            
             for col_letter, new_value in updates.items():
                 cell_address = f"{col_letter}{target_row}"
                 update_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{item_id}/workbook/worksheets/{worksheet_name}/range(address='{cell_address}')"
@@ -431,22 +597,61 @@ class SharePointHelper:
                     "values": [[new_value]]
                 }
                 
-                response = requests.patch(update_url, json=payload, headers=headers)
+                response = self._session.patch(update_url, data=_json_dumps(payload), headers=self._json_headers, timeout=DEFAULT_TIMEOUT)
                 
                 if response.status_code not in [200, 201]:
                     logger.warning(f"Failed to update {cell_address}: {response.status_code}")
                 else:
-                    logger.debug(f"Updated {cell_address} = '{new_value}'")
+                    logger.debug("Updated %s = '%s'", cell_address, new_value)
             
-            logger.info(f"\033[92m✓ Excel API: Row {target_row} updated successfully\033[0m")
+            logger.info(f"✓ Excel API: Row {target_row} updated successfully")
             return {'success': True, 'row': target_row}
             
         except Exception as e:
             logger.error(f"Failed to update Excel row: {e}")
             raise
-                
+    
+    def get_excel_column_values(self, folder_url: str, excel_file_name: str,
+                                worksheet_name: str, column: str = 'A') -> list:
+        """
+        Read one column of a worksheet via Excel API (no workbook download)
+        
+        Args:
+            folder_url: SharePoint folder URL
+            excel_file_name: Name of Excel file
+            worksheet_name: Name of worksheet
+            column: Column letter (e.g., 'A')
+            
+        Returns:
+            list: Cell values from row 1 to the last used row (header included)
+        """
+        try:
+            # Get file item ID (cached)
+            drive_id, item_id = self._get_drive_item(folder_url, excel_file_name)
+            worksheet_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{item_id}/workbook/worksheets/{worksheet_name}"
+            
+            # Only row count is needed from usedRange
+            range_response = self._session.get(f"{worksheet_url}/usedRange(valuesOnly=true)",
+                                               headers=self.base_headers, params={'$select': 'rowCount'},
+                                               timeout=DEFAULT_TIMEOUT)
+            if range_response.status_code != 200:
+                if range_response.status_code == 404:
+                    _metadata_invalidate(('item', folder_url, excel_file_name))
+                raise Exception(f"Failed to get usedRange: {range_response.status_code}")
+            max_row = range_response.json()['rowCount']
+            
+            col_response = self._session.get(f"{worksheet_url}/range(address='{column}1:{column}{max_row}')",
+                                             headers=self.base_headers, params={'$select': 'values'},
+                                             timeout=DEFAULT_TIMEOUT)
+            if col_response.status_code != 200:
+                raise Exception(f"Failed to get column {column}: {col_response.status_code}")
+            
+            values = [row[0] if row else None for row in col_response.json().get('values', [])]
+            logger.info(f"✓ Excel API: Read {len(values)} values from column {column}")
+            return values
+            
         except Exception as e:
-            logger.error(f"Failed to upload file: {e}")
+            logger.error(f"Failed to read Excel column: {e}")
             raise
     
     def get_folder_childrens(self, folder: Dict[str, Any]) -> list:
@@ -457,32 +662,49 @@ class SharePointHelper:
             folder: Parent folder object
             
         Returns:
-            list: List of child objects
+            list: List of child objects (all pages)
         """
         try:
-            url = folder['webUrl']
-            msgraph_command = self._sharepoint_to_msgraph(url)
-            
-            # Add /children to get folder contents
-            children_url = f"{msgraph_command}/children"
-            
             logger.info(f"Getting folder children: {folder.get('name', 'Unknown')}")
-            
-            response = requests.get(children_url, headers=self.base_headers)
-            
-            if response.status_code == 200:
-                children = response.json().get('value', [])
-                logger.info(f"\033[92m✓ Found {len(children)} items in folder\033[0m")
-                return children
-            else:
-                error_msg = f"Failed to get children: {response.status_code} - {response.text}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
+            children = list(self.iter_folder_children(folder))
+            logger.info(f"✓ Found {len(children)} items in folder")
+            return children
                 
         except Exception as e:
             logger.error(f"Failed to get folder children: {e}")
             raise
     
+    def iter_folder_children(self, folder: Dict[str, Any], select: str = None,
+                             page_size: int = CHILDREN_PAGE_SIZE):
+        """
+        Iterate children of a folder page by page (follows @odata.nextLink)
+        
+        Args:
+            folder: Parent folder object
+            select: Optional $select list (e.g. "id,name,createdDateTime") - smaller pages
+            page_size: Items per request ($top)
+            
+        Yields:
+            dict: Child objects
+        """
+        msgraph_command = self._sharepoint_to_msgraph(folder['webUrl'], trailing_colon=True)
+        params = {'$top': page_size}
+        if select:
+            params['$select'] = select
+        
+        url = f"{msgraph_command}/children"
+        while url:
+            response = self._session.get(url, headers=self.base_headers, params=params, timeout=DEFAULT_TIMEOUT)
+            if response.status_code != 200:
+                raise Exception(f"Failed to get children: {response.status_code} - {response.text}")
+            
+            data = response.json()
+            yield from data.get('value', [])
+            
+            # nextLink already carries the query ($top/$select/$skiptoken)
+            url = data.get('@odata.nextLink')
+            params = None
+    
     def is_file_exists(self, folder: Dict[str, Any], file_name: str) -> bool:
         """
         Check if file exists in folder
@@ -498,26 +720,84 @@ class SharePointHelper:
             children = self.get_folder_childrens(folder)
             for child in children:
                 if child.get('name') == file_name:
-                    logger.info(f"\033[92m✓ File exists: {file_name}\033[0m")
+                    logger.info(f"✓ File exists: {file_name}")
                     return True
             
-            logger.info(f"\033[94mℹ File not found: {file_name}\033[0m")
+            logger.info(f"ℹ File not found: {file_name}")
             return False
             
         except Exception as e:
             logger.error(f"Failed to check file existence: {e}")
             return False
     
-    def _sharepoint_to_msgraph(self, url: str) -> str:
+    def _get_drive_item(self, folder_url: str, excel_file_name: str) -> tuple:
+        """
+        Get (drive_id, item_id) of a file in SharePoint folder (cached across instances)
+        
+        Args:
+            folder_url: SharePoint folder URL
+            excel_file_name: Name of file in folder
+            
+        Returns:
+            tuple: (drive_id, item_id)
+        """
+        cache_key = ('item', folder_url, excel_file_name)
+        cached = _metadata_get(cache_key)
+        if cached:
+            return cached
+        
+        msgraph_folder = self._sharepoint_to_msgraph(folder_url)
+        file_url = f"{msgraph_folder}/{excel_file_name}"
+        
+        logger.info(f"Excel API: Getting file metadata for {excel_file_name}")
+        file_response = self._session.get(file_url, headers=self.base_headers, timeout=DEFAULT_TIMEOUT)
+        
+        if file_response.status_code != 200:
+            raise Exception(f"Failed to get file: {file_response.status_code} - {file_response.text}")
+        
+        file_data = file_response.json()
+        drive_item = (file_data['parentReference']['driveId'], file_data['id'])
+        _metadata_set(cache_key, drive_item)
+        return drive_item
+    
+    def _sharepoint_to_msgraph(self, url: str, *, trailing_colon: bool = False) -> str:
         """
         Convert SharePoint URL to MS Graph API URL
         
         Args:
             url: SharePoint URL
+            trailing_colon: Keep closing ':' of the path segment (root:/path:) - needed
+                            for item lookups and '/children'; without it the URL is ready
+                            for appending '/{file_name}'
             
         Returns:
             str: MS Graph API URL
         """
+        site_name, relative_path = self._parse_sharepoint_url(url)
+        
+        # Get site_id
+        site_id = self._get_site_id(site_name)
+        
+        # Build MS Graph URL
+        msgraph_url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root:/{relative_path}"
+        if trailing_colon:
+            msgraph_url += ":"
+        
+        logger.debug("Converted URL: %s -> %s", url, msgraph_url)
+        
+        return msgraph_url
+    
+    @staticmethod
+    def _parse_sharepoint_url(url: str) -> tuple:
+        """
+        Extract site name and drive-relative path from SharePoint URL
+        
+        Args:
+            url: SharePoint URL
+            
+        Returns:
+            tuple: (site_name, relative_path)
+        """
         # Remove query parameters (?...)
         url = re.sub(r'\?.*', '', url)
         
@@ -533,21 +813,37 @@ class SharePointHelper:
         if not match:
             raise ValueError(f"Invalid SharePoint URL format: {url}")
         
-        site_name = match.group(1)
-        relative_path = match.group(2)
-        
-        # Get site_id
-        site_id = self._get_site_id(site_name)
-        
         # Remove "Shared Documents/" from relative path
-        relative_path = relative_path.replace("Shared Documents/", "")
-        
-        # Build MS Graph URL
-        msgraph_url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root:/{relative_path}:"
-        
-        logger.debug(f"Converted URL: {url} -> {msgraph_url}")
-        
-        return msgraph_url
+        return match.group(1), match.group(2).replace("Shared Documents/", "")
+    
+    @staticmethod
+    def _col_letter(n: int) -> str:
+        """Convert column number to Excel column letter (1='A', 27='AA', etc.)"""
+        result = ""
+        while n > 0:
+            n -= 1
+            result = chr(65 + (n % 26)) + result
+            n //= 26
+        return result
+    
+    @staticmethod
+    def _find_last_row(values: list) -> int:
+        """Find last non-empty row in a single-column range (1-indexed, defaults to header row)"""
+        # Scan backwards for efficiency
+        for idx in range(len(values) - 1, -1, -1):
+            row = values[idx]
+            if row and row[0] and str(row[0]).strip():  # Check if cell has value
+                return idx + 1  # +1 because Excel rows are 1-indexed
+        return 1
+    
+    @staticmethod
+    def _find_row_by_id(values: list, id_value: str) -> Optional[int]:
+        """Find 1-indexed row whose first cell matches id_value"""
+        wanted = str(id_value).strip()
+        for idx, row in enumerate(values):
+            if row and row[0] and str(row[0]).strip() == wanted:
+                return idx + 1  # +1 because Excel is 1-indexed
+        return None
     
     def create_folder(self, parent_folder: Dict[str, Any], child_folder_name: str, 
                      conflict_behavior: str = "rename") -> Dict[str, Any]:
@@ -564,7 +860,7 @@ class SharePointHelper:
         """
         try:
             url = parent_folder['webUrl']
-            msgraph_command = self._sharepoint_to_msgraph(url)
+            msgraph_command = self._sharepoint_to_msgraph(url, trailing_colon=True)
             
             # Add /children endpoint
             create_url = f"{msgraph_command}/children"
@@ -577,10 +873,10 @@ class SharePointHelper:
                 "@microsoft.graph.conflictBehavior": conflict_behavior
             }
             
-            response = requests.post(create_url, headers=self.base_headers, json=data)
+            response = self._session.post(create_url, headers=self.base_headers, json=data, timeout=DEFAULT_TIMEOUT)
             
             if response.status_code in [200, 201]:
-                logger.info(f"\033[92m✓ Folder created: {child_folder_name}\033[0m")
+                logger.info(f"✓ Folder created: {child_folder_name}")
                 return response.json()
             else:
                 error_msg = f"Failed to create folder: {response.status_code} - {response.text}"
@@ -601,40 +897,49 @@ class SharePointHelper:
         Returns:
             str: Site ID
         """
+        cached = _metadata_get(('site', site_name))
+        if cached:
+            return cached
+        site_id = self._lookup_site_id(site_name)
+        _metadata_set(('site', site_name), site_id)
+        return site_id
+    
+    def _lookup_site_id(self, site_name: str) -> str:
+        """Look up site ID in MS Graph (search by name, then direct path)"""
         # Try option 1: Search by name
         try:
             url = f"https://graph.microsoft.com/v1.0/sites?search={site_name}"
-            logger.debug(f"Trying site search: {url}")
-            response = requests.get(url, headers=self.base_headers)
-            logger.debug(f"Search response status: {response.status_code}")
+            logger.debug("Trying site search: %s", url)
+            response = self._session.get(url, headers=self.base_headers, timeout=DEFAULT_TIMEOUT)
+            logger.debug("Search response status: %s", response.status_code)
             
             if response.status_code == 200:
                 sites = response.json().get('value', [])
-                logger.debug(f"Found {len(sites)} sites")
+                logger.debug("Found %s sites", len(sites))
                 if sites:
                     site_id = sites[0]['id']
-                    logger.info(f"\033[92m✓ Site ID found (search): {site_id}\033[0m")
+                    logger.info(f"✓ Site ID found (search): {site_id}")
                     return site_id
             else:
                 logger.warning(f"Search failed: {response.status_code} - {response.text}")
         except Exception as e:
-            logger.debug(f"Site search failed: {e}")
+            logger.debug("Site search failed: %s", e)
         
         # Try option 2: Direct path
         try:
             url = f"https://graph.microsoft.com/v1.0/sites/yourcompany.sharepoint.com:/sites/{site_name}"
-            logger.debug(f"Trying direct lookup: {url}")
-            response = requests.get(url, headers=self.base_headers)
-            logger.debug(f"Direct response status: {response.status_code}")
+            logger.debug("Trying direct lookup: %s", url)
+            response = self._session.get(url, headers=self.base_headers, timeout=DEFAULT_TIMEOUT)
+            logger.debug("Direct response status: %s", response.status_code)
             
             if response.status_code == 200:
                 site_id = response.json()['id']
-                logger.info(f"\033[92m✓ Site ID found (direct): {site_id}\033[0m")
+                logger.info(f"✓ Site ID found (direct): {site_id}")
                 return site_id
             else:
                 logger.warning(f"Direct lookup failed: {response.status_code} - {response.text}")
         except Exception as e:
-            logger.debug(f"Direct site lookup failed: {e}")
+            logger.debug("Direct site lookup failed: %s", e)
         
         raise Exception(f"Cannot get site_id for site: {site_name}")
     
@@ -659,10 +964,10 @@ class SharePointHelper:
             
             logger.info(f"Deleting file: {file_item.get('name', 'Unknown')}")
             
-            response = requests.delete(delete_url, headers=self.base_headers)
+            response = self._session.delete(delete_url, headers=self.base_headers, timeout=DEFAULT_TIMEOUT)
             
             if response.status_code in [200, 204]:
-                logger.info(f"\033[92m✓ File deleted: {file_item.get('name')}\033[0m")
+                logger.info(f"✓ File deleted: {file_item.get('name')}")
                 return True
             else:
                 error_msg = f"Failed to delete file: {response.status_code} - {response.text}"
@@ -687,11 +992,11 @@ class SharePointHelper:
         try:
             from datetime import datetime, timezone
             
-            children = self.get_folder_childrens(folder)
             old_files = []
             threshold_date = datetime.now(timezone.utc) - timedelta(days=days)
             
-            for child in children:
+            # Only fields needed for the date check and delete_file() are fetched
+            for child in self.iter_folder_children(folder, select="id,name,createdDateTime,folder,parentReference"):
                 # Skip folders, only process files
                 if 'folder' in child:
                     continue
@@ -703,13 +1008,30 @@ class SharePointHelper:
                     if created_date < threshold_date:
                         old_files.append(child)
             
-            logger.info(f"\033[94mℹ Found {len(old_files)} files older than {days} days\033[0m")
+            logger.info(f"ℹ Found {len(old_files)} files older than {days} days")
             return old_files
             
         except Exception as e:
             logger.error(f"Failed to get old files: {e}")
             return []
 
+    @staticmethod
+    def _build_email_message(subject: str, html_body: str, to_recipients: list,
+                             cc_recipients: list = None) -> Dict[str, Any]:
+        """Build MS Graph sendMail payload"""
+        return {
+            "message": {
+                "subject": subject,
+                "body": {
+                    "contentType": "HTML",
+                    "content": html_body
+                },
+                "toRecipients": _recipients(to_recipients),
+                "ccRecipients": _recipients(cc_recipients)
+            },
+            "saveToSentItems": "true"
+        }
+    
     def send_email(self, sender_email: str, to_recipients: list, subject: str, 
                    html_body: str, cc_recipients: list = None) -> Dict[str, Any]:
         """
@@ -738,52 +1060,199 @@ class SharePointHelper:
             )
         """
         try:
-            # Build recipient list
-            to_list = [{"emailAddress": {"address": email}} for email in to_recipients]
-            cc_list = [{"emailAddress": {"address": email}} for email in cc_recipients] if cc_recipients else []
-            
             # Construct email message
-            email_message = {
-                "message": {
-                    "subject": subject,
-                    "body": {
-                        "contentType": "HTML",
-                        "content": html_body
-                    },
-                    "toRecipients": to_list,
-                    "ccRecipients": cc_list
-                },
-                "saveToSentItems": "true"
-            }
+            email_message = self._build_email_message(subject, html_body, to_recipients, cc_recipients)
             
             # MS Graph API endpoint for sending email
             # Use /users/{userId}/sendMail endpoint
             graph_url = f"https://graph.microsoft.com/v1.0/users/{sender_email}/sendMail"
             
-            logger.info(f"\033[94mℹ Sending email via MS Graph API to {to_recipients}\033[0m")
-            logger.debug(f"Graph URL: {graph_url}")
+            logger.info(f"ℹ Sending email via MS Graph API to {to_recipients}")
+            logger.debug("Graph URL: %s", graph_url)
             
             # Send POST request
-            response = requests.post(
+            response = self._session.post(
                 graph_url,
-                headers={
-                    **self.base_headers,
-                    "Content-Type": "application/json"
-                },
-                json=email_message
+                headers=self._json_headers,
+                data=_json_dumps(email_message),
+                timeout=DEFAULT_TIMEOUT
             )
             
             # Check response (202 = Accepted, 200 = OK)
             if response.status_code in [200, 202]:
-                logger.info(f"\033[92m✓ Email sent successfully via MS Graph API\033[0m")
+                logger.info(f"✓ Email sent successfully via MS Graph API")
                 return {"success": True, "status_code": response.status_code}
             else:
                 error_msg = f"MS Graph API error: {response.status_code} - {response.text}"
-                logger.error(f"\033[91m✗ {error_msg}\033[0m")
+                logger.error(f"✗ {error_msg}")
                 raise Exception(error_msg)
                 
         except Exception as e:
-            logger.error(f"\033[91m✗ Failed to send email via MS Graph: {e}\033[0m")
+            logger.error(f"✗ Failed to send email via MS Graph: {e}")
             raise
 
-
+    # ------------------------------------------------------------------
+    # Async API (httpx.AsyncClient, HTTP/2) - for use inside the event loop
+    # ------------------------------------------------------------------
+    
+    def _get_aclient(self) -> httpx.AsyncClient:
+        """Get shared async HTTP/2 client (see get_async_client)"""
+        return get_async_client()
+    
+    async def _aget_site_id(self, site_name: str) -> str:
+        """
+        Async version of _get_site_id()
+        
+        Args:
+            site_name: Name of SharePoint site
+            
+        Returns:
+            str: Site ID
+        """
+        cached = _metadata_get(('site', site_name))
+        if cached:
+            return cached
+        
+        client = self._get_aclient()
+        
+        # Try option 1: Search by name
+        try:
+            response = await client.get(f"https://graph.microsoft.com/v1.0/sites?search={site_name}", headers=self.base_headers)
+            if response.status_code == 200:
+                sites = response.json().get('value', [])
+                if sites:
+                    site_id = sites[0]['id']
+                    logger.info(f"✓ Site ID found (search): {site_id}")
+                    _metadata_set(('site', site_name), site_id)
+                    return site_id
+            else:
+                logger.warning(f"Search failed: {response.status_code} - {response.text}")
+        except Exception as e:
+            logger.debug("Site search failed: %s", e)
+        
+        # Try option 2: Direct path
+        try:
+            response = await client.get(f"https://graph.microsoft.com/v1.0/sites/yourcompany.sharepoint.com:/sites/{site_name}", headers=self.base_headers)
+            if response.status_code == 200:
+                site_id = response.json()['id']
+                logger.info(f"✓ Site ID found (direct): {site_id}")
+                _metadata_set(('site', site_name), site_id)
+                return site_id
+            else:
+                logger.warning(f"Direct lookup failed: {response.status_code} - {response.text}")
+        except Exception as e:
+            logger.debug("Direct site lookup failed: %s", e)
+        
+        raise Exception(f"Cannot get site_id for site: {site_name}")
+    
+    async def _asharepoint_to_msgraph(self, url: str, *, trailing_colon: bool = False) -> str:
+        """
+        Async version of _sharepoint_to_msgraph()
+        
+        Args:
+            url: SharePoint URL
+            trailing_colon: Keep closing ':' of the path segment (see _sharepoint_to_msgraph)
+            
+        Returns:
+            str: MS Graph API URL
+        """
+        site_name, relative_path = self._parse_sharepoint_url(url)
+        site_id = await self._aget_site_id(site_name)
+        msgraph_url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root:/{relative_path}"
+        return msgraph_url + ":" if trailing_colon else msgraph_url
+    
+    async def send_email_async(self, sender_email: str, to_recipients: list, subject: str,
+                               html_body: str, cc_recipients: list = None) -> Dict[str, Any]:
+        """
+        Async version of send_email() - does not block a worker thread while waiting for Graph
+        
+        Args:
+            sender_email: Email address of sender (must have permissions)
+            to_recipients: List of recipient email addresses
+            subject: Email subject
+            html_body: HTML content of email
+            cc_recipients: Optional list of CC email addresses
+            
+        Returns:
+            dict: Response from Graph API
+        """
+        try:
+            email_message = self._build_email_message(subject, html_body, to_recipients, cc_recipients)
+            graph_url = f"https://graph.microsoft.com/v1.0/users/{sender_email}/sendMail"
+            
+            logger.info(f"ℹ Sending email via MS Graph API to {to_recipients}")
+            
+            response = await self._get_aclient().post(
+                graph_url,
+                content=_json_dumps(email_message),
+                headers=self._json_headers
+            )
+            
+            # Check response (202 = Accepted, 200 = OK)
+            if response.status_code in [200, 202]:
+                logger.info(f"✓ Email sent successfully via MS Graph API")
+                return {"success": True, "status_code": response.status_code}
+            else:
+                error_msg = f"MS Graph API error: {response.status_code} - {response.text}"
+                logger.error(f"✗ {error_msg}")
+                raise Exception(error_msg)
+                
+        except Exception as e:
+            logger.error(f"✗ Failed to send email via MS Graph: {e}")
+            raise
+    
+    async def aupload_bytes(self, content: bytes, folder: Dict[str, Any], filename: str) -> Dict[str, Any]:
+        """
+        Async version of upload_bytes()
+        
+        Args:
+            content: File content
+            folder: Target folder object from get_folder()
+            filename: Name of file in SharePoint
+            
+        Returns:
+            dict: Uploaded file object
+        """
+        try:
+            client = self._get_aclient()
+            msgraph_url = await self._asharepoint_to_msgraph(folder['webUrl'])
+            total = len(content)
+            timeout = httpx.Timeout(total // 1_000_000 + 30, connect=DEFAULT_TIMEOUT[0])
+            
+            logger.info(f"Uploading file: {filename} ({total} bytes)")
+            
+            if total <= SIMPLE_UPLOAD_MAX_BYTES:
+                response = await client.put(f"{msgraph_url}/{filename}:/content", content=content,
+                                            headers=self._octet_headers, timeout=timeout)
+            else:
+                session_response = await client.post(
+                    f"{msgraph_url}/{filename}:/createUploadSession",
+                    json={"item": {"@microsoft.graph.conflictBehavior": "replace"}},
+                    headers=self.base_headers
+                )
+                if session_response.status_code != 200:
+                    raise Exception(f"Failed to create upload session: {session_response.status_code} - {session_response.text}")
+                upload_url = session_response.json()['uploadUrl']
+                
+                # Fragments must be sent in order; uploadUrl is pre-authenticated (no Authorization header)
+                view = memoryview(content)
+                for start in range(0, total, UPLOAD_CHUNK_SIZE):
+                    chunk = bytes(view[start:start + UPLOAD_CHUNK_SIZE])
+                    end = start + len(chunk) - 1
+                    response = await client.put(upload_url, content=chunk, headers={
+                        "Content-Range": f"bytes {start}-{end}/{total}"
+                    }, timeout=timeout)
+                    if response.status_code not in [200, 201, 202]:
+                        break
+            
+            if response.status_code in [200, 201]:
+                logger.info(f"✓ File uploaded: {filename}")
+                return response.json()
+            else:
+                error_msg = f"Upload failed: {response.status_code} - {response.text}"
+                logger.error(error_msg)
+                raise Exception(error_msg)
+                
+        except Exception as e:
+            logger.error(f"Failed to upload file: {e}")
+            raise
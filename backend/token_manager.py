@@ -2,15 +2,24 @@
 Token Manager - Automatyczne pobieranie i odświeżanie Access Token z REST API
 """
 
+import asyncio
+import concurrent.futures
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import warnings
 import ssl
 import logging
 import os
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from pathlib import Path
 
+import orjson
+
 # Wyłącz ostrzeżenia SSL dla wewnętrznych API bez certyfikatu
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 warnings.simplefilter('ignore', InsecureRequestWarning)
@@ -26,6 +35,7 @@ class TokenManager:
     - Pobierany z REST API gdy jest potrzebny
     - Cache'owany w pamięci z datą wygaśnięcia
     - Automatycznie odświeżany gdy wygaśnie
+    - Odświeżany w tle przed wygaśnięciem (żeby request użytkownika nie czekał na API)
     """
     
     def __init__(self, 
@@ -33,7 +43,8 @@ class TokenManager:
                  email: str = "transport-app@yourdomain.com",
                  password: str = None,
                  application_name: str = "your-app-name",
-                 token_lifetime_hours: int = 1):
+                 token_lifetime_hours: int = 1,
+                 refresh_lead_seconds: int = 300):
         """
         Inicjalizacja Token Manager
         
@@ -43,21 +54,46 @@ class TokenManager:
             password: Hasło (z env lub keyring)
             application_name: Nazwa aplikacji RPA
             token_lifetime_hours: Ile godzin token jest ważny (default: 1h)
+            refresh_lead_seconds: Ile sekund przed końcem ważności (z buforem) odświeżyć token w tle
         """
         self.token_api_url = token_api_url
         self.email = email
         self.application_name = application_name
         self.token_lifetime_hours = token_lifetime_hours
+        self.refresh_lead_seconds = refresh_lead_seconds
         
-        # Token cache
+        # Token cache (chroniony lockiem - czytany z wątków FastAPI i z timera)
+        self._lock = threading.RLock()
         self._cached_token: Optional[str] = None
-        self._token_expires_at: Optional[datetime] = None
+        # Wygaśnięcie liczone na zegarze monotonicznym (odporne na korekty NTP/DST);
+        # _token_issued_at (czas ścienny) tylko do wyświetlania w get_token_info()
+        self._token_expires_at_mono: Optional[float] = None
+        self._token_issued_at: Optional[datetime] = None
+        self._refresh_timer: Optional[threading.Timer] = None
+        # Single-flight: trwające pobieranie z API - równoległe wywołania (wątki i korutyny)
+        # czekają na ten sam wynik
+        self._inflight: Optional[concurrent.futures.Future] = None
+        # Wersja async (event loop FastAPI) - klient HTTP/2 tworzony leniwie w pętli
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._aclient_loop = None
+        
+        # Negative cache: po błędzie API nie odpytuj go ponownie przez _failure_backoff_sec (1s -> 60s)
+        self._last_failure_at: Optional[float] = None
+        self._failure_backoff_sec: float = 0
+        
+        # Sesja HTTP z pulą połączeń (keep-alive do Token API między odświeżeniami)
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        ))
         
         # Pobierz hasło z env (fallback: ze zmiennej środowiskowej)
         self.password = password or os.getenv('RPA_BOT_PASSWORD')
         
         if not self.password:
-            logger.warning("\033[93m⚠ RPA_BOT_PASSWORD not set - token fetching will fail\033[0m")
+            logger.warning("⚠ RPA_BOT_PASSWORD not set - token fetching will fail")
     
     def get_token(self, force_refresh: bool = False) -> str:
         """
@@ -72,79 +108,218 @@ class TokenManager:
         Raises:
             Exception: Jeśli nie udało się pobrać tokena
         """
-        # Sprawdź czy mamy ważny token w cache
-        if not force_refresh and self._is_token_valid():
-            logger.debug("\033[92m✓ Using cached token (valid)\033[0m")
-            return self._cached_token
+        token, inflight, is_leader = self._join_fetch(force_refresh)
+        if token is not None:
+            return token
+        
+        if inflight is None:
+            return self._fallback_token(Exception("Token API unavailable (backing off after recent failure)"))
+        
+        if not is_leader:
+            logger.debug("ℹ Waiting for in-flight token fetch")
+            try:
+                return inflight.result()
+            except Exception as e:
+                return self._fallback_token(e)
         
         # Pobierz nowy token z API
-        logger.info("\033[94mℹ Fetching new access token from API...\033[0m")
+        logger.info("ℹ Fetching new access token from API...")
         try:
             token = self._fetch_token_from_api()
-            self._cached_token = token
-            self._token_expires_at = datetime.now() + timedelta(hours=self.token_lifetime_hours)
-            logger.info(f"\033[92m✓ New token fetched (expires: {self._token_expires_at.strftime('%Y-%m-%d %H:%M:%S')})\033[0m")
+        except Exception as e:
+            self._record_fetch_failure()
+            inflight.set_exception(e)
+            return self._fallback_token(e)
+        else:
+            self._store_token(token)
+            inflight.set_result(token)
             return token
+        finally:
+            self._finish_fetch(inflight)
+    
+    async def get_token_async(self, force_refresh: bool = False) -> str:
+        """
+        Async wersja get_token() - nie blokuje event loopa podczas pobierania tokena
+        
+        Dzieli single-flight z get_token(): korutyna czeka na pobieranie trwające
+        w wątku (i odwrotnie) zamiast wysyłać drugie zapytanie do API.
+        
+        Args:
+            force_refresh: Czy wymusić pobranie nowego tokena (ignoruj cache)
+            
+        Returns:
+            str: Access Token gotowy do użycia
+        """
+        token, inflight, is_leader = self._join_fetch(force_refresh)
+        if token is not None:
+            return token
+        
+        if inflight is None:
+            return self._fallback_token(Exception("Token API unavailable (backing off after recent failure)"))
+        
+        if not is_leader:
+            logger.debug("ℹ Waiting for in-flight token fetch (async)")
+            try:
+                # shield: anulowanie czekającej korutyny nie anuluje wspólnego Future
+                return await asyncio.shield(asyncio.wrap_future(inflight))
+            except Exception as e:
+                return self._fallback_token(e)
+        
+        logger.info("ℹ Fetching new access token from API (async)...")
+        try:
+            token = await self._fetch_token_from_api_async()
         except Exception as e:
-            logger.error(f"\033[91m✗ Failed to fetch token: {e}\033[0m")
-            # Fallback: spróbuj użyć tokena z .env jeśli jest
-            env_token = os.getenv('SHAREPOINT_ACCESS_TOKEN')
-            if env_token:
-                logger.warning("\033[93m⚠ Using fallback token from SHAREPOINT_ACCESS_TOKEN env variable\033[0m")
-                return env_token
-            raise
+            self._record_fetch_failure()
+            inflight.set_exception(e)
+            return self._fallback_token(e)
+        else:
+            self._store_token(token)
+            inflight.set_result(token)
+            return token
+        finally:
+            self._finish_fetch(inflight)
     
-    def _is_token_valid(self) -> bool:
-        """Sprawdź czy cached token jest jeszcze ważny"""
-        if not self._cached_token or not self._token_expires_at:
+    def _join_fetch(self, force_refresh: bool) -> tuple:
+        """
+        Sprawdź cache i dołącz do pobierania tokena (wspólne dla get_token i get_token_async)
+        
+        Returns:
+            tuple: (cached_token, inflight, is_leader) - cached_token gdy ważny; inflight None
+                   gdy API w backoffie; lider pobiera token, pozostali czekają na jego Future
+        """
+        with self._lock:
+            if not force_refresh and self._is_token_valid():
+                logger.debug("✓ Using cached token (valid)")
+                return self._cached_token, None, False
+            
+            if not force_refresh and self._in_failure_backoff():
+                return None, None, False
+            
+            inflight = self._inflight
+            is_leader = inflight is None
+            if is_leader:
+                inflight = self._inflight = concurrent.futures.Future()
+                # RUNNING: Future nie da się już anulować - wynik ustawia tylko lider
+                inflight.set_running_or_notify_cancel()
+            return None, inflight, is_leader
+    
+    def _finish_fetch(self, inflight: concurrent.futures.Future):
+        """Zakończ pobieranie lidera - czekający nie mogą zawisnąć (np. anulowana korutyna)"""
+        if not inflight.done():
+            inflight.set_exception(RuntimeError("Token fetch was cancelled"))
+        with self._lock:
+            if self._inflight is inflight:
+                self._inflight = None
+    
+    def _store_token(self, token: str):
+        """Zapisz nowy token w cache i zaplanuj odświeżenie w tle"""
+        with self._lock:
+            self._cached_token = token
+            self._token_expires_at_mono = time.monotonic() + self.token_lifetime_hours * 3600
+            self._token_issued_at = datetime.now()
+            self._last_failure_at = None
+            self._failure_backoff_sec = 0
+            logger.info(f"✓ New token fetched (expires: {self._expires_at_wall().strftime('%Y-%m-%d %H:%M:%S')})")
+            self._schedule_refresh()
+    
+    def _in_failure_backoff(self) -> bool:
+        """Czy jesteśmy w oknie backoffu po ostatnim błędzie Token API"""
+        with self._lock:
+            if self._last_failure_at is None:
+                return False
+            return time.monotonic() - self._last_failure_at < self._failure_backoff_sec
+    
+    def _record_fetch_failure(self):
+        """Zapamiętaj błąd Token API i wydłuż backoff (1s, 2s, 4s, ... max 60s)"""
+        with self._lock:
+            self._last_failure_at = time.monotonic()
+            self._failure_backoff_sec = min(max(self._failure_backoff_sec * 2, 1), 60)
+    
+    def _fallback_token(self, error: Exception) -> str:
+        """Fallback po błędzie pobierania: token z SHAREPOINT_ACCESS_TOKEN albo ponowne rzucenie błędu"""
+        logger.error(f"✗ Failed to fetch token: {error}")
+        # Fallback: spróbuj użyć tokena z .env jeśli jest
+        env_token = os.getenv('SHAREPOINT_ACCESS_TOKEN')
+        if env_token:
+            logger.warning("⚠ Using fallback token from SHAREPOINT_ACCESS_TOKEN env variable")
+            return env_token
+        raise error
+    
+    def _schedule_refresh(self):
+        """Zaplanuj odświeżenie tokena w tle przed wygaśnięciem (wywoływane pod lockiem)"""
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+        
+        # Odśwież refresh_lead_seconds przed momentem, w którym token przestaje być ważny (5min bufor)
+        delay = self.token_lifetime_hours * 3600 - 300 - self.refresh_lead_seconds
+        self._refresh_timer = threading.Timer(max(delay, 60), self._background_refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+    
+    def _background_refresh(self):
+        """Odśwież token w tle (callback timera)"""
+        try:
+            self.get_token(force_refresh=True)
+            logger.debug("✓ Token refreshed in background")
+        except Exception as e:
+            # Następne wywołanie get_token() pobierze token synchronicznie
+            logger.warning(f"⚠ Background token refresh failed: {e}")
+    
+    def stop(self):
+        """Zatrzymaj odświeżanie tokena w tle (przy zamykaniu aplikacji)"""
+        with self._lock:
+            if self._refresh_timer is not None:
+                self._refresh_timer.cancel()
+                self._refresh_timer = None
+    
+    def close(self):
+        """Zatrzymaj odświeżanie w tle i zamknij pulę połączeń do Token API (przy zamykaniu aplikacji)"""
+        self.stop()
+        self._session.close()
+    
+    def _is_token_valid(self, now: Optional[float] = None) -> bool:
+        """Sprawdź czy cached token jest jeszcze ważny (now: już odczytany time.monotonic())"""
+        if not self._cached_token or self._token_expires_at_mono is None:
             return False
         
         # Token jest ważny jeśli nie wygasł (z 5min buforem bezpieczeństwa)
-        buffer = timedelta(minutes=5)
-        return datetime.now() < (self._token_expires_at - buffer)
+        return (time.monotonic() if now is None else now) < self._token_expires_at_mono - 300
     
-    def _fetch_token_from_api(self) -> str:
+    def _expires_at_wall(self) -> Optional[datetime]:
+        """Czas wygaśnięcia tokena jako datetime (tylko do logów/diagnostyki)"""
+        if self._token_issued_at is None:
+            return None
+        return self._token_issued_at + timedelta(hours=self.token_lifetime_hours)
+    
+    def _build_request(self) -> tuple:
         """
-        Pobierz token z REST API (wewnętrzne API)
+        Przygotuj body (JSON bytes) i nagłówki requestu do Token Manager API
         
         Returns:
-            str: Access Token
-            
-        Raises:
-            Exception: Jeśli API zwróci błąd
+            tuple: (payload: bytes, headers: dict)
         """
         if not self.password:
             raise ValueError("RPA_BOT_PASSWORD not configured - cannot fetch token")
         
-        try:
-            # Przygotuj request do Token Manager API
-            body = {
-                "email": self.email,
-                "password": self.password,
-                "application_name": self.application_name
-            }
-            headers = {
-                "Accept": "application/json",
-                "Content-Type": "application/json"
-            }
-            
-            logger.info(f"\033[94mℹ Fetching token from API: {self.token_api_url}\033[0m")
-            
-            # Wyślij zapytanie do API
-            response = requests.post(
-                self.token_api_url,
-                json=body,
-                headers=headers,
-                verify=False,  # Wewnętrzne API bez weryfikacji SSL
-                timeout=30
-            )
-            
-            logger.info(f"\033[92m✓ Token API response: {response.status_code}\033[0m")
-            
-        except Exception as e:
-            logger.error(f"\033[91m✗ Token API connection error: {type(e).__name__}: {str(e)}\033[0m")
-            raise
+        body = {
+            "email": self.email,
+            "password": self.password,
+            "application_name": self.application_name
+        }
+        headers = {
+            "Accept": "application/json",
+            "Content-Type": "application/json"
+        }
+        payload = orjson.dumps(body)
+        return payload, headers
+    
+    def _parse_token_response(self, response) -> str:
+        """
+        Wyciągnij access_token z odpowiedzi API (requests.Response lub httpx.Response)
         
+        Raises:
+            Exception: Jeśli API zwróci błąd lub niepoprawną odpowiedź
+        """
         # Sprawdź status
         if response.status_code != 200:
             error_msg = f"Token API error: {response.status_code} - {response.text}"
@@ -153,13 +328,14 @@ class TokenManager:
         
         # Pobierz token z odpowiedzi
         try:
-            response_json = response.json()
+            response_json = orjson.loads(response.content)
             token = response_json.get('access_token')
             
             if not token:
                 raise ValueError("Response does not contain 'access_token' field")
             
-            logger.debug(f"Token received: {token[:50]}... (length: {len(token)})")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Token received: %s... (length: %s)", token[:50], len(token))
             return token
             
         except (ValueError, KeyError) as e:
@@ -167,11 +343,82 @@ class TokenManager:
             logger.error(error_msg)
             raise Exception(error_msg)
     
+    def _fetch_token_from_api(self) -> str:
+        """
+        Pobierz token z REST API (wewnętrzne API)
+        
+        Returns:
+            str: Access Token
+            
+        Raises:
+            Exception: Jeśli API zwróci błąd
+        """
+        payload, headers = self._build_request()
+        
+        try:
+            logger.info(f"ℹ Fetching token from API: {self.token_api_url}")
+            
+            # Wyślij zapytanie do API
+            response = self._session.post(
+                self.token_api_url,
+                data=payload,
+                headers=headers,
+                verify=False,  # Wewnętrzne API bez weryfikacji SSL
+                timeout=30
+            )
+            
+            logger.info(f"✓ Token API response: {response.status_code}")
+            
+        except Exception as e:
+            logger.error(f"✗ Token API connection error: {type(e).__name__}: {str(e)}")
+            raise
+        
+        return self._parse_token_response(response)
+    
+    def _get_aclient(self) -> httpx.AsyncClient:
+        """Pobierz (lub utwórz) klienta async HTTP/2 dla bieżącego event loopa"""
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient.is_closed or self._aclient_loop is not loop:
+            self._aclient = httpx.AsyncClient(
+                http2=True,
+                verify=False,  # Wewnętrzne API bez weryfikacji SSL
+                timeout=30
+            )
+            self._aclient_loop = loop
+        return self._aclient
+    
+    async def _fetch_token_from_api_async(self) -> str:
+        """
+        Async wersja _fetch_token_from_api() (httpx.AsyncClient)
+        
+        Returns:
+            str: Access Token
+        """
+        payload, headers = self._build_request()
+        
+        try:
+            logger.info(f"ℹ Fetching token from API: {self.token_api_url}")
+            response = await self._get_aclient().post(self.token_api_url, content=payload, headers=headers)
+            logger.info(f"✓ Token API response: {response.status_code}")
+        except Exception as e:
+            logger.error(f"✗ Token API connection error: {type(e).__name__}: {str(e)}")
+            raise
+        
+        return self._parse_token_response(response)
+    
+    async def aclose(self):
+        """Zamknij klienta async HTTP (przy zamykaniu aplikacji)"""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+    
     def clear_cache(self):
         """Wyczyść cached token (wymusi pobranie nowego przy następnym użyciu)"""
-        self._cached_token = None
-        self._token_expires_at = None
-        logger.info("\033[94mℹ Token cache cleared\033[0m")
+        with self._lock:
+            self._cached_token = None
+            self._token_expires_at_mono = None
+            self._token_issued_at = None
+        logger.info("ℹ Token cache cleared")
     
     def get_token_info(self) -> dict:
         """
@@ -180,18 +427,28 @@ class TokenManager:
         Returns:
             dict: Informacje o tokenie
         """
+        with self._lock:
+            return self._build_token_info()
+    
+    def _build_token_info(self) -> dict:
+        """Zbuduj słownik z informacjami o tokenie (wywoływane pod lockiem)"""
+        expires_at = self._expires_at_wall()
+        # Jeden odczyt zegara monotonicznego dla is_valid i minutes_until_expiry
+        now = time.monotonic()
+        is_valid = self._is_token_valid(now)
         return {
             "has_cached_token": bool(self._cached_token),
             "token_preview": self._cached_token[:50] + "..." if self._cached_token else None,
-            "expires_at": self._token_expires_at.isoformat() if self._token_expires_at else None,
-            "is_valid": self._is_token_valid(),
-            "minutes_until_expiry": int((self._token_expires_at - datetime.now()).total_seconds() / 60) 
-                                    if self._token_expires_at and self._is_token_valid() else None,
+            "expires_at": expires_at.isoformat() if expires_at else None,
+            "is_valid": is_valid,
+            "failure_backoff_seconds": self._failure_backoff_sec if self._last_failure_at else 0,
+            "minutes_until_expiry": int((self._token_expires_at_mono - now) / 60) if is_valid else None,
             "config": {
                 "email": self.email,
                 "application_name": self.application_name,
                 "token_api_url": self.token_api_url,
                 "token_lifetime_hours": self.token_lifetime_hours,
+                "refresh_lead_seconds": self.refresh_lead_seconds,
                 "has_password": bool(self.password)
             }
         }
@@ -199,6 +456,7 @@ class TokenManager:
 
 # Global singleton instance
 _token_manager: Optional[TokenManager] = None
+_token_manager_lock = threading.Lock()
 
 
 def get_token_manager(config: dict = None) -> TokenManager:
@@ -214,22 +472,26 @@ def get_token_manager(config: dict = None) -> TokenManager:
     global _token_manager
     
     if _token_manager is None:
-        # Inicjalizuj z konfiguracją
-        if config:
-            token_config = config.get('token_manager', {})
-            _token_manager = TokenManager(
-                token_api_url=token_config.get('api_url', 
-                    'https://your-token-api.yourdomain.com/getaccesstoken'),
-                email=token_config.get('email', 'transport-app@yourdomain.com'),
-                password=token_config.get('password') or os.getenv('RPA_BOT_PASSWORD'),
-                application_name=token_config.get('application_name', 'your-app-name'),
-                token_lifetime_hours=token_config.get('token_lifetime_hours', 1)
-            )
-        else:
-            # Domyślna konfiguracja
-            _token_manager = TokenManager()
-        
-        logger.info("\033[94mℹ TokenManager initialized\033[0m")
+        with _token_manager_lock:
+            # Double-checked: tylko jeden wątek tworzy instancję
+            if _token_manager is None:
+                # Inicjalizuj z konfiguracją
+                if config:
+                    token_config = config.get('token_manager', {})
+                    _token_manager = TokenManager(
+                        token_api_url=token_config.get('api_url', 
+                            'https://your-token-api.yourdomain.com/getaccesstoken'),
+                        email=token_config.get('email', 'transport-app@yourdomain.com'),
+                        password=token_config.get('password') or os.getenv('RPA_BOT_PASSWORD'),
+                        application_name=token_config.get('application_name', 'your-app-name'),
+                        token_lifetime_hours=token_config.get('token_lifetime_hours', 1),
+                        refresh_lead_seconds=token_config.get('refresh_lead_seconds', 300)
+                    )
+                else:
+                    # Domyślna konfiguracja
+                    _token_manager = TokenManager()
+                
+                logger.info("ℹ TokenManager initialized")
     
     return _token_manager
 
@@ -2,21 +2,25 @@
 AttachmentHelper - Encapsulates attachment upload operations
 No need to pass config/logger to every method - stored in instance
 """
+import asyncio
 import logging
 from typing import List, Dict, Tuple
 import os
-import tempfile
-from pathlib import Path
+import threading
 import time
 
 logger = logging.getLogger(__name__)
 
+# How long a resolved attachments folder handle is reused (seconds)
+FOLDER_CACHE_TTL = 300
+
 
 class AttachmentHelper:
     """Handles attachment uploads to SharePoint"""
     
     def __init__(self, sharepoint_config: dict, get_access_token_func,
-                 logger_instance=None, performance_metrics_instance=None):
+                 logger_instance=None, performance_metrics_instance=None,
+                 get_access_token_async_func=None):
         """
         Initialize Attachment helper
         
@@ -25,94 +29,169 @@ class AttachmentHelper:
             get_access_token_func: Function to get access token
             logger_instance: Standard logger
             performance_metrics_instance: Performance metrics tracker
+            get_access_token_async_func: Optional coroutine function to get access token
         """
         self.sharepoint_config = sharepoint_config
         self.get_access_token = get_access_token_func
+        self.get_access_token_async = get_access_token_async_func
         self.logger = logger_instance or logger
         self.metrics = performance_metrics_instance
         
-    def upload_single_attachment(self, att_data: dict, request_id: str) -> Tuple[bool, str, str]:
+        # Attachments folder cache: sp_folder_url -> (cached_at, folder object)
+        self._folder_cache: Dict[str, Tuple[float, dict]] = {}
+        self._folder_cache_lock = threading.Lock()
+        
+        # Cap on in-flight async uploads across all requests (semaphore is bound to its event loop)
+        self._upload_limit = sharepoint_config.get('upload_workers', 8)
+        self._upload_semaphore = None
+        self._upload_semaphore_loop = None
+    
+    def _get_upload_semaphore(self) -> asyncio.Semaphore:
+        """Get upload semaphore for the running event loop (recreated if the loop changed)"""
+        loop = asyncio.get_running_loop()
+        if self._upload_semaphore is None or self._upload_semaphore_loop is not loop:
+            self._upload_semaphore = asyncio.Semaphore(self._upload_limit)
+            self._upload_semaphore_loop = loop
+        return self._upload_semaphore
+    
+    def _get_or_create_attachments_folder(self, sp_helper, sp_folder_url: str) -> dict:
         """
-        Upload single attachment to SharePoint
+        Get 'attachments' subfolder object (cached), creating it if missing
         
         Args:
-            att_data: Dict with 'filename', 'content', 'index'
+            sp_helper: SharePointHelper instance
+            sp_folder_url: Parent SharePoint folder URL
+            
+        Returns:
+            dict: Attachments folder object
+        """
+        with self._folder_cache_lock:
+            cached = self._folder_cache.get(sp_folder_url)
+            if cached and time.monotonic() - cached[0] < FOLDER_CACHE_TTL:
+                return cached[1]
+            
+            # Construct attachments subfolder URL
+            sp_attachments_url = f"{sp_folder_url}/attachments"
+            
+            # Get or create attachments folder
+            try:
+                attachments_folder = sp_helper.get_folder(sp_attachments_url)
+            except Exception:
+                parent_folder = sp_helper.get_folder(sp_folder_url)
+                attachments_folder = sp_helper.create_folder(parent_folder, "attachments", conflict_behavior="fail")
+            
+            self._folder_cache[sp_folder_url] = (time.monotonic(), attachments_folder)
+            return attachments_folder
+    
+    async def aupload_attachments_batch(self, attachments_data: List[dict],
+                                        request_id: str) -> List[Tuple[bool, str, str]]:
+        """
+        Upload all attachments of a request to SharePoint in parallel
+        
+        Token, SharePointHelper and attachments folder are resolved ONCE per batch,
+        then files are uploaded concurrently on the event loop over the shared HTTP/2 client
+        (at most upload_workers in flight across all requests)
+        
+        Args:
+            attachments_data: List of dicts with 'filename', 'content', 'index'
             request_id: Request identifier
             
         Returns:
-            tuple: (success: bool, filename: str, error: str or None)
+            list: (success: bool, filename: str, error: str or None) per attachment, in input order
         """
         from sharepoint_helper import SharePointHelper
         
-        idx = att_data['index']
-        filename = att_data['filename']
-        content = att_data['content']
-        file_size = len(content)
+        if not attachments_data:
+            return []
         
-        upload_start = time.time()
+        batch_start = time.time()
         
         try:
-            ext = os.path.splitext(filename)[1]
-            new_filename = f"attachment_{request_id}_{idx+1}{ext}"
-            
-            # Get access token
-            access_token = self.get_access_token()
+            if self.get_access_token_async:
+                access_token = await self.get_access_token_async()
+            else:
+                access_token = await asyncio.to_thread(self.get_access_token)
             sp_helper = SharePointHelper(access_token)
             
-            # Get folder URL
             sp_folder_url = self.sharepoint_config.get('folder_url')
             if not sp_folder_url:
                 raise ValueError("SharePoint folder_url not configured")
             
-            # Construct attachments subfolder URL
-            sp_attachments_url = f"{sp_folder_url}/attachments"
-            
-            # Get or create attachments folder
-            try:
-                attachments_folder = sp_helper.get_folder(sp_attachments_url)
-            except Exception:
-                parent_folder = sp_helper.get_folder(sp_folder_url)
-                attachments_folder = sp_helper.create_folder(parent_folder, "attachments", conflict_behavior="fail")
+            # Folder lookup is cached - a thread hop only on cache miss
+            attachments_folder = await asyncio.to_thread(
+                self._get_or_create_attachments_folder, sp_helper, sp_folder_url
+            )
+        except Exception as setup_error:
+            upload_duration = time.time() - batch_start
+            return [self._record_failure(att_data, request_id, setup_error, upload_duration)
+                    for att_data in attachments_data]
+        
+        semaphore = self._get_upload_semaphore()
+        
+        async def upload_limited(att_data: dict) -> Tuple[bool, str, str]:
+            async with semaphore:
+                return await self._aupload_one(sp_helper, attachments_folder, att_data, request_id)
+        
+        return list(await asyncio.gather(*[upload_limited(att_data) for att_data in attachments_data]))
+    
+    def _record_failure(self, att_data: dict, request_id: str, att_error: Exception,
+                        upload_duration: float) -> Tuple[bool, str, str]:
+        """Log and record metrics for failed attachment upload"""
+        filename = att_data['filename']
+        error_msg = f"Attachment upload failed for {filename}: {att_error}"
+        self.logger.error(f"✗ Background: {error_msg} ({upload_duration:.2f}s)")
+        
+        # Record failure metrics
+        if self.metrics:
+            self.metrics.record_upload(
+                request_id=request_id,
+                filename=filename,
+                file_size=len(att_data['content']),
+                duration=upload_duration,
+                success=False,
+                error=str(att_error)
+            )
+        
+        return (False, filename, error_msg)
+    
+    async def _aupload_one(self, sp_helper, attachments_folder: dict, att_data: dict,
+                           request_id: str) -> Tuple[bool, str, str]:
+        """
+        Upload one attachment into already resolved attachments folder
+        
+        Args:
+            sp_helper: SharePointHelper instance (shared by the batch)
+            attachments_folder: Attachments folder object
+            att_data: Dict with 'filename', 'content', 'index'
+            request_id: Request identifier
             
-            # Upload using temp file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as temp_file:
-                temp_file.write(content)
-                temp_path = Path(temp_file.name)
+        Returns:
+            tuple: (success: bool, filename: str, error: str or None)
+        """
+        idx = att_data['index']
+        filename = att_data['filename']
+        content = att_data['content']
+        
+        upload_start = time.time()
+        
+        try:
+            ext = os.path.splitext(filename)[1]
+            new_filename = f"attachment_{request_id}_{idx+1}{ext}"
             
-            try:
-                sp_file = sp_helper.upload_file(temp_path, attachments_folder, custom_filename=new_filename)
-                upload_duration = time.time() - upload_start
-                self.logger.info(f"\033[92m✓ Background: Attachment {idx+1} uploaded: {new_filename} ({upload_duration:.2f}s)\033[0m")
-                
-                # Record success metrics
-                if self.metrics:
-                    self.metrics.record_upload(
-                        request_id=request_id,
-                        filename=new_filename,
-                        file_size=file_size,
-                        duration=upload_duration,
-                        success=True
-                    )
-                
-                return (True, new_filename, None)
-            finally:
-                if temp_path.exists():
-                    temp_path.unlink()
-                    
-        except Exception as att_error:
+            await sp_helper.aupload_bytes(content, attachments_folder, new_filename)
             upload_duration = time.time() - upload_start
-            error_msg = f"Attachment upload failed for {filename}: {att_error}"
-            self.logger.error(f"\033[91m✗ Background: {error_msg} ({upload_duration:.2f}s)\033[0m")
+            self.logger.info(f"✓ Background: Attachment {idx+1} uploaded: {new_filename} ({upload_duration:.2f}s)")
             
-            # Record failure metrics
             if self.metrics:
                 self.metrics.record_upload(
                     request_id=request_id,
-                    filename=filename,
-                    file_size=file_size,
+                    filename=new_filename,
+                    file_size=len(content),
                     duration=upload_duration,
-                    success=False,
-                    error=str(att_error)
+                    success=True
                 )
             
-            return (False, filename, error_msg)
+            return (True, new_filename, None)
+            
+        except Exception as att_error:
+            return self._record_failure(att_data, request_id, att_error, time.time() - upload_start)
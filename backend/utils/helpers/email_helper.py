@@ -2,12 +2,29 @@
 EmailHelper - Encapsulates email sending logic
 No need to pass config/logger to every method - stored in instance
 """
+import asyncio
 import logging
+import re
 from pathlib import Path
-from typing import Optional, List
+from string import Template
+from typing import Optional, List, Dict, Tuple
 
 logger = logging.getLogger(__name__)
 
+TEMPLATE_PATH = Path(__file__).parent.parent.parent / 'res' / 'confirmation_email.html'
+
+# {{placeholder}} -> $placeholder (string.Template syntax)
+_PLACEHOLDER_RE = re.compile(r'\{\{(\w+)\}\}')
+
+
+def compile_template(html: str) -> Template:
+    """
+    Convert {{placeholder}} HTML template to string.Template (parsed once, substituted in one pass)
+    
+    Literal '$' characters are escaped so only {{...}} placeholders get substituted.
+    """
+    return Template(_PLACEHOLDER_RE.sub(r'${\1}', html.replace('$', '$$')))
+
 
 def parse_email_list(email_input) -> list:
     """
@@ -25,7 +42,12 @@ def parse_email_list(email_input) -> list:
         return [email.strip() for email in email_input if email and email.strip()]
     
     if isinstance(email_input, str):
-        return [email.strip() for email in email_input.split(';') if email.strip()]
+        s = email_input.strip()
+        if not s:
+            return []
+        if ';' not in s:
+            return [s]
+        return [email.strip() for email in s.split(';') if email.strip()]
     
     return []
 
@@ -34,7 +56,7 @@ class EmailHelper:
     """Handles email sending via MS Graph API"""
     
     def __init__(self, config: dict, transport_config: dict, get_access_token_func,
-                 logger_instance=None, app_logger_instance=None):
+                 logger_instance=None, app_logger_instance=None, get_access_token_async_func=None):
         """
         Initialize Email helper with configuration and dependencies
         
@@ -44,15 +66,55 @@ class EmailHelper:
             get_access_token_func: Function to get SharePoint access token
             logger_instance: Standard logger
             app_logger_instance: Structured app logger
+            get_access_token_async_func: Optional coroutine function to get access token
         """
         self.config = config
         self.transport_config = transport_config
         self.email_config = transport_config.get('email', {})
         self.get_access_token = get_access_token_func
+        self.get_access_token_async = get_access_token_async_func
         self.logger = logger_instance or logger
         self.app_logger = app_logger_instance
         
-    def send_confirmation(self, request_id: str, data: dict, user_email: str,
+        # Test email -> (mode, mode CC) lookup, built once (first mode in dev/test/prod order wins)
+        self._mode_by_email: Dict[str, Tuple[str, Optional[str]]] = {}
+        for mode in ['dev', 'test', 'prod']:
+            mode_config = self.config.get(mode, {})
+            for email in mode_config.get('test_emails', []):
+                self._mode_by_email.setdefault(email.lower(), (mode, mode_config.get('cc_email')))
+        
+        # Confirmation email template - read once, reloaded only when file changes
+        self._template: Optional[Template] = None
+        self._template_mtime: Optional[float] = None
+        self._load_template()
+    
+    def _load_template(self) -> Optional[Template]:
+        """
+        Load (or reload if modified) and compile confirmation email HTML template
+        
+        Returns:
+            Template: Compiled template, or None if template file is missing
+        """
+        try:
+            mtime = TEMPLATE_PATH.stat().st_mtime
+        except OSError:
+            self.logger.error(f"✗ Email template not found: {TEMPLATE_PATH}")
+            self._template = None
+            self._template_mtime = None
+            return None
+        
+        if self._template is None or mtime != self._template_mtime:
+            self._template = compile_template(TEMPLATE_PATH.read_text(encoding='utf-8'))
+            self._template_mtime = mtime
+        return self._template
+    
+    async def _get_token_async(self) -> str:
+        """Get access token without blocking the event loop"""
+        if self.get_access_token_async:
+            return await self.get_access_token_async()
+        return await asyncio.to_thread(self.get_access_token)
+    
+    async def send_confirmation(self, request_id: str, data: dict, user_email: str,
                          has_attachment: bool, attachment_error: str = None,
                          attachments_saved: List[str] = None):
         """
@@ -69,7 +131,7 @@ class EmailHelper:
         try:
             # Check if email sending is enabled
             if not self.email_config.get('enabled', True):
-                self.logger.info("\033[94mℹ Email sending disabled in config\033[0m")
+                self.logger.info("ℹ Email sending disabled in config")
                 return
             
             # Get email settings
@@ -78,34 +140,23 @@ class EmailHelper:
             cc_email = self.email_config.get('cc_email', '')
             
             # Check if user email is in test_emails lists (dev/test/prod modes)
-            user_email_lower = user_email.lower()
-            detected_mode = None
-            
-            for mode in ['dev', 'test', 'prod']:
-                mode_config = self.config.get(mode, {})
-                test_emails = mode_config.get('test_emails', [])
-                test_emails_lower = [email.lower() for email in test_emails]
-                
-                if user_email_lower in test_emails_lower:
-                    detected_mode = mode
-                    cc_email = mode_config.get('cc_email', cc_email)
-                    self.logger.info(f"\033[93m⚠ {mode.upper()} MODE detected ({user_email}) - using CC: {cc_email}\033[0m")
-                    break
+            detected = self._mode_by_email.get(user_email.lower())
             
-            if not detected_mode:
-                self.logger.info(f"\033[94mℹ Production mode - using default CC: {cc_email}\033[0m")
+            if detected:
+                detected_mode, mode_cc_email = detected
+                if mode_cc_email is not None:
+                    cc_email = mode_cc_email
+                self.logger.info(f"⚠ {detected_mode.upper()} MODE detected ({user_email}) - using CC: {cc_email}")
+            else:
+                self.logger.info(f"ℹ Production mode - using default CC: {cc_email}")
             
             subject_template = self.email_config.get('subject_template', 'Transport Request Confirmation - {request_id}')
             
-            # Load HTML template
-            template_path = Path(__file__).parent.parent.parent / 'res' / 'confirmation_email.html'
-            if not template_path.exists():
-                self.logger.error(f"\033[91m✗ Email template not found: {template_path}\033[0m")
+            # Get cached HTML template
+            html_template = self._load_template()
+            if html_template is None:
                 return
             
-            with open(template_path, 'r', encoding='utf-8') as f:
-                html_template = f.read()
-            
             # Prepare attachment status text
             if has_attachment and attachments_saved:
                 attachment_status = f"✓ Successfully saved ({len(attachments_saved)} file(s))"
@@ -114,19 +165,21 @@ class EmailHelper:
             else:
                 attachment_status = "No attachments"
             
-            # Replace placeholders
-            html_body = html_template.replace('{{request_id}}', request_id)
-            html_body = html_body.replace('{{delivery_note}}', data.get('deliveryNoteNumber', 'N/A'))
-            html_body = html_body.replace('{{truck_plates}}', data.get('truckLicensePlates', 'N/A'))
-            html_body = html_body.replace('{{trailer_plates}}', data.get('trailerLicensePlates', 'N/A'))
-            html_body = html_body.replace('{{carrier_country}}', data.get('carrierCountry', 'N/A'))
-            html_body = html_body.replace('{{carrier_tax_code}}', data.get('carrierTaxCode', 'N/A'))
-            html_body = html_body.replace('{{carrier_name}}', data.get('carrierFullName', 'N/A'))
-            html_body = html_body.replace('{{border_crossing}}', data.get('borderCrossing', 'N/A'))
-            html_body = html_body.replace('{{crossing_date}}', data.get('borderCrossingDate', 'N/A'))
-            html_body = html_body.replace('{{email}}', data.get('email', 'N/A'))
-            html_body = html_body.replace('{{phone_number}}', data.get('phoneNumber', 'N/A') or 'Not provided')
-            html_body = html_body.replace('{{attachment_status}}', attachment_status)
+            # Replace placeholders (single pass)
+            html_body = html_template.safe_substitute(
+                request_id=request_id,
+                delivery_note=data.get('deliveryNoteNumber', 'N/A'),
+                truck_plates=data.get('truckLicensePlates', 'N/A'),
+                trailer_plates=data.get('trailerLicensePlates', 'N/A'),
+                carrier_country=data.get('carrierCountry', 'N/A'),
+                carrier_tax_code=data.get('carrierTaxCode', 'N/A'),
+                carrier_name=data.get('carrierFullName', 'N/A'),
+                border_crossing=data.get('borderCrossing', 'N/A'),
+                crossing_date=data.get('borderCrossingDate', 'N/A'),
+                email=data.get('email', 'N/A'),
+                phone_number=data.get('phoneNumber', 'N/A') or 'Not provided',
+                attachment_status=attachment_status
+            )
             
             # Prepare recipient lists
             to_recipients = parse_email_list(user_email)
@@ -135,12 +188,12 @@ class EmailHelper:
             
             # Get access token and send
             from sharepoint_helper import SharePointHelper
-            access_token = self.get_access_token()
+            access_token = await self._get_token_async()
             sp = SharePointHelper(access_token)
             
-            self.logger.info(f"\033[94mℹ Sending confirmation email to {user_email} (CC: {cc_email or 'none'})\033[0m")
+            self.logger.info(f"ℹ Sending confirmation email to {user_email} (CC: {cc_email or 'none'})")
             
-            sp.send_email(
+            await sp.send_email_async(
                 sender_email=sender_email,
                 to_recipients=to_recipients,
                 subject=subject,
@@ -148,7 +201,7 @@ class EmailHelper:
                 cc_recipients=cc_recipients
             )
             
-            self.logger.info(f"\033[92m✓ Confirmation email sent successfully to {user_email}\033[0m")
+            self.logger.info(f"✓ Confirmation email sent successfully to {user_email}")
             
             if self.app_logger:
                 self.app_logger.log_info(
@@ -163,7 +216,8 @@ class EmailHelper:
                 )
             
         except Exception as e:
-            self.logger.error(f"\033[91m✗ Failed to send confirmation email: {e}\033[0m", exc_info=True)
+            self.logger.error(f"✗ Failed to send confirmation email: {type(e).__name__}: {e}")
+            self.logger.debug("Confirmation email traceback:", exc_info=True)
             if self.app_logger:
                 self.app_logger.log_error(
                     f"Email send failed for {request_id}",
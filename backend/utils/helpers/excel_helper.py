@@ -5,12 +5,164 @@ No need to pass config/logger to every method - stored in instance
 import json
 import os
 import logging
-from datetime import datetime
-from pathlib import Path
-from typing import Optional, Dict, Any
+import queue
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+from typing import Optional, Dict, Any, Callable, List, Tuple
+
+from .attachment_helper import FOLDER_CACHE_TTL
+from .transport_row import attachment_fields, build_row
 
 logger = logging.getLogger(__name__)
 
+# Error text fragments meaning the workbook is locked by another user/process
+LOCK_INDICATORS = frozenset({
+    'locked', 'in use', 'being used', 'cannot access', '423',
+    'cobaltlockviolation', 'resourcelocked', 'file is open'
+})
+# Compiled once: one case-insensitive pass over the message, no lowercased copy
+_LOCK_RE = re.compile('|'.join(map(re.escape, sorted(LOCK_INDICATORS))), re.IGNORECASE)
+
+# Lock retry backoff: min(LOCK_RETRY_CAP, LOCK_RETRY_BASE * 2**attempt) seconds, +-50% jitter
+LOCK_RETRY_BASE = 0.5
+LOCK_RETRY_CAP = 10.0
+
+
+def is_lock_error(error: Exception) -> bool:
+    """Check whether error means the SharePoint file is locked"""
+    return _LOCK_RE.search(str(error)) is not None
+
+
+def lock_retry_wait(attempt: int) -> float:
+    """
+    Wait time before next lock retry - capped exponential backoff with jitter
+    
+    Jitter spreads retries of concurrent submissions, so they don't hit
+    the locked file again at the same moment.
+    
+    Args:
+        attempt: Zero-based number of the failed attempt
+        
+    Returns:
+        float: Seconds to wait
+    """
+    return min(LOCK_RETRY_CAP, LOCK_RETRY_BASE * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+
+class ExcelBatchWriter:
+    """
+    Coalesces concurrent Excel row inserts into a single SharePoint range write
+    
+    Rows submitted within flush_interval seconds (max max_batch rows) are written
+    by one background thread in one call, so a burst of N submissions costs one set
+    of Graph round-trips instead of N (and rows can't race for the same "next row").
+    """
+    
+    def __init__(self, write_rows_func: Callable[[List[list]], Any], max_batch: int = 20,
+                 flush_interval: float = 0.25, logger_instance=None):
+        """
+        Args:
+            write_rows_func: Function writing a list of rows in one call (raises on failure)
+            max_batch: Max rows per write
+            flush_interval: How long (seconds) to wait for more rows after the first one
+            logger_instance: Standard logger
+        """
+        self._write_rows = write_rows_func
+        self.max_batch = max(1, max_batch)
+        self.flush_interval = flush_interval
+        self.logger = logger_instance or logger
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._closed = False
+    
+    def submit(self, row_values: list) -> Future:
+        """
+        Queue row for writing
+        
+        Args:
+            row_values: Cell values in column order
+            
+        Returns:
+            Future: Resolves when the row's batch is written (or with the write error)
+        """
+        future = Future()
+        if self._closed:
+            future.set_exception(RuntimeError("Excel batch writer is closed"))
+            return future
+        self._queue.put((row_values, future))
+        self._ensure_worker()
+        return future
+    
+    def close(self, timeout: float = 10.0):
+        """
+        Stop accepting rows and wait for queued rows to be written
+        
+        Rows not written within timeout stay unsynced in JSON backup
+        and are picked up by the scheduled JSON → SharePoint sync.
+        
+        Args:
+            timeout: Max seconds to wait
+        """
+        self._closed = True
+        deadline = time.monotonic() + timeout
+        while self._thread is not None and self._thread.is_alive():
+            if self._queue.unfinished_tasks == 0 or time.monotonic() >= deadline:
+                break
+            time.sleep(0.05)
+        pending = self._queue.unfinished_tasks
+        if pending:
+            self.logger.warning(f"⚠ Excel batch writer closed with {pending} row(s) pending (left for background sync)")
+    
+    def _ensure_worker(self):
+        """Start writer thread lazily (daemon - pending rows are still in JSON backup)"""
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="excel-batch-writer", daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        """Writer loop: take first row, collect more until window/batch limit, write"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    def _flush(self, batch: list):
+        """Write batch; on request-size errors (400/413) split it in halves and retry"""
+        try:
+            self._write_rows([row for row, _ in batch])
+        except Exception as e:
+            status = getattr(getattr(e, 'response', None), 'status_code', None)
+            if len(batch) > 1 and status in (400, 413):
+                self.logger.warning(f"⚠ Excel batch of {len(batch)} rejected ({status}), splitting")
+                mid = len(batch) // 2
+                self._flush(batch[:mid])
+                self._flush(batch[mid:])
+                return
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        
+        for _, future in batch:
+            future.set_result(True)
+
 
 class ExcelHelper:
     """Handles all Excel and SharePoint Excel operations"""
@@ -34,6 +186,40 @@ class ExcelHelper:
         self.logger = logger_instance or logger
         self.app_logger = app_logger_instance
         
+        # Excel folder cache for traditional saves: folder_url -> (cached_at, folder object)
+        self._folder_cache: Dict[str, Tuple[float, dict]] = {}
+        self._folder_cache_lock = threading.Lock()
+        
+        # SharePoint save path chosen once from config: _sp_save(request_id, row_data, row_values),
+        # None if SharePoint integration is disabled
+        self._sp_save = None
+        self._batch_writer = None
+        if self.sharepoint_config.get('enabled', False):
+            if self.sharepoint_config.get('use_excel_api', True):
+                # Excel API (direct row insertion)
+                self._sp_save = self._save_via_excel_api
+                
+                # Excel API inserts from concurrent submissions are coalesced into one write
+                if self.sharepoint_config.get('excel_batch_enabled', True):
+                    self._batch_writer = ExcelBatchWriter(
+                        self._write_rows_via_excel_api,
+                        max_batch=self.sharepoint_config.get('excel_batch_max_rows', 20),
+                        flush_interval=self.sharepoint_config.get('excel_batch_window_ms', 250) / 1000,
+                        logger_instance=self.logger
+                    )
+            else:
+                # Traditional download/upload method
+                self._sp_save = partial(
+                    self._save_via_traditional,
+                    max_retries=self.sharepoint_config.get('max_retries', 3),
+                    retry_deadline=self.sharepoint_config.get('retry_deadline_seconds', 30)
+                )
+        
+    def close(self, timeout: float = 10.0):
+        """Flush queued Excel rows (application shutdown)"""
+        if self._batch_writer:
+            self._batch_writer.close(timeout)
+    
     def save_to_excel(self, request_id: str, data: dict, has_attachment: bool = False, 
                      attachment_error: str = None, json_index: int = None,
                      update_json_sync_status_func=None, attachment_status: str = None) -> Dict[str, Any]:
@@ -52,9 +238,11 @@ class ExcelHelper:
         Returns:
             dict: Result with sharepoint_saved, sharepoint_error, json_index keys
         """
-        if self.app_logger:
+        # Message/result f-strings only built when structured log would be written
+        log_app = self.app_logger is not None and self.app_logger.isEnabledFor(logging.INFO)
+        if log_app:
             self.app_logger.log_info(
-                f"\033[94mℹ save_to_excel() STARTED for request: {request_id}\033[0m",
+                f"ℹ save_to_excel() STARTED for request: {request_id}",
                 {'function': 'save_to_excel', 'request_id': request_id}
             )
         
@@ -66,47 +254,17 @@ class ExcelHelper:
             'json_index': json_index
         }
         
-        # Prepare row data
-        row_data = {
-            'Request_ID': request_id,
-            'Timestamp': datetime.now().isoformat(),
-            'Delivery_Note_Number': data.get('deliveryNoteNumber', ''),
-            'Truck_License_Plates': data.get('truckLicensePlates', ''),
-            'Trailer_License_Plates': data.get('trailerLicensePlates', ''),
-            'Carrier_Country': data.get('carrierCountry', ''),
-            'Carrier_Tax_Code': data.get('carrierTaxCode', ''),
-            'Carrier_Full_Name': data.get('carrierFullName', ''),
-            'Border_Crossing': data.get('borderCrossing', ''),
-            'Border_Crossing_Date': data.get('borderCrossingDate', ''),
-            'Email': data.get('email', ''),
-            'Phone_Number': data.get('phoneNumber', ''),
-            'Has_Attachment': attachment_status if attachment_status else ('Yes' if has_attachment else 'No'),
-            'Attachment_Status': attachment_status if attachment_status else ('Saved' if has_attachment else ('Failed' if attachment_error else 'None')),
-            'Attachment_Error': attachment_error if attachment_error else '',
-            'SharePoint_Synced': False
-        }
+        # Prepare row once - dict (Timestamp) and values in Excel column order
+        row_data, row_values = build_row(request_id, data, has_attachment, attachment_error, attachment_status)
         
         # JSON backup is already saved in main endpoint
         result['local_saved'] = True
         
-        # SharePoint Integration
-        if self.sharepoint_config.get('enabled', False):
+        # SharePoint Integration (save path bound in __init__)
+        if self._sp_save is not None:
             try:
-                use_excel_api = self.sharepoint_config.get('use_excel_api', True)
-                
-                if use_excel_api:
-                    # Use Excel API (direct row insertion)
-                    self._save_via_excel_api(request_id, data, has_attachment, attachment_error)
-                    self.logger.info("\033[92m✓ Data saved to SharePoint Excel via API\033[0m")
-                else:
-                    # Use traditional download/upload method
-                    max_retries = self.sharepoint_config.get('max_retries', 3)
-                    retry_wait_multiplier = self.sharepoint_config.get('retry_wait_multiplier', 2)
-                    self._save_via_traditional(
-                        request_id, data, has_attachment, attachment_error,
-                        max_retries, retry_wait_multiplier
-                    )
-                    self.logger.info("\033[92m✓ Data saved to SharePoint Excel\033[0m")
+                self._sp_save(request_id, row_data, row_values)
+                self.logger.info("✓ Data saved to SharePoint Excel")
                 
                 result['sharepoint_saved'] = True
                 
@@ -115,84 +273,85 @@ class ExcelHelper:
                     try:
                         update_json_sync_status_func(request_id, json_index, synced=True)
                     except Exception as update_error:
-                        self.logger.warning(f"Failed to update JSON sync status: {update_error}")
+                        self.logger.warning("Failed to update JSON sync status: %s", update_error)
                         
             except Exception as sp_error:
                 error_msg = str(sp_error)
-                self.logger.error(f"\033[91m✗ SharePoint save failed: {error_msg}\033[0m", exc_info=True)
+                self.logger.error("✗ SharePoint save failed: %s: %s", type(sp_error).__name__, error_msg)
+                self.logger.debug("SharePoint save traceback:", exc_info=True)
                 result['sharepoint_error'] = error_msg
         
-        if self.app_logger:
+        if log_app:
             self.app_logger.log_info(
-                f"\033[94mℹ save_to_excel() COMPLETED - Result: {result}\033[0m",
+                f"ℹ save_to_excel() COMPLETED - Result: {result}",
                 {'function': 'save_to_excel', 'result': result}
             )
         
         return result
     
-    def _save_via_excel_api(self, request_id: str, data: dict, 
-                           has_attachment: bool, attachment_error: str):
+    def _save_via_excel_api(self, request_id: str, row_data: dict, row_values: tuple):
         """
         Save record using Excel API (direct row insertion)
         Works even when file is open by other users
+        
+        Args:
+            request_id: Request identifier
+            row_data: Row dict (from build_row) - unused, same signature as _save_via_traditional
+            row_values: Values in EXCEL_COLUMNS order (from build_row)
         """
         try:
-            from sharepoint_helper import SharePointHelper
+            self.logger.info("SharePoint Excel API: Adding row to %s", self.sharepoint_config['excel_file_name'])
             
-            access_token = self.get_access_token()
-            sp = SharePointHelper(access_token)
+            # Add row using Excel API (batched with rows of concurrent submissions)
+            if self._batch_writer:
+                self._batch_writer.submit(list(row_values)).result()
+            else:
+                self._write_rows_via_excel_api([list(row_values)])
             
-            folder_url = self.sharepoint_config['folder_url']
-            excel_file_name = self.sharepoint_config['excel_file_name']
-            worksheet_name = self.sharepoint_config.get('worksheet_name', 'Sheet1')
-            
-            self.logger.info(f"SharePoint Excel API: Adding row to {excel_file_name}")
-            
-            # Prepare row values in correct column order
-            attachment_status = 'Saved' if has_attachment else ('Failed' if attachment_error else 'None')
-            
-            row_values = [
-                request_id,
-                data.get('deliveryNoteNumber', ''),
-                data.get('truckLicensePlates', ''),
-                data.get('trailerLicensePlates', ''),
-                data.get('carrierCountry', ''),
-                data.get('carrierTaxCode', ''),
-                data.get('carrierFullName', ''),
-                data.get('borderCrossing', ''),
-                data.get('borderCrossingDate', ''),
-                data.get('email', ''),
-                data.get('phoneNumber', ''),
-                'Yes' if has_attachment else 'No',
-                attachment_status,
-                attachment_error if attachment_error else ''
-            ]
-            
-            # Add row using Excel API
-            sp.add_excel_row(
-                folder_url=folder_url,
-                excel_file_name=excel_file_name,
-                worksheet_name=worksheet_name,
-                row_values=row_values
-            )
-            
-            self.logger.info(f"\033[92m✓ SharePoint Excel API: Successfully added row for {request_id}\033[0m")
+            self.logger.info("✓ SharePoint Excel API: Successfully added row for %s", request_id)
             
         except Exception as e:
-            self.logger.error(f"\033[91m✗ SharePoint Excel API error: {e}\033[0m", exc_info=True)
+            # Traceback logowany raz, przez wywołującego (save_to_excel)
+            self.logger.error("✗ SharePoint Excel API error: %s: %s", type(e).__name__, e)
             raise
     
-    def _save_via_traditional(self, request_id: str, data: dict,
-                             has_attachment: bool, attachment_error: str,
-                             max_retries: int, retry_wait_multiplier: int):
+    def _write_rows_via_excel_api(self, rows: List[list]):
+        """
+        Append rows to SharePoint Excel in one Excel API range write
+        
+        Args:
+            rows: List of row value lists in column order
+        """
+        from sharepoint_helper import SharePointHelper
+        
+        sp = SharePointHelper(self.get_access_token())
+        sp.add_excel_rows(
+            folder_url=self.sharepoint_config['folder_url'],
+            excel_file_name=self.sharepoint_config['excel_file_name'],
+            worksheet_name=self.sharepoint_config.get('worksheet_name', 'Sheet1'),
+            rows=rows
+        )
+        if len(rows) > 1:
+            self.logger.info("ℹ SharePoint Excel API: %d rows written in one batch", len(rows))
+    
+    def _save_via_traditional(self, request_id: str, row_data: dict, row_values: tuple,
+                             max_retries: int, retry_deadline: float):
         """
         Save record using traditional download/upload method
-        Uses retry logic for locked files
+        Uses retry logic for locked files (exponential backoff with jitter,
+        bounded by max_retries and retry_deadline)
+        
+        Workbook is downloaded, edited and uploaded in memory (no temp files);
+        folder is resolved once for all attempts.
+        
+        Args:
+            request_id: Request identifier
+            row_data: Row dict (from build_row) - provides Timestamp
+            row_values: Values in EXCEL_COLUMNS order (from build_row)
+            max_retries: Max attempts if file is locked
+            retry_deadline: Max seconds spent retrying (no retry would end past it)
         """
-        import time
-        import tempfile
-        from pathlib import Path
-        from datetime import datetime
+        from io import BytesIO
         from sharepoint_helper import SharePointHelper
         from openpyxl import load_workbook
         
@@ -203,79 +362,74 @@ class ExcelHelper:
         excel_file_name = self.sharepoint_config['excel_file_name']
         worksheet_name = self.sharepoint_config.get('worksheet_name', 'Sheet1')
         
-        self.logger.info(f"SharePoint: Getting folder from {folder_url}")
-        folder = sp.get_folder(folder_url)
+        folder = self._get_excel_folder(sp, folder_url)
         
-        # Retry loop for handling locked files
-        last_error = None
+        # Retry loop for handling locked files - every attempt returns or re-raises
+        # (last attempt, deadline reached or non-lock error), at least one attempt is made
+        max_retries = max(1, max_retries)
+        start = time.monotonic()
         for attempt in range(max_retries):
             try:
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    temp_path = Path(temp_dir) / excel_file_name
-                    
-                    self.logger.info(f"SharePoint: Downloading {excel_file_name} (attempt {attempt + 1}/{max_retries})")
-                    sp.download_file_from_folder(
-                        download_path=temp_dir,
-                        folder=folder,
-                        file_name=excel_file_name
-                    )
-                    
-                    wb = load_workbook(temp_path)
-                    ws = wb[worksheet_name] if worksheet_name in wb.sheetnames else wb.active
-                    
-                    # Prepare new row with data
-                    new_row = [
-                        request_id,
-                        datetime.now().isoformat(),
-                        data.get('deliveryNoteNumber', ''),
-                        data.get('truckLicensePlates', ''),
-                        data.get('trailerLicensePlates', ''),
-                        data.get('carrierCountry', ''),
-                        data.get('carrierTaxCode', ''),
-                        data.get('carrierFullName', ''),
-                        data.get('borderCrossing', ''),
-                        data.get('borderCrossingDate', ''),
-                        data.get('email', ''),
-                        data.get('phoneNumber', ''),
-                        'Yes' if has_attachment else 'No',
-                        'Saved' if has_attachment else ('Failed' if attachment_error else 'None'),
-                        attachment_error if attachment_error else ''
-                    ]
-                    
-                    ws.append(new_row)
-                    self.logger.info(f"SharePoint: Added new row {ws.max_row}")
-                    
-                    wb.save(temp_path)
-                    wb.close()
-                    
-                    self.logger.info(f"SharePoint: Uploading {excel_file_name} (attempt {attempt + 1}/{max_retries})")
-                    sp.upload_file(temp_path, folder)
-                    
-                    self.logger.info(f"\033[92m✓ SharePoint: Successfully saved to {excel_file_name}\033[0m")
-                    return
-                    
-            except Exception as e:
-                last_error = e
-                error_str = str(e).lower()
+                self.logger.info(f"SharePoint: Downloading {excel_file_name} (attempt {attempt + 1}/{max_retries})")
+                content = sp.download_bytes(folder, excel_file_name)
+                
+                wb = load_workbook(BytesIO(content))
+                ws = wb[worksheet_name] if worksheet_name in wb.sheetnames else wb.active
                 
-                is_locked = any(indicator in error_str for indicator in [
-                    'locked', 'in use', 'being used', 'cannot access', '423',
-                    'cobaltlockviolation', 'resourcelocked', 'file is open'
-                ])
+                # Traditional sheet layout has Timestamp in column B
+                new_row = [row_values[0], row_data['Timestamp'], *row_values[1:]]
+                
+                ws.append(new_row)
+                self.logger.info(f"SharePoint: Added new row {ws.max_row}")
+                
+                # Downloaded bytes no longer needed - don't hold them during save/upload
+                del content
+                buffer = BytesIO()
+                wb.save(buffer)
+                wb.close()
+                
+                self.logger.info(f"SharePoint: Uploading {excel_file_name} (attempt {attempt + 1}/{max_retries})")
+                sp.upload_bytes(buffer, folder, excel_file_name)
+                
+                self.logger.info(f"✓ SharePoint: Successfully saved to {excel_file_name}")
+                return
+                
+            except Exception as e:
+                is_locked = is_lock_error(e)
                 
                 if is_locked and attempt < max_retries - 1:
-                    wait_time = (attempt + 1) * retry_wait_multiplier
-                    self.logger.warning(f"\033[93m⚠ SharePoint: File locked. Waiting {wait_time}s before retry...\033[0m")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    if is_locked:
-                        self.logger.error(f"\033[91m✗ SharePoint: File still locked after {max_retries} attempts\033[0m")
-                    raise
-        
-        self.logger.error(f"\033[91m✗ SharePoint: All {max_retries} attempts failed\033[0m")
-        raise Exception(f"Failed to save to SharePoint after {max_retries} attempts. Last error: {last_error}")
+                    wait_time = lock_retry_wait(attempt)
+                    if time.monotonic() - start + wait_time <= retry_deadline:
+                        self.logger.warning(f"⚠ SharePoint: File locked. Waiting {wait_time:.1f}s before retry...")
+                        time.sleep(wait_time)
+                        continue
+                
+                if is_locked:
+                    self.logger.error(f"✗ SharePoint: File still locked after {attempt + 1} attempts ({time.monotonic() - start:.1f}s)")
+                raise
 
+    def _get_excel_folder(self, sp, folder_url: str) -> dict:
+        """
+        Get folder object containing the Excel file (cached for FOLDER_CACHE_TTL)
+        
+        Args:
+            sp: SharePointHelper instance
+            folder_url: SharePoint folder URL
+            
+        Returns:
+            dict: Folder object
+        """
+        with self._folder_cache_lock:
+            cached = self._folder_cache.get(folder_url)
+            if cached and time.monotonic() - cached[0] < FOLDER_CACHE_TTL:
+                return cached[1]
+        
+        self.logger.info(f"SharePoint: Getting folder from {folder_url}")
+        folder = sp.get_folder(folder_url)
+        with self._folder_cache_lock:
+            self._folder_cache[folder_url] = (time.monotonic(), folder)
+        return folder
+    
     def update_attachment_status(self, request_id: str, has_attachment: bool, 
                                 attachment_error: str = None) -> Dict[str, Any]:
         """
@@ -301,12 +455,10 @@ class ExcelHelper:
             excel_file_name = self.sharepoint_config['excel_file_name']
             worksheet_name = self.sharepoint_config.get('worksheet_name', 'Sheet1')
             
-            self.logger.info(f"Updating Excel attachment status for {request_id}")
+            self.logger.info("Updating Excel attachment status for %s", request_id)
             
             # Determine final attachment status
-            attachment_status = 'Saved' if has_attachment else ('Failed' if attachment_error else 'None')
-            has_attachment_text = 'Yes' if has_attachment else 'No'
-            error_text = attachment_error if attachment_error else ''
+            has_attachment_text, attachment_status, error_text = attachment_fields(has_attachment, attachment_error)
             
             # Update Excel row
             sp.update_excel_row_by_id(
@@ -322,9 +474,9 @@ class ExcelHelper:
                 }
             )
             
-            self.logger.info(f"\033[92m✓ Excel attachment status updated for {request_id}\033[0m")
+            self.logger.info("✓ Excel attachment status updated for %s", request_id)
             return {'success': True}
             
         except Exception as e:
-            self.logger.error(f"\033[91m✗ Failed to update Excel attachment status: {e}\033[0m")
+            self.logger.error("✗ Failed to update Excel attachment status: %s", e)
             return {'success': False, 'error': str(e)}
@@ -1,17 +1,76 @@
 """
 JSONHelper - Encapsulates JSON backup operations
 No need to pass config/logger to every method - stored in instance
+
+Backup format: JSON Lines (one JSON object per line), append-only.
+- record line: full transport request row
+- update line: {"_update": <record index>, "Request_ID": ..., <changed fields>}
+The file is read once - records are kept in memory (index by Request_ID) and every
+submit or status change mutates memory and appends ONE line instead of rewriting
+the whole file. Before each operation the file is stat()ed: if it was replaced or
+changed outside this process (e.g. backup restored with docker cp), it is read again. Update lines are folded into records by compact() once there are
+COMPACT_AFTER_UPDATES of them (and at shutdown).
+Exception: record lines end with "SharePoint_Synced":false - marking a record synced
+overwrites those 5 bytes in place with "true " (same width, still valid JSON),
+so the most common update appends nothing.
+Legacy JSON-array files are converted to JSON Lines on first load (streamed with
+ijson if installed, so the file is never held in memory as one big string).
 """
-import json
 import os
 import logging
-from datetime import datetime
+import threading
+import time
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+
+try:
+    import ijson
+except ImportError:  # ijson is optional - legacy arrays are then parsed whole
+    ijson = None
+
+from .transport_row import attachment_fields, build_row
 
 logger = logging.getLogger(__name__)
 
 
+def _dumps_line(obj: dict) -> bytes:
+    """Serialize object as one UTF-8 JSON line"""
+    return orjson.dumps(obj) + b'\n'
+
+
+def _loads(data: bytes):
+    """Parse JSON bytes"""
+    return orjson.loads(data)
+
+
+def _iter_json_array(f):
+    """
+    Iterate items of JSON array file (legacy backup format)
+    
+    Args:
+        f: File opened in binary mode, positioned at the start
+        
+    Returns:
+        iterator: Array items, one at a time (ijson) or from a whole-file parse
+    """
+    if ijson is not None:
+        return ijson.items(f, 'item', use_float=True)
+    return iter(_loads(f.read()))
+
+
+# Key marking an update (delta) line in the JSON Lines backup
+UPDATE_KEY = '_update'
+# Rewrite the file without update lines after this many of them
+COMPACT_AFTER_UPDATES = 500
+# Tail of record line whose sync flag can be flipped in place (false -> "true ")
+SYNC_FLAG_TAIL = b'"SharePoint_Synced":false}'
+SYNC_FLAG_TRUE = b'true '
+# Appended lines are fsynced together by a background flusher at most this late (seconds)
+FSYNC_INTERVAL = 0.1
+
+
 class JSONHelper:
     """Handles JSON backup file operations"""
     
@@ -29,9 +88,30 @@ class JSONHelper:
         # Get JSON path from config
         paths_config = transport_config.get('paths', {})
         self.json_path = Path(paths_config.get('json_backup_file', '/tmp/transport_requests.json'))
+        
+        # Appends come from request handler and background threads
+        self._lock = threading.Lock()
+        # In-memory copy of backup (updates applied), loaded lazily once
+        self._records: Optional[List[dict]] = None
+        self._positions: Dict[str, int] = {}
+        self._update_lines = 0
+        # Record index -> file offset of its in-place patchable "false" sync flag
+        self._flag_offsets: Dict[int, int] = {}
+        # Bumped on every record change (append/update/delete) - lets callers skip unchanged state
+        self._changes = 0
+        
+        # Append handle kept open between writes; fsync batched by background flusher
+        self._fp = None
+        self._end = 0  # File size = offset of next appended line
+        # (st_dev, st_ino) of the file the in-memory copy belongs to (None = no file on disk yet)
+        self._file_id: Optional[Tuple[int, int]] = None
+        # In-place patch handle, also kept open (reopened after compaction replaces the file)
+        self._patch_fd: Optional[int] = None
+        self._flush_pending = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
     
     def save_initial_record(self, request_id: str, data_dict: dict, 
-                           has_attachments: bool = False) -> Optional[int]:
+                           has_attachments: bool = False, durable: bool = False) -> Optional[int]:
         """
         Save initial transport request to JSON backup file
         
@@ -39,56 +119,33 @@ class JSONHelper:
             request_id: Request identifier
             data_dict: Form data dictionary
             has_attachments: Whether request has attachments (will show 'Processing' if True)
+            durable: fsync before returning (default: fsync within FSYNC_INTERVAL by flusher)
             
         Returns:
-            int: Index of saved record in JSON array, or None if save failed
+            int: Index of saved record in JSON backup, or None if save failed
         """
         try:
-            # Load existing data
-            existing_data = []
-            if self.json_path.exists():
-                try:
-                    with open(self.json_path, 'r', encoding='utf-8') as f:
-                        existing_data = json.load(f)
-                except Exception as load_error:
-                    self.logger.warning(f"Could not load existing JSON, starting fresh: {load_error}")
-            
             # Create new record
-            row_data = {
-                'Request_ID': request_id,
-                'Timestamp': datetime.now().isoformat(),
-                'Delivery_Note_Number': data_dict.get('deliveryNoteNumber', ''),
-                'Truck_License_Plates': data_dict.get('truckLicensePlates', ''),
-                'Trailer_License_Plates': data_dict.get('trailerLicensePlates', ''),
-                'Carrier_Country': data_dict.get('carrierCountry', ''),
-                'Carrier_Tax_Code': data_dict.get('carrierTaxCode', ''),
-                'Carrier_Full_Name': data_dict.get('carrierFullName', ''),
-                'Border_Crossing': data_dict.get('borderCrossing', ''),
-                'Border_Crossing_Date': data_dict.get('borderCrossingDate', ''),
-                'Email': data_dict.get('email', ''),
-                'Phone_Number': data_dict.get('phoneNumber', ''),
-                'Has_Attachment': 'Processing' if has_attachments else 'No',
-                'Attachment_Status': 'Processing' if has_attachments else 'None',
-                'Attachment_Error': '',
-                'SharePoint_Synced': False
-            }
+            row_data, _ = build_row(request_id, data_dict,
+                                    attachment_status='Processing' if has_attachments else None)
             
-            existing_data.append(row_data)
-            json_index = len(existing_data) - 1
-            
-            # Save to file with fsync for immediate persistence
-            with open(self.json_path, 'w', encoding='utf-8') as f:
-                json.dump(existing_data, f, indent=2, ensure_ascii=False)
-                f.flush()
-                os.fsync(f.fileno())
+            with self._lock:
+                self._ensure_loaded()
+                json_index = len(self._records)
+                
+                # Append one line (fsync now only if durable, otherwise batched)
+                offset, line = self._append_line(row_data, fsync=durable)
+                self._track_flag(json_index, line, offset)
+                self._records.append(row_data)
+                self._positions[request_id] = json_index
+                self._changes += 1
             
-            os.chmod(self.json_path, 0o644)
-            self.logger.info(f"\033[92m✓ JSON backup saved for {request_id} (index: {json_index})\033[0m")
+            self.logger.info(f"✓ JSON backup saved for {request_id} (index: {json_index})")
             
             return json_index
             
         except Exception as json_error:
-            self.logger.error(f"\033[91m✗ Failed to save JSON backup: {json_error}\033[0m")
+            self.logger.error(f"✗ Failed to save JSON backup: {json_error}")
             return None
         
     def update_sync_status(self, request_id: str, record_index: int, synced: bool):
@@ -97,33 +154,41 @@ class JSONHelper:
         
         Args:
             request_id: Request identifier
-            record_index: Index of record in JSON array
+            record_index: Index of record in JSON backup
             synced: True if synced to SharePoint
         """
+        try:
+            # synced=True is written in place when record line still has its original flag
+            if self._append_update(request_id, record_index, {'SharePoint_Synced': synced}):
+                self.logger.info(f"✓ Updated sync status in JSON for {request_id}: synced={synced}")
+        except Exception as e:
+            self.logger.error(f"Failed to update JSON sync status: {e}")
+    
+    def mark_synced(self, records: List[Tuple[str, int]]) -> int:
+        """
+        Mark many records as synced to SharePoint under one lock acquisition
+        
+        Args:
+            records: (request_id, record_index) pairs
+            
+        Returns:
+            int: Number of records updated
+        """
+        if not records:
+            return 0
         try:
             if not self.json_path.exists():
                 self.logger.warning(f"JSON backup file not found: {self.json_path}")
-                return
-            
-            # Load JSON
-            with open(self.json_path, 'r', encoding='utf-8') as f:
-                records = json.load(f)
-            
-            # Update specific record
-            if 0 <= record_index < len(records):
-                records[record_index]['SharePoint_Synced'] = synced
-                
-                # Save updated JSON
-                with open(self.json_path, 'w', encoding='utf-8') as f:
-                    json.dump(records, f, indent=2, ensure_ascii=False)
-                
-                os.chmod(self.json_path, 0o644)
-                self.logger.info(f"\033[92m✓ Updated sync status in JSON for {request_id}: synced={synced}\033[0m")
-            else:
-                self.logger.warning(f"Invalid record index {record_index} for {request_id}")
-                
+                return 0
+            with self._lock:
+                self._ensure_loaded()
+                updated = sum(self._apply_update(request_id, record_index, {'SharePoint_Synced': True})
+                              for request_id, record_index in records)
+            self.logger.info(f"✓ Updated sync status in JSON for {updated} record(s)")
+            return updated
         except Exception as e:
             self.logger.error(f"Failed to update JSON sync status: {e}")
+            return 0
     
     def update_attachment_status(self, request_id: str, record_index: int,
                                  attachments_saved: List[str], attachments_errors: List[str]):
@@ -132,31 +197,333 @@ class JSONHelper:
         
         Args:
             request_id: Request identifier
-            record_index: Index of record in JSON array
+            record_index: Index of record in JSON backup
             attachments_saved: List of successfully saved attachments
             attachments_errors: List of attachment errors
         """
         try:
-            if not self.json_path.exists():
-                return
-            
-            with open(self.json_path, 'r', encoding='utf-8') as f:
-                records = json.load(f)
-            
-            if 0 <= record_index < len(records):
-                has_attachment = len(attachments_saved) > 0
-                records[record_index]['Has_Attachment'] = 'Yes' if has_attachment else 'No'
-                records[record_index]['Attachment_Status'] = 'Saved' if has_attachment else ('Failed' if attachments_errors else 'None')
-                records[record_index]['Attachment_Error'] = "; ".join(attachments_errors) if attachments_errors else ''
-                
-                with open(self.json_path, 'w', encoding='utf-8') as f:
-                    json.dump(records, f, indent=2, ensure_ascii=False)
-                
-                os.chmod(self.json_path, 0o644)
-                self.logger.info(f"\033[92m✓ Updated attachment status in JSON for {request_id}\033[0m")
+            has_attachment, status, error = attachment_fields(
+                len(attachments_saved) > 0, "; ".join(attachments_errors)
+            )
+            updates = {
+                'Has_Attachment': has_attachment,
+                'Attachment_Status': status,
+                'Attachment_Error': error
+            }
+            if self._append_update(request_id, record_index, updates):
+                self.logger.info(f"✓ Updated attachment status in JSON for {request_id}")
         except Exception as e:
             self.logger.error(f"Failed to update JSON attachment status: {e}")
-                
+    
+    @property
+    def change_count(self) -> int:
+        """Number of record changes (incl. file replaced on disk) - compare to detect changes"""
+        with self._lock:
+            self._check_disk()
+            return self._changes
+    
+    def load_records(self) -> List[dict]:
+        """
+        Get all records from JSON backup (updates applied)
+        
+        Compacts backup file first if enough update lines piled up
+        (callers are background/debug paths, not the submit hot path).
+        
+        Returns:
+            list: Copies of records in submission order (empty if file doesn't exist)
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if self._update_lines >= COMPACT_AFTER_UPDATES:
+                self._compact()
+            return [dict(record) for record in self._records]
+    
+    def unsynced_records(self) -> Tuple[int, List[Tuple[int, dict]]]:
+        """
+        Get records not yet synced to SharePoint (background sync)
+        
+        Only matching records are copied; indices can be passed to update_sync_status().
+        Compacts backup file first if enough update lines piled up (like load_records).
+        
+        Returns:
+            tuple: (total_record_count, [(record_index, record_copy), ...])
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if self._update_lines >= COMPACT_AFTER_UPDATES:
+                self._compact()
+            return len(self._records), [
+                (index, dict(record)) for index, record in enumerate(self._records)
+                if not record.get('SharePoint_Synced', False)
+            ]
+    
+    def delete_records(self, request_ids: List[str]) -> Tuple[int, int]:
+        """
+        Delete records by Request_ID and compact backup file (updates merged into records)
+        
+        Args:
+            request_ids: Request identifiers to delete
+            
+        Returns:
+            tuple: (deleted_count, remaining_count)
+        """
+        ids = set(request_ids)
+        with self._lock:
+            self._ensure_loaded()
+            initial_count = len(self._records)
+            self._set_records([record for record in self._records if record.get('Request_ID') not in ids])
+            self._changes += 1
+            self._compact()
+            return initial_count - len(self._records), len(self._records)
+    
+    def compact(self):
+        """Fold update lines into records (rewrites file once; e.g. at shutdown)"""
+        try:
+            with self._lock:
+                # Memory must match the file first - otherwise it would overwrite a restored backup
+                self._check_disk()
+                if self._records is not None and self._update_lines:
+                    self._compact()
+        except Exception as e:
+            self.logger.error(f"Failed to compact JSON backup: {e}")
+    
+    def close(self):
+        """fsync and close backup file (application shutdown)"""
+        try:
+            with self._lock:
+                if self._fp is not None:
+                    os.fsync(self._fp.fileno())
+                self._close_fp()
+        except Exception as e:
+            self.logger.error(f"Failed to close JSON backup: {e}")
+    
+    def _append_update(self, request_id: str, record_index: int, fields: dict) -> bool:
+        """Apply update in memory and append update line (False if record not found)"""
+        if not self.json_path.exists():
+            self.logger.warning(f"JSON backup file not found: {self.json_path}")
+            return False
+        with self._lock:
+            self._ensure_loaded()
+            return self._apply_update(request_id, record_index, fields)
+    
+    def _apply_update(self, request_id: str, record_index: int, fields: dict) -> bool:
+        """Apply one update in memory and on disk (called under lock, file loaded)"""
+        # Index is a hint - after compaction records are found by Request_ID
+        index = self._resolve_index(record_index, request_id)
+        if index is None:
+            self.logger.warning(f"Invalid record index {record_index} for {request_id}")
+            return False
+        self._records[index].update(fields)
+        self._changes += 1
+        
+        flag_offset = self._flag_offsets.pop(index, None) if 'SharePoint_Synced' in fields else None
+        if flag_offset is not None and fields == {'SharePoint_Synced': True}:
+            self._patch(flag_offset, SYNC_FLAG_TRUE)
+        else:
+            self._append_line({UPDATE_KEY: index, 'Request_ID': request_id, **fields})
+            self._update_lines += 1
+        return True
+    
+    def _resolve_index(self, index: Optional[int], request_id: str) -> Optional[int]:
+        """Position of record - index if it still points at request_id, else lookup by Request_ID"""
+        if index is not None and 0 <= index < len(self._records) \
+                and self._records[index].get('Request_ID') == request_id:
+            return index
+        return self._positions.get(request_id) if request_id else None
+    
+    def _set_records(self, records: List[dict]):
+        """Replace in-memory records and rebuild Request_ID index (called under lock)"""
+        self._records = records
+        # Records without Request_ID (damaged legacy rows) are not indexed - updates can't target them
+        self._positions = {record['Request_ID']: i for i, record in enumerate(records) if record.get('Request_ID')}
+        self._flag_offsets = {}
+    
+    def _track_flag(self, index: int, line: bytes, offset: int):
+        """Remember where record line's sync flag is, if it can be flipped in place (called under lock)"""
+        tail = line.rstrip()
+        if tail.endswith(SYNC_FLAG_TAIL):
+            self._flag_offsets[index] = offset + len(tail) - len(b'false}')
+    
+    def _open_fp(self):
+        """Open append handle if needed (called under lock)"""
+        if self._fp is None:
+            # File created with final permissions once - no chmod per write
+            fd = os.open(self.json_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._fp = os.fdopen(fd, 'ab')
+            self._remember_file(os.fstat(fd))
+    
+    def _append_line(self, obj: dict, fsync: bool = False) -> Tuple[int, bytes]:
+        """
+        Append one JSON object as a line (called under lock)
+        
+        Returns:
+            tuple: (file offset of the line, line bytes)
+        """
+        self._open_fp()
+        line = _dumps_line(obj)
+        offset = self._end
+        self._fp.write(line)
+        self._fp.flush()
+        self._end += len(line)
+        if fsync:
+            os.fsync(self._fp.fileno())
+        else:
+            self._schedule_fsync()
+        return offset, line
+    
+    def _patch(self, offset: int, data: bytes):
+        """Overwrite bytes in place (called under lock; fsync batched by flusher)"""
+        self._open_fp()
+        if self._patch_fd is None:
+            # Separate fd - writes through the O_APPEND one always go to the end
+            self._patch_fd = os.open(self.json_path, os.O_WRONLY)
+        if hasattr(os, 'pwrite'):
+            os.pwrite(self._patch_fd, data, offset)
+        else:  # Windows
+            os.lseek(self._patch_fd, offset, os.SEEK_SET)
+            os.write(self._patch_fd, data)
+        self._schedule_fsync()
+    
+    def _schedule_fsync(self):
+        """Wake background flusher (started lazily) to fsync recent appends"""
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name="json-backup-fsync", daemon=True)
+            self._flusher.start()
+        self._flush_pending.set()
+    
+    def _flush_loop(self):
+        """Flusher: after first pending write, wait FSYNC_INTERVAL to collect more, then fsync once"""
+        while True:
+            self._flush_pending.wait()
+            time.sleep(FSYNC_INTERVAL)
+            self._flush_pending.clear()
+            with self._lock:
+                if self._fp is None:
+                    continue
+                # fsync on a duplicate fd outside the lock - appends don't wait for the disk
+                fd = os.dup(self._fp.fileno())
+            try:
+                os.fsync(fd)
+            except OSError as e:
+                self.logger.warning(f"⚠ JSON backup fsync failed: {e}")
+            finally:
+                os.close(fd)
+    
+    def _close_fp(self):
+        """Close append and patch handles (called under lock, e.g. before file is replaced)"""
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+        if self._patch_fd is not None:
+            os.close(self._patch_fd)
+            self._patch_fd = None
+    
+    def _remember_file(self, st: os.stat_result):
+        """Record identity and size of the file memory now matches (called under lock)"""
+        self._file_id = (st.st_dev, st.st_ino)
+        self._end = st.st_size
+    
+    def _check_disk(self):
+        """
+        Drop in-memory copy if backup file was replaced, removed or resized outside this helper
+        (called under lock; next _ensure_loaded() reads the file again)
+        """
+        if self._records is None:
+            return
+        try:
+            st = os.stat(self.json_path)
+        except FileNotFoundError:
+            if self._file_id is None:
+                return  # Nothing written yet
+            st = None
+        if st is not None and (st.st_dev, st.st_ino) == self._file_id and st.st_size == self._end:
+            return
+        
+        self.logger.warning(f"⚠ JSON backup changed on disk ({self.json_path}), reloading")
+        self._close_fp()
+        self._records = None
+        self._file_id = None
+        self._changes += 1
+    
+    def _ensure_loaded(self):
+        """Load backup file into memory once, again if it changed on disk (called under lock)"""
+        self._check_disk()
+        if self._records is not None:
+            return
+        
+        self._set_records([])
+        self._update_lines = 0
+        if not self.json_path.exists():
+            return
+        
+        with open(self.json_path, 'rb') as f:
+            self._remember_file(os.fstat(f.fileno()))
+            if f.read(1) == b'[':
+                # Legacy format - whole file is one JSON array, convert to JSON Lines
+                f.seek(0)
+                self._set_records(list(_iter_json_array(f)))
+                is_legacy = True
+            else:
+                f.seek(0)
+                self._replay(f)
+                is_legacy = False
+        
+        if is_legacy:
+            self._compact()
+            self.logger.info(f"ℹ JSON backup converted to JSON Lines ({len(self._records)} records)")
+    
+    def _replay(self, f):
+        """Read JSON Lines file and replay update lines over records (called under lock)"""
+        offset = 0
+        for line_no, raw in enumerate(f, 1):
+            line_offset = offset
+            offset += len(raw)
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                obj = _loads(line)
+            except ValueError:
+                # e.g. line torn by a crash mid-write - skip it, keep the rest
+                self.logger.warning(f"⚠ Skipping invalid line {line_no} in JSON backup")
+                continue
+            
+            index = obj.pop(UPDATE_KEY, None)
+            request_id = obj.get('Request_ID')
+            if index is None:
+                if request_id:
+                    self._positions[request_id] = len(self._records)
+                self._track_flag(len(self._records), raw, line_offset)
+                self._records.append(obj)
+                continue
+            
+            self._update_lines += 1
+            index = self._resolve_index(index, request_id)
+            if index is not None:
+                self._records[index].update(obj)
+                if 'SharePoint_Synced' in obj:
+                    # Flag in record line is no longer the current value
+                    self._flag_offsets.pop(index, None)
+    
+    def _compact(self):
+        """Rewrite whole backup from memory as JSON Lines (atomic replace, called under lock)"""
+        self._close_fp()
+        temp_path = self.json_path.with_name(self.json_path.name + '.tmp')
+        self._flag_offsets = {}
+        offset = 0
+        with open(temp_path, 'wb') as f:
+            for index, record in enumerate(self._records):
+                line = _dumps_line(record)
+                self._track_flag(index, line, offset)
+                f.write(line)
+                offset += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, self.json_path)
+        self._remember_file(os.stat(self.json_path))
+        self._update_lines = 0
+    
     def debug_info(self) -> dict:
         """
         Get debug information about JSON backup file
@@ -178,13 +545,13 @@ class JSONHelper:
                 debug_info["status"] = "found"
                 debug_info["file_size"] = stats.st_size
                 debug_info["modified"] = stats.st_mtime
-                self.logger.info(f"\033[92m✓ JSON backup found at: {self.json_path}\033[0m")
+                self.logger.info(f"✓ JSON backup found at: {self.json_path}")
             except Exception as e:
                 debug_info["status"] = "error"
                 debug_info["error"] = str(e)
         else:
             debug_info["status"] = "not_found"
             debug_info["note"] = "JSON backup will be created on first submit or restored from Jenkins backup"
-            self.logger.warning(f"\033[93m⚠ JSON backup NOT found at: {self.json_path}\033[0m")
+            self.logger.warning(f"⚠ JSON backup NOT found at: {self.json_path}")
         
         return debug_info
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""
+Transport request row - single definition of backup/Excel columns
+Shared by JSON backup, Excel API / traditional Excel saves and background sync,
+so every path builds the same values (incl. attachment status logic) from form data once
+"""
+from collections import defaultdict
+from datetime import datetime
+from operator import itemgetter
+from typing import Optional, Tuple
+
+# (record/Excel field name, form data key) in Excel column order (A..K)
+FIELD_MAP = (
+    ('Request_ID', None),
+    ('Delivery_Note_Number', 'deliveryNoteNumber'),
+    ('Truck_License_Plates', 'truckLicensePlates'),
+    ('Trailer_License_Plates', 'trailerLicensePlates'),
+    ('Carrier_Country', 'carrierCountry'),
+    ('Carrier_Tax_Code', 'carrierTaxCode'),
+    ('Carrier_Full_Name', 'carrierFullName'),
+    ('Border_Crossing', 'borderCrossing'),
+    ('Border_Crossing_Date', 'borderCrossingDate'),
+    ('Email', 'email'),
+    ('Phone_Number', 'phoneNumber'),
+)
+
+# Excel columns A..N (attachment columns L, M, N are updated after upload)
+EXCEL_COLUMNS = tuple(name for name, _ in FIELD_MAP) + ('Has_Attachment', 'Attachment_Status', 'Attachment_Error')
+
+# Field extraction done by C itemgetter in one call (applied to defaultdict(str, ...) so missing keys give '')
+_FORM_KEYS = tuple(key for _, key in FIELD_MAP[1:])
+_FORM_GETTER = itemgetter(*_FORM_KEYS)
+_RECORD_GETTER = itemgetter(*(name for name, _ in FIELD_MAP[1:]))
+
+# (has_attachment, has_error) -> (Has_Attachment, Attachment_Status); Attachment_Error is the error text
+_ATTACHMENT_TABLE = {
+    (True, False): ('Yes', 'Saved'),
+    (True, True): ('Yes', 'Saved'),
+    (False, False): ('No', 'None'),
+    (False, True): ('No', 'Failed'),
+}
+
+
+def attachment_fields(has_attachment: bool, attachment_error: Optional[str] = None,
+                      attachment_status: Optional[str] = None) -> Tuple[str, str, str]:
+    """
+    Compute attachment columns
+
+    Args:
+        has_attachment: Whether attachments were saved
+        attachment_error: Error message if attachment failed
+        attachment_status: Explicit status override ('Processing', ...) for both status columns
+
+    Returns:
+        tuple: (Has_Attachment, Attachment_Status, Attachment_Error)
+    """
+    if attachment_status:
+        return attachment_status, attachment_status, attachment_error or ''
+    return (*_ATTACHMENT_TABLE[bool(has_attachment), bool(attachment_error)], attachment_error or '')
+
+
+def build_row(request_id: str, data: dict, has_attachment: bool = False,
+              attachment_error: Optional[str] = None,
+              attachment_status: Optional[str] = None) -> Tuple[dict, tuple]:
+    """
+    Build transport request row in one pass over form data
+
+    Args:
+        request_id: Request identifier
+        data: Form data (camelCase keys from frontend)
+        has_attachment: Whether attachments were saved
+        attachment_error: Error message if attachment failed
+        attachment_status: Explicit status override (see attachment_fields)
+
+    Returns:
+        tuple: (record dict for JSON backup, values tuple in EXCEL_COLUMNS order)
+    """
+    values = (
+        request_id,
+        *_FORM_GETTER(defaultdict(str, data)),
+        *attachment_fields(has_attachment, attachment_error, attachment_status)
+    )
+
+    record = {'Request_ID': request_id, 'Timestamp': datetime.now().isoformat()}
+    record.update(zip(EXCEL_COLUMNS[1:], values[1:]))
+    record['SharePoint_Synced'] = False
+    return record, values
+
+
+def record_to_form_data(record: dict) -> dict:
+    """Convert JSON backup record back to form data format"""
+    return dict(zip(_FORM_KEYS, _RECORD_GETTER(defaultdict(str, record))))
+
+
+def record_to_values(record: dict) -> tuple:
+    """
+    Build Excel row values straight from JSON backup record (no form data dict in between)
+
+    Attachment columns are recomputed from Has_Attachment / Attachment_Error like build_row does.
+
+    Args:
+        record: JSON backup record
+
+    Returns:
+        tuple: Values in EXCEL_COLUMNS order
+    """
+    return (
+        record.get('Request_ID'),
+        *_RECORD_GETTER(defaultdict(str, record)),
+        *attachment_fields(record.get('Has_Attachment', 'No') == 'Yes', record.get('Attachment_Error', ''))
+    )
@@ -2,18 +2,23 @@
 SchedulerManager - Orchestrates periodic background tasks
 Encapsulates scheduler logic for JSON sync and attachment cleanup
 """
-import json
-import tempfile
 import time
 import logging
 from datetime import datetime
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
 from openpyxl import load_workbook
 
 from sharepoint_helper import SharePointHelper
+from .helpers import JSONHelper
+from .helpers.excel_helper import is_lock_error, lock_retry_wait
+from .helpers.transport_row import record_to_values
 
 logger = logging.getLogger(__name__)
 
+# Parallel DELETE requests during attachment cleanup (deletes are independent, unlike Excel appends)
+CLEANUP_DELETE_WORKERS = 8
+
 
 class SchedulerManager:
     """
@@ -22,7 +27,7 @@ class SchedulerManager:
     """
     
     def __init__(self, config: dict, transport_config: dict, 
-                 get_access_token_func, app_logger_instance=None):
+                 get_access_token_func, app_logger_instance=None, json_helper=None):
         """
         Initialize scheduler manager with dependencies
         
@@ -31,6 +36,7 @@ class SchedulerManager:
             transport_config: Transport section of config
             get_access_token_func: Function to get access token
             app_logger_instance: Structured app logger
+            json_helper: JSONHelper shared with request handler (created if not given)
         """
         self.config = config
         self.transport_config = transport_config
@@ -38,6 +44,10 @@ class SchedulerManager:
         self.get_access_token = get_access_token_func
         self.app_logger = app_logger_instance
         self.logger = logger
+        self.json_helper = json_helper or JSONHelper(transport_config)
+        
+        # JSON backup change count at which sync last found nothing to do (None = unknown)
+        self._all_synced_at_change = None
     
     def sync_json_to_sharepoint(self):
         """
@@ -45,7 +55,7 @@ class SchedulerManager:
         Runs periodically to retry failed SharePoint uploads
         """
         try:
-            self.logger.info("\033[94mℹ Background sync: Starting JSON → SharePoint synchronization\033[0m")
+            self.logger.info("ℹ Background sync: Starting JSON → SharePoint synchronization")
             if self.app_logger:
                 self.app_logger.log_info("Scheduled task: JSON to SharePoint sync started", {
                     'task': 'sync_json_to_sharepoint',
@@ -54,32 +64,32 @@ class SchedulerManager:
             
             # Check if SharePoint is enabled
             if not self.sharepoint_config.get('enabled', False):
-                self.logger.info("\033[94mℹ Background sync: SharePoint integration disabled, skipping\033[0m")
+                self.logger.info("ℹ Background sync: SharePoint integration disabled, skipping")
                 return
             
-            # Get JSON path from config
-            paths_config = self.transport_config.get('paths', {})
-            json_path = Path(paths_config.get('json_backup_file', '/tmp/transport_requests.json'))
+            if not self.json_helper.json_path.exists():
+                self.logger.info("ℹ Background sync: No JSON backup file found, nothing to sync")
+                return
             
-            if not json_path.exists():
-                self.logger.info("\033[94mℹ Background sync: No JSON backup file found, nothing to sync\033[0m")
+            # Steady state: nothing changed since a run that found everything synced - skip the scan
+            change_count = self.json_helper.change_count
+            if change_count == self._all_synced_at_change:
+                self.logger.info("✓ Background sync: No JSON backup changes since last sync, nothing to do")
                 return
             
-            # Load JSON data
-            with open(json_path, 'r', encoding='utf-8') as f:
-                json_records = json.load(f)
+            # Only unsynced records (kept with their index in JSON backup), updates replayed by JSONHelper
+            total_count, unsynced_records = self.json_helper.unsynced_records()
             
-            if not json_records:
-                self.logger.info("\033[94mℹ Background sync: JSON backup file empty, nothing to sync\033[0m")
+            if not total_count:
+                self.logger.info("ℹ Background sync: JSON backup file empty, nothing to sync")
                 return
             
-            # Filter to only unsynced records
-            unsynced_records = [r for r in json_records if not r.get('SharePoint_Synced', False)]
-            
-            self.logger.info(f"\033[94mℹ Background sync: Found {len(json_records)} total records, {len(unsynced_records)} unsynced\033[0m")
+            self.logger.info(f"ℹ Background sync: Found {total_count} total records, {len(unsynced_records)} unsynced")
             
             if not unsynced_records:
-                self.logger.info("\033[92m✓ Background sync: All records already synced to SharePoint\033[0m")
+                # Count read before the scan - any change since then makes next run scan again
+                self._all_synced_at_change = change_count
+                self.logger.info("✓ Background sync: All records already synced to SharePoint")
                 return
             
             # Get access token and initialize SharePoint helper
@@ -90,82 +100,102 @@ class SchedulerManager:
             excel_file_name = self.sharepoint_config['excel_file_name']
             worksheet_name = self.sharepoint_config.get('worksheet_name', 'Sheet1')
             
-            # Download Excel to check which records already exist
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir) / excel_file_name
-                
-                self.logger.info(f"\033[94mℹ Background sync: Downloading {excel_file_name}\033[0m")
+            use_excel_api = self.sharepoint_config.get('use_excel_api', True)
+            
+            # Get existing Request IDs from Excel (column A, header row skipped)
+            if use_excel_api:
+                # Excel API returns only column A as JSON - no workbook download
+                column_values = sp.get_excel_column_values(folder_url, excel_file_name, worksheet_name, 'A')[1:]
+            else:
+                # Download Excel into memory (traditional save needs the folder anyway)
+                self.logger.info(f"ℹ Background sync: Downloading {excel_file_name}")
                 folder = sp.get_folder(folder_url)
-                sp.download_file_from_folder(
-                    download_path=temp_dir,
-                    folder=folder,
-                    file_name=excel_file_name
-                )
-                
-                wb = load_workbook(temp_path)
-                ws = wb[worksheet_name] if worksheet_name in wb.sheetnames else wb.active
-                
-                # Get existing Request IDs from Excel (column A)
-                existing_request_ids = set()
-                for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=1):
-                    cell_value = row[0].value
-                    if cell_value and str(cell_value).strip():
-                        existing_request_ids.add(str(cell_value))
-                
-                self.logger.info(f"\033[94mℹ Background sync: Found {len(existing_request_ids)} existing records in SharePoint Excel\033[0m")
-                
-                # Find unsynced records that are not in Excel
-                records_to_sync = []
-                for record in unsynced_records:
-                    request_id = record.get('Request_ID')
-                    if request_id and request_id not in existing_request_ids:
-                        records_to_sync.append(record)
-                
-                if not records_to_sync:
-                    self.logger.info("\033[92m✓ Background sync: All unsynced records already in SharePoint Excel\033[0m")
-                    # Mark them as synced in JSON
-                    self._mark_records_as_synced(json_path, json_records, unsynced_records, existing_request_ids)
-                    return
-                
-                self.logger.info(f"\033[94mℹ Background sync: {len(records_to_sync)} records need to be synced\033[0m")
-                
-                # Sync missing records
-                synced_count = 0
-                failed_count = 0
-                
-                use_excel_api = self.sharepoint_config.get('use_excel_api', True)
-                
-                for record in records_to_sync:
-                    try:
-                        request_id = record.get('Request_ID')
-                        
-                        # Convert JSON record back to form data format
-                        form_data = self._convert_record_to_form_data(record)
-                        
-                        has_attachment = record.get('Has_Attachment', 'No') == 'Yes'
-                        attachment_error = record.get('Attachment_Error', '')
-                        
-                        # Save to SharePoint
-                        if use_excel_api:
-                            self._save_via_excel_api(request_id, form_data, has_attachment, attachment_error)
-                        else:
-                            self._save_via_traditional(request_id, form_data, has_attachment, attachment_error)
-                        
-                        synced_count += 1
-                        self.logger.info(f"\033[92m✓ Background sync: Synced record {request_id} ({synced_count}/{len(records_to_sync)})\033[0m")
-                        
-                        # Mark as synced in JSON
-                        record_json_index = json_records.index(record)
-                        self._update_json_sync_status(json_path, json_records, record_json_index, True)
-                        
-                    except Exception as sync_error:
-                        failed_count += 1
-                        self.logger.error(f"\033[91m✗ Background sync: Failed to sync record {request_id}: {sync_error}\033[0m")
-                
-                self.logger.info(f"\033[94mℹ Background sync: Complete - {synced_count} synced, {failed_count} failed\033[0m")
-                
+                column_values = self._read_id_column(sp.download_bytes(folder, excel_file_name), worksheet_name)
+            
+            existing_request_ids = {
+                str(cell_value).strip()
+                for cell_value in column_values
+                if cell_value is not None
+            }
+            existing_request_ids.discard('')
+            
+            self.logger.info(f"ℹ Background sync: Found {len(existing_request_ids)} existing records in SharePoint Excel")
+            
+            # Split unsynced records in one pass: missing from Excel vs already there
+            records_to_sync = []
+            already_in_excel = []
+            for record_json_index, record in unsynced_records:
+                request_id = record.get('Request_ID')
+                if not request_id:
+                    continue
+                if request_id in existing_request_ids:
+                    already_in_excel.append((request_id, record_json_index))
+                else:
+                    records_to_sync.append((record_json_index, record))
+            
+            # Records already in Excel (e.g. JSON flag update lost) - just mark them as synced in JSON
+            if already_in_excel:
+                self.json_helper.mark_synced(already_in_excel)
+            
+            if not records_to_sync:
+                self.logger.info("✓ Background sync: All unsynced records already in SharePoint Excel")
+                return
+            
+            self.logger.info(f"ℹ Background sync: {len(records_to_sync)} records need to be synced")
+            
+            # Rows built once per record (same column layout as ExcelHelper save paths)
+            timestamp = datetime.now().isoformat()
+            pending = []
+            for record_json_index, record in records_to_sync:
+                row_values = record_to_values(record)
+                # Traditional sheet layout has Timestamp in column B
+                row = list(row_values) if use_excel_api else [row_values[0], timestamp, *row_values[1:]]
+                pending.append((row_values[0], record_json_index, row))
+            
+            # Rows are written in chunks - one Excel API range write (or one workbook download/upload)
+            # per chunk instead of per record; sequential, so appends never race for the same row
+            chunk_size = max(1, self.sharepoint_config.get('excel_batch_max_rows', 20)) if use_excel_api else len(pending)
+            synced_count = 0
+            failed_count = 0
+            
+            for start in range(0, len(pending), chunk_size):
+                chunk = pending[start:start + chunk_size]
+                request_ids = [request_id for request_id, _, _ in chunk]
+                try:
+                    rows = [row for _, _, row in chunk]
+                    if use_excel_api:
+                        self._save_via_excel_api(sp, rows)
+                    else:
+                        self._save_via_traditional(sp, folder, rows)
+                    
+                    synced_count += len(chunk)
+                    self.logger.info("✓ Background sync: Synced records %s (%d/%d)",
+                                     ', '.join(request_ids), synced_count, len(pending))
+                    
+                    # Mark as synced in JSON
+                    self.json_helper.mark_synced([(request_id, index) for request_id, index, _ in chunk])
+                    
+                except Exception as sync_error:
+                    if not use_excel_api or len(chunk) == 1:
+                        failed_count += len(chunk)
+                        self.logger.error("✗ Background sync: Failed to sync records %s: %s", ', '.join(request_ids), sync_error)
+                        continue
+                    
+                    # One bad row fails the whole range write - retry rows one by one so the rest still syncs
+                    self.logger.warning(f"⚠ Background sync: Batch write failed ({sync_error}), retrying {len(chunk)} records one by one")
+                    for request_id, record_json_index, row in chunk:
+                        try:
+                            self._save_via_excel_api(sp, [row])
+                            synced_count += 1
+                            self.json_helper.mark_synced([(request_id, record_json_index)])
+                        except Exception as row_error:
+                            failed_count += 1
+                            self.logger.error("✗ Background sync: Failed to sync record %s: %s", request_id, row_error)
+            
+            self.logger.info(f"ℹ Background sync: Complete - {synced_count} synced, {failed_count} failed")
+            
         except Exception as e:
-            self.logger.error(f"\033[91m✗ Background sync: Error during synchronization: {e}\033[0m", exc_info=True)
+            self.logger.error(f"✗ Background sync: Error during synchronization: {e}", exc_info=True)
     
     def cleanup_old_attachments(self):
         """
@@ -173,7 +203,7 @@ class SchedulerManager:
         Runs periodically to keep storage clean
         """
         try:
-            self.logger.info("\033[94mℹ Attachment cleanup: Starting deletion of old files\033[0m")
+            self.logger.info("ℹ Attachment cleanup: Starting deletion of old files")
             if self.app_logger:
                 self.app_logger.log_info("Scheduled task: Attachment cleanup started", {
                     'task': 'cleanup_old_attachments',
@@ -182,7 +212,7 @@ class SchedulerManager:
             
             # Check if SharePoint is enabled
             if not self.sharepoint_config.get('enabled', False):
-                self.logger.info("\033[94mℹ Attachment cleanup: SharePoint integration disabled, skipping\033[0m")
+                self.logger.info("ℹ Attachment cleanup: SharePoint integration disabled, skipping")
                 return
             
             # Get retention period from config (default: 90 days = 3 months)
@@ -195,7 +225,7 @@ class SchedulerManager:
             # Get attachments folder URL from config
             folder_url = self.sharepoint_config.get('folder_url')
             if not folder_url:
-                self.logger.warning("\033[93m⚠ Attachment cleanup: No folder_url configured\033[0m")
+                self.logger.warning("⚠ Attachment cleanup: No folder_url configured")
                 return
             
             # Assume attachments are in subfolder "Attachments"
@@ -204,208 +234,144 @@ class SchedulerManager:
             try:
                 attachments_folder = sp.get_folder(attachments_folder_url)
             except Exception as e:
-                self.logger.warning(f"\033[93m⚠ Attachment cleanup: Attachments folder not found or error: {e}\033[0m")
+                self.logger.warning(f"⚠ Attachment cleanup: Attachments folder not found or error: {e}")
                 return
             
             # Get old files
             old_files = sp.get_files_older_than(attachments_folder, days=retention_days)
             
             if not old_files:
-                self.logger.info(f"\033[94mℹ Attachment cleanup: No files older than {retention_days} days found\033[0m")
+                self.logger.info(f"ℹ Attachment cleanup: No files older than {retention_days} days found")
                 return
             
             # Delete old files
             deleted_count = 0
             failed_count = 0
             
-            for file_item in old_files:
-                try:
-                    if sp.delete_file(file_item):
-                        deleted_count += 1
-                        self.logger.info(f"\033[92m✓ Deleted: {file_item.get('name')}\033[0m")
-                    else:
+            workers = min(self.sharepoint_config.get('cleanup_workers', CLEANUP_DELETE_WORKERS), len(old_files))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(sp.delete_file, file_item): file_item for file_item in old_files}
+                for future in as_completed(futures):
+                    file_name = futures[future].get('name')
+                    try:
+                        if future.result():
+                            deleted_count += 1
+                            self.logger.info("✓ Deleted: %s", file_name)
+                        else:
+                            failed_count += 1
+                    except Exception as delete_error:
                         failed_count += 1
-                except Exception as delete_error:
-                    failed_count += 1
-                    self.logger.error(f"\033[91m✗ Failed to delete {file_item.get('name')}: {delete_error}\033[0m")
+                        self.logger.error("✗ Failed to delete %s: %s", file_name, delete_error)
             
-            self.logger.info(f"\033[92m✓ Attachment cleanup: Complete - {deleted_count} deleted, {failed_count} failed\033[0m")
+            self.logger.info(f"✓ Attachment cleanup: Complete - {deleted_count} deleted, {failed_count} failed")
             
         except Exception as e:
-            self.logger.error(f"\033[91m✗ Attachment cleanup: Error during cleanup: {e}\033[0m", exc_info=True)
+            self.logger.error(f"✗ Attachment cleanup: Error during cleanup: {e}", exc_info=True)
     
     # ========== Private Helper Methods ==========
     
-    def _convert_record_to_form_data(self, record: dict) -> dict:
-        """Convert JSON record back to form data format"""
-        return {
-            'deliveryNoteNumber': record.get('Delivery_Note_Number', ''),
-            'truckLicensePlates': record.get('Truck_License_Plates', ''),
-            'trailerLicensePlates': record.get('Trailer_License_Plates', ''),
-            'carrierCountry': record.get('Carrier_Country', ''),
-            'carrierTaxCode': record.get('Carrier_Tax_Code', ''),
-            'carrierFullName': record.get('Carrier_Full_Name', ''),
-            'borderCrossing': record.get('Border_Crossing', ''),
-            'borderCrossingDate': record.get('Border_Crossing_Date', ''),
-            'email': record.get('Email', ''),
-            'phoneNumber': record.get('Phone_Number', '')
-        }
+    @staticmethod
+    def _read_id_column(content: bytes, worksheet_name: str) -> list:
+        """Read column A values (without header) from downloaded workbook bytes"""
+        # Only column A is read - read-only mode streams rows instead of building whole sheet,
+        # data_only skips formulas (cached values are enough for IDs)
+        wb = load_workbook(BytesIO(content), read_only=True, data_only=True)
+        try:
+            ws = wb[worksheet_name] if worksheet_name in wb.sheetnames else wb.active
+            # values_only yields plain 1-tuples (padded with None) - no Cell objects
+            return [cell_value for (cell_value,) in ws.iter_rows(min_row=2, min_col=1, max_col=1, values_only=True)]
+        finally:
+            # Read-only workbook keeps the zip archive open until closed
+            wb.close()
     
-    def _save_via_excel_api(self, request_id: str, form_data: dict, 
-                           has_attachment: bool, attachment_error: str):
+    def _save_via_excel_api(self, sp: SharePointHelper, rows: list):
         """
-        Save record using Excel API (direct row insertion)
+        Save records using Excel API (direct row insertion, all rows in one range write)
         Works even when file is open by other users
+        
+        Args:
+            sp: SharePoint helper shared by the whole sync run
+            rows: Row value lists in EXCEL_COLUMNS order
         """
         try:
-            access_token = self.get_access_token()
-            sp = SharePointHelper(access_token)
-            
             folder_url = self.sharepoint_config['folder_url']
             excel_file_name = self.sharepoint_config['excel_file_name']
             worksheet_name = self.sharepoint_config.get('worksheet_name', 'Sheet1')
             
-            self.logger.info(f"SharePoint Excel API: Adding row to {excel_file_name}")
-            
-            # Prepare row values in correct column order
-            attachment_status = 'Saved' if has_attachment else ('Failed' if attachment_error else 'None')
-            
-            row_values = [
-                request_id,
-                form_data.get('deliveryNoteNumber', ''),
-                form_data.get('truckLicensePlates', ''),
-                form_data.get('trailerLicensePlates', ''),
-                form_data.get('carrierCountry', ''),
-                form_data.get('carrierTaxCode', ''),
-                form_data.get('carrierFullName', ''),
-                form_data.get('borderCrossing', ''),
-                form_data.get('borderCrossingDate', ''),
-                form_data.get('email', ''),
-                form_data.get('phoneNumber', ''),
-                'Yes' if has_attachment else 'No',
-                attachment_status,
-                attachment_error if attachment_error else ''
-            ]
-            
-            # Add row using Excel API
-            sp.add_excel_row(
+            self.logger.info("SharePoint Excel API: Adding %d row(s) to %s", len(rows), excel_file_name)
+            
+            # Add rows using Excel API
+            sp.add_excel_rows(
                 folder_url=folder_url,
                 excel_file_name=excel_file_name,
                 worksheet_name=worksheet_name,
-                row_values=row_values
+                rows=rows
             )
             
-            self.logger.info(f"\033[92m✓ SharePoint Excel API: Successfully added row for {request_id}\033[0m")
+            self.logger.info("✓ SharePoint Excel API: Successfully added %d row(s)", len(rows))
             
         except Exception as e:
-            self.logger.error(f"\033[91m✗ SharePoint Excel API error: {e}\033[0m", exc_info=True)
+            self.logger.error("✗ SharePoint Excel API error: %s", e, exc_info=True)
             raise
     
-    def _save_via_traditional(self, request_id: str, form_data: dict,
-                             has_attachment: bool, attachment_error: str):
+    def _save_via_traditional(self, sp: SharePointHelper, folder: dict, rows: list):
         """
-        Save record using traditional download/upload method
+        Save records using traditional download/upload method
         Uses retry logic for locked files
-        """
-        access_token = self.get_access_token()
-        sp = SharePointHelper(access_token)
         
-        folder_url = self.sharepoint_config['folder_url']
+        Workbook is downloaded, edited (all rows appended) and uploaded once, in memory (no temp files).
+        
+        Args:
+            sp: SharePoint helper shared by the whole sync run
+            folder: Folder with the Excel file (resolved once per sync run)
+            rows: Row value lists in traditional sheet layout (Timestamp in column B)
+        """
         excel_file_name = self.sharepoint_config['excel_file_name']
         worksheet_name = self.sharepoint_config.get('worksheet_name', 'Sheet1')
         max_retries = self.sharepoint_config.get('max_retries', 3)
-        retry_wait_multiplier = self.sharepoint_config.get('retry_wait_multiplier', 2)
-        
-        self.logger.info(f"SharePoint: Getting folder from {folder_url}")
-        folder = sp.get_folder(folder_url)
+        retry_deadline = self.sharepoint_config.get('retry_deadline_seconds', 30)
         
         # Retry loop for handling locked files
         last_error = None
+        start = time.monotonic()
         for attempt in range(max_retries):
             try:
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    temp_path = Path(temp_dir) / excel_file_name
-                    
-                    self.logger.info(f"SharePoint: Downloading {excel_file_name} (attempt {attempt + 1}/{max_retries})")
-                    sp.download_file_from_folder(
-                        download_path=temp_dir,
-                        folder=folder,
-                        file_name=excel_file_name
-                    )
-                    
-                    wb = load_workbook(temp_path)
-                    ws = wb[worksheet_name] if worksheet_name in wb.sheetnames else wb.active
-                    
-                    # Prepare new row with data
-                    new_row = [
-                        request_id,
-                        datetime.now().isoformat(),
-                        form_data.get('deliveryNoteNumber', ''),
-                        form_data.get('truckLicensePlates', ''),
-                        form_data.get('trailerLicensePlates', ''),
-                        form_data.get('carrierCountry', ''),
-                        form_data.get('carrierTaxCode', ''),
-                        form_data.get('carrierFullName', ''),
-                        form_data.get('borderCrossing', ''),
-                        form_data.get('borderCrossingDate', ''),
-                        form_data.get('email', ''),
-                        form_data.get('phoneNumber', ''),
-                        'Yes' if has_attachment else 'No',
-                        'Saved' if has_attachment else ('Failed' if attachment_error else 'None'),
-                        attachment_error if attachment_error else ''
-                    ]
-                    
-                    ws.append(new_row)
-                    self.logger.info(f"SharePoint: Added new row {ws.max_row}")
-                    
-                    wb.save(temp_path)
-                    wb.close()
-                    
-                    self.logger.info(f"SharePoint: Uploading {excel_file_name} (attempt {attempt + 1}/{max_retries})")
-                    sp.upload_file(temp_path, folder)
-                    
-                    self.logger.info(f"\033[92m✓ SharePoint: Successfully saved to {excel_file_name}\033[0m")
-                    return
-                    
+                self.logger.info(f"SharePoint: Downloading {excel_file_name} (attempt {attempt + 1}/{max_retries})")
+                content = sp.download_bytes(folder, excel_file_name)
+                
+                wb = load_workbook(BytesIO(content))
+                ws = wb[worksheet_name] if worksheet_name in wb.sheetnames else wb.active
+                
+                for row in rows:
+                    ws.append(row)
+                self.logger.info(f"SharePoint: Added {len(rows)} new row(s), last row {ws.max_row}")
+                
+                # Downloaded bytes no longer needed - don't hold them during save/upload
+                del content
+                buffer = BytesIO()
+                wb.save(buffer)
+                wb.close()
+                
+                self.logger.info(f"SharePoint: Uploading {excel_file_name} (attempt {attempt + 1}/{max_retries})")
+                sp.upload_bytes(buffer, folder, excel_file_name)
+                
+                self.logger.info(f"✓ SharePoint: Successfully saved to {excel_file_name}")
+                return
+                
             except Exception as e:
                 last_error = e
-                error_str = str(e).lower()
-                
-                is_locked = any(indicator in error_str for indicator in [
-                    'locked', 'in use', 'being used', 'cannot access', '423',
-                    'cobaltlockviolation', 'resourcelocked', 'file is open'
-                ])
+                is_locked = is_lock_error(e)
                 
                 if is_locked and attempt < max_retries - 1:
-                    wait_time = (attempt + 1) * retry_wait_multiplier
-                    self.logger.warning(f"\033[93m⚠ SharePoint: File locked. Waiting {wait_time}s before retry...\033[0m")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    if is_locked:
-                        self.logger.error(f"\033[91m✗ SharePoint: File still locked after {max_retries} attempts\033[0m")
-                    raise
+                    wait_time = lock_retry_wait(attempt)
+                    if time.monotonic() - start + wait_time <= retry_deadline:
+                        self.logger.warning(f"⚠ SharePoint: File locked. Waiting {wait_time:.1f}s before retry...")
+                        time.sleep(wait_time)
+                        continue
+                
+                if is_locked:
+                    self.logger.error(f"✗ SharePoint: File still locked after {attempt + 1} attempts ({time.monotonic() - start:.1f}s)")
+                raise
         
-        self.logger.error(f"\033[91m✗ SharePoint: All {max_retries} attempts failed\033[0m")
+        self.logger.error(f"✗ SharePoint: All {max_retries} attempts failed")
         raise Exception(f"Failed to save to SharePoint after {max_retries} attempts. Last error: {last_error}")
-    
-    def _mark_records_as_synced(self, json_path: Path, json_records: list, 
-                                unsynced_records: list, existing_request_ids: set):
-        """Mark records as synced in JSON if they already exist in SharePoint"""
-        for record in unsynced_records:
-            if record.get('Request_ID') in existing_request_ids:
-                record_json_index = json_records.index(record)
-                self._update_json_sync_status(json_path, json_records, record_json_index, True)
-    
-    def _update_json_sync_status(self, json_path: Path, json_records: list, 
-                                 record_index: int, synced: bool):
-        """Update sync status for a specific record in JSON"""
-        try:
-            if 0 <= record_index < len(json_records):
-                json_records[record_index]['SharePoint_Synced'] = synced
-                
-                with open(json_path, 'w', encoding='utf-8') as f:
-                    json.dump(json_records, f, indent=2, ensure_ascii=False)
-                    
-        except Exception as e:
-            self.logger.error(f"Failed to update JSON sync status: {e}")
@@ -3,9 +3,8 @@ TransportRequestHandler - Main handler for transport request processing
 Orchestrates all helpers (Excel, Email, JSON, Attachments)
 Single point of initialization - no more passing 10+ parameters everywhere!
 """
-import logging
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import logging
 from typing import List, Dict, Any
 
 from .helpers import ExcelHelper, EmailHelper, JSONHelper, AttachmentHelper
@@ -20,7 +19,8 @@ class TransportRequestHandler:
     """
     
     def __init__(self, config: dict, logger_instance, app_logger_instance,
-                 performance_metrics_instance, get_access_token_func):
+                 performance_metrics_instance, get_access_token_func,
+                 get_access_token_async_func=None):
         """
         Initialize handler with all dependencies (ONCE at startup!)
         
@@ -30,6 +30,8 @@ class TransportRequestHandler:
             app_logger_instance: Structured app logger
             performance_metrics_instance: Performance metrics tracker
             get_access_token_func: Function to get access token
+            get_access_token_async_func: Optional coroutine function to get access token
+                                         (without it async paths run the sync one in a thread)
         """
         self.config = config
         self.transport_config = config.get('default', {}).get('transport', {})
@@ -53,6 +55,7 @@ class TransportRequestHandler:
             config=config,
             transport_config=self.transport_config,
             get_access_token_func=get_access_token_func,
+            get_access_token_async_func=get_access_token_async_func,
             logger_instance=logger_instance,
             app_logger_instance=app_logger_instance
         )
@@ -65,10 +68,22 @@ class TransportRequestHandler:
         self.attachments = AttachmentHelper(
             sharepoint_config=self.sharepoint_config,
             get_access_token_func=get_access_token_func,
+            get_access_token_async_func=get_access_token_async_func,
             logger_instance=logger_instance,
             performance_metrics_instance=performance_metrics_instance
         )
     
+    def close(self, timeout: float = 10.0):
+        """
+        Flush pending work on application shutdown (queued Excel rows, JSON update lines)
+        
+        Args:
+            timeout: Max seconds to wait for queued Excel rows
+        """
+        self.excel.close(timeout)
+        self.json_helper.compact()
+        self.json_helper.close()
+    
     async def process_submission(self, request_id: str, data_dict: dict,
                                 attachments_data: List[dict], user_ip: str,
                                 json_index: int = None):
@@ -83,13 +98,15 @@ class TransportRequestHandler:
             json_index: Index in JSON backup file
         """
         try:
-            self.logger.info(f"\033[94mℹ Background processing started for {request_id}\033[0m")
+            self.logger.info(f"ℹ Background processing started for {request_id}")
             
-            # STEP 1: Save to Excel FIRST
+            # STEP 1: Save to Excel (runs in background, overlapped with attachment uploads)
             has_attachment_pending = len(attachments_data) > 0
-            self.logger.info(f"\033[94mℹ Saving to Excel (attachments: {'pending' if has_attachment_pending else 'none'})...\033[0m")
+            self.logger.info(f"ℹ Saving to Excel (attachments: {'pending' if has_attachment_pending else 'none'})...")
             
-            excel_result = self.excel.save_to_excel(
+            # Off the event loop: concurrent submissions reach the Excel batch writer together
+            excel_task = asyncio.create_task(asyncio.to_thread(
+                self.excel.save_to_excel,
                 request_id=request_id,
                 data=data_dict,
                 has_attachment=has_attachment_pending,
@@ -97,57 +114,44 @@ class TransportRequestHandler:
                 json_index=json_index,
                 update_json_sync_status_func=self.json_helper.update_sync_status,
                 attachment_status='Processing' if has_attachment_pending else None
-            )
-            self.logger.info(f"\033[92m✓ Background: Excel saved\033[0m")
+            ))
             
-            # STEP 2: Process attachments in parallel
+            # STEP 2: Process attachments in parallel (while Excel row is being written)
             attachments_saved = []
             attachments_errors = []
             
             if self.sharepoint_config.get('enabled', True) and attachments_data:
                 self.logger.info(f"Processing {len(attachments_data)} attachments (PARALLEL)")
                 
-                # Upload in parallel using ThreadPoolExecutor
-                loop = asyncio.get_event_loop()
-                with ThreadPoolExecutor(max_workers=3) as executor:
-                    upload_tasks = [
-                        loop.run_in_executor(
-                            executor,
-                            self.attachments.upload_single_attachment,
-                            att_data,
-                            request_id
-                        )
-                        for att_data in attachments_data
-                    ]
-                    
-                    # Wait for all uploads
-                    results = await asyncio.gather(*upload_tasks, return_exceptions=True)
-                    
-                    # Process results
-                    for result in results:
-                        if isinstance(result, Exception):
-                            attachments_errors.append(str(result))
-                        else:
-                            success, filename, error = result
-                            if success:
-                                attachments_saved.append(filename)
-                            else:
-                                attachments_errors.append(error)
+                # Upload in parallel on the event loop (token/folder resolved once per batch)
+                results = await self.attachments.aupload_attachments_batch(attachments_data, request_id)
                 
-                self.logger.info(f"\033[92m✓ Background: Attachments processed ({len(attachments_saved)} saved, {len(attachments_errors)} failed)\033[0m")
+                # Process results
+                for success, filename, error in results:
+                    if success:
+                        attachments_saved.append(filename)
+                    else:
+                        attachments_errors.append(error)
+                
+                self.logger.info(f"✓ Background: Attachments processed ({len(attachments_saved)} saved, {len(attachments_errors)} failed)")
+            
+            # Row must exist before its attachment status is updated
+            excel_result = await excel_task
+            self.logger.info(f"✓ Background: Excel saved")
             
             # STEP 3: Update Excel with final attachment status
             has_attachment = len(attachments_saved) > 0
             attachment_error = "; ".join(attachments_errors) if attachments_errors else None
             
             if has_attachment_pending:
-                self.logger.info(f"\033[94mℹ Updating Excel with final attachment status...\033[0m")
-                self.excel.update_attachment_status(
+                self.logger.info(f"ℹ Updating Excel with final attachment status...")
+                await asyncio.to_thread(
+                    self.excel.update_attachment_status,
                     request_id=request_id,
                     has_attachment=has_attachment,
                     attachment_error=attachment_error
                 )
-                self.logger.info(f"\033[92m✓ Background: Excel updated with attachment status\033[0m")
+                self.logger.info(f"✓ Background: Excel updated with attachment status")
             
             # Update JSON with attachment status
             if json_index is not None:
@@ -177,7 +181,7 @@ class TransportRequestHandler:
             user_email = data_dict.get('email')
             if user_email:
                 try:
-                    self.email.send_confirmation(
+                    await self.email.send_confirmation(
                         request_id=request_id,
                         data=data_dict,
                         user_email=user_email,
@@ -186,12 +190,13 @@ class TransportRequestHandler:
                         attachments_saved=attachments_saved
                     )
                 except Exception as email_error:
-                    self.logger.error(f"\033[91m✗ Email send failed: {email_error}\033[0m")
+                    self.logger.error(f"✗ Email send failed: {email_error}")
             
-            self.logger.info(f"\033[92m✓ Background processing completed for {request_id}\033[0m")
+            self.logger.info(f"✓ Background processing completed for {request_id}")
             
         except Exception as bg_error:
-            self.logger.error(f"\033[91m✗ Background processing failed for {request_id}: {bg_error}\033[0m", exc_info=True)
+            self.logger.error(f"✗ Background processing failed for {request_id}: {type(bg_error).__name__}: {bg_error}")
+            self.logger.debug("Background processing traceback:", exc_info=True)
             if self.app_logger:
                 self.app_logger.log_error(f"Background processing failed: {bg_error}", {
                     'request_id': request_id,
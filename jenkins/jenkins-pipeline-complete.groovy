@@ -68,16 +68,22 @@ pipeline {
                             if [ "$FILE_SIZE" -gt ${JSON_MIN_SIZE} ]; then
                                 # Valid file - create timestamped backup
                                 TIMESTAMP=$(date +%Y%m%d_%H%M%S)
-                                docker cp ${BACKEND_CONTAINER}:${JSON_BACKUP_PATH} ${JSON_BACKUP_DIR}/${JSON_BACKUP_PREFIX}$TIMESTAMP.json
+                                BACKUP_FILE=${JSON_BACKUP_PREFIX}$TIMESTAMP.json
+                                docker cp ${BACKEND_CONTAINER}:${JSON_BACKUP_PATH} ${JSON_BACKUP_DIR}/$BACKUP_FILE
+                                
+                                # Compress archived copy with zstd if available (JSON Lines shrinks ~5-10x)
+                                if command -v zstd >/dev/null 2>&1; then
+                                    zstd -q -3 --rm ${JSON_BACKUP_DIR}/$BACKUP_FILE && BACKUP_FILE=$BACKUP_FILE.zst
+                                fi
                                 
                                 # Create symlink to latest
-                                ln -sf ${JSON_BACKUP_DIR}/${JSON_BACKUP_PREFIX}$TIMESTAMP.json ${JSON_BACKUP_DIR}/${JSON_LATEST}
+                                ln -sf ${JSON_BACKUP_DIR}/$BACKUP_FILE ${JSON_BACKUP_DIR}/${JSON_LATEST}
                                 
-                                # Keep only last N backups
-                                ls -t ${JSON_BACKUP_DIR}/${JSON_BACKUP_PREFIX}*.json 2>/dev/null | tail -n +$((${JSON_MAX_COUNT}+1)) | xargs -r rm
+                                # Keep only last N backups (plain and compressed)
+                                ls -t ${JSON_BACKUP_DIR}/${JSON_BACKUP_PREFIX}*.json ${JSON_BACKUP_DIR}/${JSON_BACKUP_PREFIX}*.json.zst 2>/dev/null | tail -n +$((${JSON_MAX_COUNT}+1)) | xargs -r rm
                                 
-                                echo "✅ JSON backup saved: ${JSON_BACKUP_PREFIX}$TIMESTAMP.json (${FILE_SIZE} bytes)"
-                                echo "✅ Symlink updated: ${JSON_LATEST} -> ${JSON_BACKUP_PREFIX}$TIMESTAMP.json"
+                                echo "✅ JSON backup saved: $BACKUP_FILE (${FILE_SIZE} bytes uncompressed)"
+                                echo "✅ Symlink updated: ${JSON_LATEST} -> $BACKUP_FILE"
                             else
                                 echo "⚠️ JSON file empty or missing in container ($FILE_SIZE bytes) - preserving existing backup"
                                 # Don't overwrite good backup with empty file (VM restart scenario protection)
@@ -85,7 +91,7 @@ pipeline {
                             
                             # Show available backups
                             echo "📁 Available backups:"
-                            ls -lh ${JSON_BACKUP_DIR}/${JSON_BACKUP_PREFIX}*.json 2>/dev/null || echo "No backups yet"
+                            ls -lh ${JSON_BACKUP_DIR}/${JSON_BACKUP_PREFIX}*.json ${JSON_BACKUP_DIR}/${JSON_BACKUP_PREFIX}*.json.zst 2>/dev/null || echo "No backups yet"
                         else
                             echo "ℹ️ No running backend container - skipping JSON backup"
                         fi
@@ -467,8 +473,18 @@ pipeline {
                                 ACTUAL_FILE=$(readlink -f ${JSON_BACKUP_DIR}/${JSON_LATEST})
                                 echo "📁 Actual backup file: $ACTUAL_FILE"
                                 
+                                # Compressed archive - decompress to temp file first
+                                RESTORE_FILE=$ACTUAL_FILE
+                                case "$ACTUAL_FILE" in
+                                    *.zst)
+                                        RESTORE_FILE=$(mktemp)
+                                        zstd -q -d -c "$ACTUAL_FILE" > "$RESTORE_FILE"
+                                        ;;
+                                esac
+                                
                                 # Copy actual file (not symlink)
-                                docker cp $ACTUAL_FILE ${BACKEND_CONTAINER}:${JSON_BACKUP_PATH}
+                                docker cp $RESTORE_FILE ${BACKEND_CONTAINER}:${JSON_BACKUP_PATH}
+                                if [ "$RESTORE_FILE" != "$ACTUAL_FILE" ]; then rm -f "$RESTORE_FILE"; fi
                                 
                                 # Fix permissions and ownership (ensure writable by container user)
                                 docker exec ${BACKEND_CONTAINER} chmod 666 ${JSON_BACKUP_PATH}
@@ -1,5 +1,13 @@
+import sys
+import time
+
 import requests
 import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Liczba wysyłek (np. `python quick_test.py 20`) - jedna sesja, połączenie TCP/TLS używane ponownie
+REPEAT = int(sys.argv[1]) if len(sys.argv) > 1 else 1
 
 # Test z dokładnie takimi samymi danymi jak z przeglądarki
 test_data = {
@@ -17,13 +25,25 @@ print('🧪 Test z takimi samymi danymi jak w przeglądarce')
 print('✅ Poprawny URL z portem 5443')
 print('📤 Sending to API...')
 
-response = requests.post(
-    'https://your-url-address:5443/api/submit',
-    data={'data': json.dumps(test_data)},
-    timeout=30
-)
+payload = {'data': json.dumps(test_data)}
+durations = []
+
+with requests.Session() as session:
+    # Retry only connection errors (POST is not idempotent - urllib3 does not retry it on status)
+    session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1,
+                                          max_retries=Retry(total=3, backoff_factor=0.3)))
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        response = session.post(
+            'https://your-url-address:5443/api/submit',
+            data=payload,
+            timeout=30
+        )
+        durations.append(time.perf_counter() - start)
 
 print(f'📊 Status: {response.status_code}')
+if REPEAT > 1:
+    print(f'⏱️ {REPEAT} żądań: pierwsze {durations[0]*1000:.0f} ms, średnio {sum(durations)/len(durations)*1000:.0f} ms')
 
 if response.status_code == 200:
     result = response.json()
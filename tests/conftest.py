@@ -0,0 +1,146 @@
+"""
+Shared pytest fixtures - adresy lokalnego środowiska, wspólna sesja HTTP oraz health check, config backendu, walidacja docker compose i atrapa Token API (raz na sesję)
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+# backend/ on sys.path once at collection (test modules import backend modules directly)
+BACKEND_DIR = str(Path(__file__).resolve().parent.parent / 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+TOKEN_API_URL = "https://your-token-api.yourdomain.com/getaccesstoken"
+
+
+@pytest.fixture(scope="session")
+def project_root():
+    """Project root directory (parent of tests/)"""
+    return Path(__file__).parent.parent
+
+
+@pytest.fixture(scope="session")
+def backend_url():
+    """Backend URL for testing"""
+    return "http://localhost:8000"
+
+
+@pytest.fixture(scope="session")
+def frontend_url():
+    """Frontend URL for testing"""
+    return "http://localhost:3000"
+
+
+@pytest.fixture(scope="session")
+def http():
+    """One keep-alive session (connection pool) shared by all integration tests"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def backend_alive(http, backend_url):
+    """Probe /api/health once per session - tests skip on the cached result instead of re-connecting"""
+    try:
+        return http.get(f"{backend_url}/api/health", timeout=2).status_code == 200
+    except requests.RequestException:
+        return False
+
+
+@pytest.fixture(scope="session")
+def backend_config():
+    """backend/config.yaml parsed once per session (tests run from the project root)"""
+    import yaml
+    config_path = Path("backend/config.yaml")
+    if not config_path.exists():
+        pytest.fail(f"Config file not found: {config_path}")
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=loader)
+
+
+@pytest.fixture(scope="session")
+def compose_config(project_root):
+    """
+    Validate docker-compose.yaml once per session
+
+    Returns:
+        tuple: (True/False, stderr) or (None, reason) when docker compose is unavailable
+    """
+    # Compose v2 plugin first, legacy docker-compose binary as fallback
+    for command in (["docker", "compose", "config", "--quiet"], ["docker-compose", "config", "--quiet"]):
+        try:
+            result = subprocess.run(command, cwd=str(project_root), capture_output=True, text=True, timeout=30)
+        except FileNotFoundError:
+            continue
+        except subprocess.TimeoutExpired:
+            return None, "validation timed out"
+        if result.returncode != 0 and command[0] == "docker" and "is not a docker command" in result.stderr:
+            continue
+        return result.returncode == 0, result.stderr
+    return None, "docker compose not installed"
+
+
+@pytest.fixture(scope="session")
+def fake_token_response():
+    """Builder of Token API responses (requests.Response without network)"""
+    def build(token, status_code=200):
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = json.dumps({"access_token": token, "expires_in": 3600}).encode()
+        response.headers['Content-Type'] = 'application/json'
+        return response
+    return build
+
+
+@pytest.fixture(scope="session")
+def token_manager_factory():
+    """Create TokenManagers for the offline test config; closed at session end (refresh timer + pooled session)"""
+    from token_manager import TokenManager
+    managers = []
+
+    def create():
+        manager = TokenManager(
+            token_api_url=TOKEN_API_URL,
+            email="transport-app@yourdomain.com",
+            password="TestPassword123!",
+            application_name="your-app-name",
+            token_lifetime_hours=1
+        )
+        managers.append(manager)
+        return manager
+
+    yield create
+    for manager in managers:
+        manager.close()
+
+
+@pytest.fixture(scope="session")
+def token_api(fake_token_response):
+    """In-process Token API - every POST issues a new token (no DNS/TLS/network)"""
+    issued = []
+
+    def post(*args, **kwargs):
+        issued.append(f"eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.token-{len(issued) + 1}.signature")
+        return fake_token_response(issued[-1])
+
+    return MagicMock(side_effect=post)
+
+
+@pytest.fixture(scope="session")
+def token_manager(token_manager_factory, token_api):
+    """One TokenManager for the whole session, its HTTP session wired to token_api (other sessions untouched)"""
+    manager = token_manager_factory()
+    manager._session.post = token_api
+    return manager
@@ -59,9 +59,17 @@ function Invoke-BackendTests {
     pip install -r ..\backend\requirements.txt
     pip install -r ..\backend\requirements_test.txt
     
+    # -n auto needs pytest-xdist - without it pytest only reports unrecognized arguments
+    python -c "import xdist" 2>$null
+    if ($LASTEXITCODE -ne 0) {
+        Write-Error "pytest-xdist not installed (required for -n auto). Install ..\backend\requirements_test.txt"
+        return $false
+    }
+    
     # Run tests
     Write-Status "Executing backend unit tests..."
-    $result = pytest ..\backend\test_fastapi_app.py -v --cov=..\backend --cov-report=term-missing
+    # -n auto: test classes spread over worker processes (loadgroup keeps xdist_group tests together)
+    $result = pytest .\test_fastapi_app.py -v -n auto --dist loadgroup --cov=..\backend --cov-report=term-missing
     
     if ($LASTEXITCODE -eq 0) {
         Write-Success "Backend tests passed!"
@@ -174,7 +182,8 @@ function Invoke-IntegrationTests {
     
     # Run integration tests
     Write-Status "Executing integration tests..."
-    pytest test_integration.py -v
+    # -n auto: HTTP round trips overlap across workers (request data is unique per test)
+    pytest test_integration.py -v -n auto
     
     $testResult = ($LASTEXITCODE -eq 0)
     
@@ -61,9 +61,16 @@ run_backend_tests() {
     pip install -r backend/requirements.txt
     pip install -r backend/requirements_test.txt
     
+    # -n auto needs pytest-xdist - without it pytest only reports unrecognized arguments
+    if ! python -c "import xdist" >/dev/null 2>&1; then
+        print_error "pytest-xdist not installed (required for -n auto). Install backend/requirements_test.txt"
+        return 1
+    fi
+    
     # Run tests
     print_status "Executing backend unit tests..."
-    if pytest backend/test_fastapi_app.py -v --cov=backend --cov-report=term-missing; then
+    # -n auto: test classes spread over worker processes (loadgroup keeps xdist_group tests together)
+    if pytest tests/test_fastapi_app.py -v -n auto --dist loadgroup --cov=backend --cov-report=term-missing; then
         print_success "Backend tests passed!"
         return 0
     else
@@ -160,7 +167,8 @@ run_integration_tests() {
     
     # Run integration tests
     print_status "Executing integration tests..."
-    if pytest test_integration.py -v; then
+    # -n auto: HTTP round trips overlap across workers (request data is unique per test)
+    if pytest test_integration.py -v -n auto; then
         print_success "Integration tests passed!"
         
         # Clean up background process if we started it
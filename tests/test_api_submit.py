@@ -4,18 +4,28 @@ Test script for Transport Request API
 Tests the /api/submit endpoint with various test data scenarios
 """
 
+import argparse
 import requests
+import itertools
 import json
 import random
 from datetime import datetime, timedelta
 from pathlib import Path
 import tempfile
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # API Configuration
 API_BASE_URL = "https://your-production-server.yourdomain.com:5443"
 SUBMIT_ENDPOINT = f"{API_BASE_URL}/api/submit"
 
+# Pretty-printed payloads, headers and responses only with VERBOSE=1
+VERBOSE = bool(os.getenv("VERBOSE"))
+
+# One session for all tests - TCP/TLS connection kept alive between calls
+SESSION = requests.Session()
+SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 # Test data templates
 TEST_COUNTRIES = ["Austria", "Germany", "Hungary", "Bulgaria", "Serbia", "Poland"]
 TEST_BORDER_CROSSINGS = [
@@ -23,41 +33,51 @@ TEST_BORDER_CROSSINGS = [
     "Stamora Moravița", "Jimbolia", "Naidăș", "Turnu"
 ]
 
-def generate_test_data():
-    """Generate random test data for transport request"""
-    today = datetime.now()
-    crossing_date = today + timedelta(days=random.randint(1, 30))
+def _build_test_data(rng, today):
+    """Build one test payload from given random generator"""
+    crossing_date = today + timedelta(days=rng.randint(1, 30))
     
     return {
-        "deliveryNoteNumber": f"DN{random.randint(100000, 999999)}",
-        "truckLicensePlates": f"TR-{random.randint(100, 999)}-AB",
-        "trailerLicensePlates": f"TL-{random.randint(100, 999)}-CD",
-        "carrierCountry": random.choice(TEST_COUNTRIES),
-        "carrierTaxCode": f"TAX{random.randint(10000000, 99999999)}",
-        "carrierFullName": f"Transport Company {random.randint(1, 100)} SRL",
-        "borderCrossing": random.choice(TEST_BORDER_CROSSINGS),
+        "deliveryNoteNumber": f"DN{rng.randint(100000, 999999)}",
+        "truckLicensePlates": f"TR-{rng.randint(100, 999)}-AB",
+        "trailerLicensePlates": f"TL-{rng.randint(100, 999)}-CD",
+        "carrierCountry": rng.choice(TEST_COUNTRIES),
+        "carrierTaxCode": f"TAX{rng.randint(10000000, 99999999)}",
+        "carrierFullName": f"Transport Company {rng.randint(1, 100)} SRL",
+        "borderCrossing": rng.choice(TEST_BORDER_CROSSINGS),
         "borderCrossingDate": crossing_date.strftime("%Y-%m-%d"),
-        "email": f"test{random.randint(1, 1000)}@example.com",
-        "phoneNumber": f"+40 {random.randint(700, 799)} {random.randint(100, 999)} {random.randint(100, 999)}"
+        "email": f"test{rng.randint(1, 1000)}@example.com",
+        "phoneNumber": f"+40 {rng.randint(700, 799)} {rng.randint(100, 999)} {rng.randint(100, 999)}"
     }
 
+# Payloads generated once at import from a seeded generator - deterministic across runs
+_RNG = random.Random(42)
+_TODAY = datetime.now()
+_PAYLOADS = [_build_test_data(_RNG, _TODAY) for _ in range(64)]
+_counter = itertools.count()
+
+def generate_test_data():
+    """Get next pre-generated test data for transport request (a copy - safe to modify)"""
+    return dict(_PAYLOADS[next(_counter) % len(_PAYLOADS)])
+
 def create_test_file():
-    """Create a temporary test file for attachment"""
-    temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False)
+    """Create in-memory test file for attachment (spooled - small payload never touches disk)"""
+    temp_file = tempfile.SpooledTemporaryFile(max_size=65536)
     temp_file.write(f"""Test attachment file
 Created: {datetime.now().isoformat()}
 Purpose: API testing
 Content: Random test data for transport request
-""")
-    temp_file.close()
-    return temp_file.name
+""".encode())
+    temp_file.seek(0)
+    return temp_file
 
 def test_submit_without_attachment():
     """Test submit endpoint without attachment"""
     print("🧪 Testing submit WITHOUT attachment...")
     
     test_data = generate_test_data()
-    print(f"📄 Test data: {json.dumps(test_data, indent=2)}")
+    if VERBOSE:
+        print(f"📄 Test data: {json.dumps(test_data, indent=2)}")
     
     try:
         # Prepare form data
@@ -65,14 +85,17 @@ def test_submit_without_attachment():
             'data': json.dumps(test_data)
         }
         
-        response = requests.post(SUBMIT_ENDPOINT, data=form_data, timeout=30)
+        response = SESSION.post(SUBMIT_ENDPOINT, data=form_data, timeout=30)
         
         print(f"📊 Response Status: {response.status_code}")
-        print(f"📊 Response Headers: {dict(response.headers)}")
+        if VERBOSE:
+            print(f"📊 Response Headers: {dict(response.headers)}")
         
         if response.status_code == 200:
             response_json = response.json()
-            print(f"✅ SUCCESS: {json.dumps(response_json, indent=2)}")
+            print(f"✅ SUCCESS: {response_json.get('request_id')}")
+            if VERBOSE:
+                print(json.dumps(response_json, indent=2))
             return True, response_json
         else:
             print(f"❌ ERROR: {response.status_code}")
@@ -88,10 +111,11 @@ def test_submit_with_attachment():
     print("\n🧪 Testing submit WITH attachment...")
     
     test_data = generate_test_data()
-    test_file_path = create_test_file()
+    test_file = create_test_file()
     
-    print(f"📄 Test data: {json.dumps(test_data, indent=2)}")
-    print(f"📎 Test file: {test_file_path}")
+    if VERBOSE:
+        print(f"📄 Test data: {json.dumps(test_data, indent=2)}")
+    print(f"📎 Test file: test_document.txt (in memory)")
     
     try:
         # Prepare form data with file
@@ -99,20 +123,19 @@ def test_submit_with_attachment():
             'data': json.dumps(test_data)
         }
         
-        with open(test_file_path, 'rb') as f:
-            files = {'attachments': ('test_document.txt', f, 'text/plain')}
-            
-            response = requests.post(SUBMIT_ENDPOINT, data=form_data, files=files, timeout=30)
+        files = {'attachments': ('test_document.txt', test_file, 'text/plain')}
         
-        # Cleanup temp file
-        os.unlink(test_file_path)
+        response = SESSION.post(SUBMIT_ENDPOINT, data=form_data, files=files, timeout=30)
         
         print(f"📊 Response Status: {response.status_code}")
-        print(f"📊 Response Headers: {dict(response.headers)}")
+        if VERBOSE:
+            print(f"📊 Response Headers: {dict(response.headers)}")
         
         if response.status_code == 200:
             response_json = response.json()
-            print(f"✅ SUCCESS: {json.dumps(response_json, indent=2)}")
+            print(f"✅ SUCCESS: {response_json.get('request_id')}")
+            if VERBOSE:
+                print(json.dumps(response_json, indent=2))
             return True, response_json
         else:
             print(f"❌ ERROR: {response.status_code}")
@@ -121,17 +144,17 @@ def test_submit_with_attachment():
             
     except Exception as e:
         print(f"💥 EXCEPTION: {e}")
-        # Cleanup temp file on error
-        if os.path.exists(test_file_path):
-            os.unlink(test_file_path)
         return False, None
+    
+    finally:
+        test_file.close()
 
 def test_api_health():
     """Test API health endpoint"""
     print("🧪 Testing API health...")
     
     try:
-        response = requests.get(f"{API_BASE_URL}/api/health", timeout=10)
+        response = SESSION.get(f"{API_BASE_URL}/api/health", timeout=10)
         print(f"📊 Health Status: {response.status_code}")
         
         if response.status_code == 200:
@@ -158,14 +181,15 @@ def test_invalid_data():
         # Missing other required fields
     }
     
-    print(f"📄 Invalid data: {json.dumps(invalid_data, indent=2)}")
+    if VERBOSE:
+        print(f"📄 Invalid data: {json.dumps(invalid_data, indent=2)}")
     
     try:
         form_data = {
             'data': json.dumps(invalid_data)
         }
         
-        response = requests.post(SUBMIT_ENDPOINT, data=form_data, timeout=30)
+        response = SESSION.post(SUBMIT_ENDPOINT, data=form_data, timeout=30)
         
         print(f"📊 Response Status: {response.status_code}")
         
@@ -181,27 +205,57 @@ def test_invalid_data():
         print(f"💥 EXCEPTION: {e}")
         return False
 
+def _fake_response(status_code, payload):
+    """Build requests.Response without network (offline mode)"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode()
+    response.headers['Content-Type'] = 'application/json'
+    return response
+
+def _fake_get(url, **kwargs):
+    """Offline stand-in for SESSION.get (health endpoint)"""
+    return _fake_response(200, {"status": "healthy", "service": "transport-api"})
+
+def _fake_post(url, data=None, files=None, **kwargs):
+    """Offline stand-in for SESSION.post - validates like /api/submit (required fields non-empty)"""
+    form = json.loads(data['data'])
+    # Same non-empty fields as TransportRequest validator in fastapi_app.py
+    required = ("deliveryNoteNumber", "truckLicensePlates", "carrierCountry", "carrierTaxCode",
+                "carrierFullName", "borderCrossing", "email")
+    if not all(form.get(field) for field in required):
+        return _fake_response(400, {"detail": "Invalid data: missing required fields"})
+    request_id = f"REQ-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{random.randint(100, 999)}"
+    return _fake_response(200, {"success": True, "request_id": request_id,
+                                "attachment_saved": bool(files), "excel_saved": True})
+
 def main():
     """Run all tests"""
-    print("🚀 Starting Transport Request API Tests")
-    print(f"🎯 API Base URL: {API_BASE_URL}")
-    print("=" * 60)
-    
-    results = []
+    parser = argparse.ArgumentParser(description="Transport Request API tests")
+    parser.add_argument("--offline", action="store_true",
+                        help="Don't call the server - fake responses (checks script logic only, e.g. in CI)")
+    args = parser.parse_args()
     
-    # Test 1: API Health
-    results.append(("API Health", test_api_health()))
+    if args.offline:
+        SESSION.get = _fake_get
+        SESSION.post = _fake_post
     
-    # Test 2: Submit without attachment
-    success, response = test_submit_without_attachment()
-    results.append(("Submit without attachment", success))
+    print("🚀 Starting Transport Request API Tests")
+    print(f"🎯 API Base URL: {API_BASE_URL}" + (" (offline)" if args.offline else ""))
+    print("=" * 60)
     
-    # Test 3: Submit with attachment
-    success, response = test_submit_with_attachment()
-    results.append(("Submit with attachment", success))
+    tests = [
+        ("API Health", test_api_health),
+        ("Submit without attachment", lambda: test_submit_without_attachment()[0]),
+        ("Submit with attachment", lambda: test_submit_with_attachment()[0]),
+        ("Invalid data handling", test_invalid_data),
+    ]
     
-    # Test 4: Invalid data
-    results.append(("Invalid data handling", test_invalid_data()))
+    # Independent tests run concurrently over the shared session (output may interleave);
+    # results keep the order above
+    with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+        outcomes = list(executor.map(lambda test: test[1](), tests))
+    results = [(name, success) for (name, _), success in zip(tests, outcomes)]
     
     # Summary
     print("\n" + "=" * 60)
@@ -6,37 +6,50 @@ Test Docker API submit with SharePoint integration
 import requests
 import json
 import base64
+import os
 from datetime import datetime
 
 # Docker API
 API_BASE_URL = "http://localhost:8010"
 
+# Pretty-printed payloads/responses and tracebacks only with VERBOSE=1
+VERBOSE = bool(os.getenv("VERBOSE"))
+
+# Shared session - connection kept alive between calls
+SESSION = requests.Session()
+
+# Static part of test data - only delivery note number and date change per run
+TEST_DATA_TEMPLATE = {
+    "truckLicensePlates": "DOCKER-999-AA",
+    "trailerLicensePlates": "DOCKER-888-BB",
+    "carrierCountry": "Germany",
+    "carrierTaxCode": "DE1234567890",
+    "carrierFullName": "Docker Test Transport GmbH",
+    "borderCrossing": "Nădlac II",
+    "email": "docker-test@example.com",
+    "phoneNumber": "+49 123 456 789"
+}
+
 def test_submit_docker():
     """Test form submission via Docker container"""
     print("🐳 Testing Docker submit with SharePoint integration...")
     print(f"🎯 API: {API_BASE_URL}")
     
     # Test data
+    now = datetime.now()
     test_data = {
-        "deliveryNoteNumber": f"DOCKER-TEST-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
-        "truckLicensePlates": "DOCKER-999-AA",
-        "trailerLicensePlates": "DOCKER-888-BB",
-        "carrierCountry": "Germany",
-        "carrierTaxCode": "DE1234567890",
-        "carrierFullName": "Docker Test Transport GmbH",
-        "borderCrossing": "Nădlac II",
-        "borderCrossingDate": datetime.now().strftime("%Y-%m-%d"),
-        "email": "docker-test@example.com",
-        "phoneNumber": "+49 123 456 789"
+        "deliveryNoteNumber": f"DOCKER-TEST-{now.strftime('%Y%m%d-%H%M%S')}",
+        **TEST_DATA_TEMPLATE,
+        "borderCrossingDate": now.strftime("%Y-%m-%d")
     }
     
-    print(f"📄 Test data:")
-    print(json.dumps(test_data, indent=2))
+    if VERBOSE:
+        print(f"📄 Test data:")
+        print(json.dumps(test_data, indent=2))
     
     try:
-        # Encode data as Base64
-        json_string = json.dumps(test_data)
-        encoded_data = base64.b64encode(json_string.encode()).decode()
+        # Encode data as Base64 (bytes go into the form body as-is - no decode round-trip)
+        encoded_data = base64.b64encode(json.dumps(test_data).encode())
         
         form_data = {'data': encoded_data}
         
@@ -48,7 +61,7 @@ def test_submit_docker():
         }
         
         print(f"\n📤 Sending POST to {API_BASE_URL}/api/submit...")
-        response = requests.post(
+        response = SESSION.post(
             f"{API_BASE_URL}/api/submit",
             data=form_data,
             headers=headers,
@@ -60,7 +73,8 @@ def test_submit_docker():
         if response.status_code == 200:
             response_json = response.json()
             print(f"✅ SUCCESS!")
-            print(json.dumps(response_json, indent=2))
+            if VERBOSE:
+                print(json.dumps(response_json, indent=2))
             
             request_id = response_json.get('request_id')
             excel_saved = response_json.get('excel_saved')
@@ -82,8 +96,9 @@ def test_submit_docker():
             
     except Exception as e:
         print(f"💥 EXCEPTION: {e}")
-        import traceback
-        traceback.print_exc()
+        if VERBOSE:
+            import traceback
+            traceback.print_exc()
         return False, None
 
 if __name__ == "__main__":
@@ -0,0 +1,135 @@
+"""
+Test ExcelBatchWriter - łączenie wierszy Excel w jeden zapis (bez sieci)
+"""
+
+import os
+import sys
+import time
+
+import pytest
+import requests
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+from utils.helpers.excel_helper import ExcelBatchWriter
+
+
+def _http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.HTTPError(f"{status_code} Client Error", response=response)
+
+
+class FakeWriter:
+    """write_rows_func recording written batches; rejects batches above max_rows with 413"""
+
+    def __init__(self, max_rows=None, error=None, delay=0):
+        self.max_rows = max_rows
+        self.error = error
+        self.delay = delay
+        self.batches = []
+        self.calls = 0
+
+    def __call__(self, rows):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.max_rows is not None and len(rows) > self.max_rows:
+            raise _http_error(413)
+        if self.error is not None:
+            raise self.error
+        self.batches.append([row[0] for row in rows])
+
+
+@pytest.fixture
+def make_writer():
+    writers = []
+
+    def create(write_rows, **kwargs):
+        writer = ExcelBatchWriter(write_rows, **kwargs)
+        writers.append(writer)
+        return writer
+
+    yield create
+    for writer in writers:
+        writer.close(timeout=1)
+
+
+def _submit(writer, request_ids):
+    return [writer.submit([request_id]) for request_id in request_ids]
+
+
+def test_rows_within_window_written_together(make_writer):
+    write = FakeWriter()
+    writer = make_writer(write, max_batch=20, flush_interval=0.5)
+
+    futures = _submit(writer, ['REQ-1', 'REQ-2', 'REQ-3'])
+
+    assert [future.result(5) for future in futures] == [True] * 3
+    assert write.batches == [['REQ-1', 'REQ-2', 'REQ-3']]
+
+
+def test_batch_limited_to_max_batch(make_writer):
+    write = FakeWriter()
+    # Long window - full batches are written without waiting for it
+    writer = make_writer(write, max_batch=2, flush_interval=5)
+
+    futures = _submit(writer, ['REQ-1', 'REQ-2', 'REQ-3', 'REQ-4'])
+
+    assert [future.result(5) for future in futures] == [True] * 4
+    assert write.batches == [['REQ-1', 'REQ-2'], ['REQ-3', 'REQ-4']]
+
+
+def test_rejected_batch_split_in_halves(make_writer):
+    write = FakeWriter(max_rows=2)
+    writer = make_writer(write, max_batch=5, flush_interval=0.5)
+
+    futures = _submit(writer, [f'REQ-{i}' for i in range(5)])
+
+    assert [future.result(5) for future in futures] == [True] * 5
+    # 5 -> 413, 2 ok, 3 -> 413, 1 ok, 2 ok
+    assert write.batches == [['REQ-0', 'REQ-1'], ['REQ-2'], ['REQ-3', 'REQ-4']]
+    assert write.calls == 5
+
+
+def test_rows_rejected_alone_fail_with_write_error(make_writer):
+    write = FakeWriter(max_rows=0)
+    writer = make_writer(write, max_batch=2, flush_interval=0.5)
+
+    futures = _submit(writer, ['REQ-1', 'REQ-2'])
+
+    for future in futures:
+        with pytest.raises(requests.HTTPError) as exc_info:
+            future.result(5)
+        assert exc_info.value.response.status_code == 413
+    assert write.calls == 3  # Batch of 2, then each half alone
+
+
+def test_write_error_delivered_to_every_caller_in_batch(make_writer):
+    error = _http_error(500)
+    write = FakeWriter(error=error)
+    writer = make_writer(write, max_batch=3, flush_interval=0.5)
+
+    futures = _submit(writer, ['REQ-1', 'REQ-2', 'REQ-3'])
+
+    assert [future.exception(5) for future in futures] == [error] * 3
+    assert write.calls == 1  # Not a request-size error - no splitting
+
+
+def test_submit_after_close_fails(make_writer):
+    writer = make_writer(FakeWriter())
+    writer.close(timeout=1)
+
+    future = writer.submit(['REQ-1'])
+
+    assert isinstance(future.exception(0), RuntimeError)
+
+
+def test_close_waits_for_queued_rows(make_writer):
+    write = FakeWriter(delay=0.1)
+    writer = make_writer(write, max_batch=2, flush_interval=0.05)
+    futures = _submit(writer, [f'REQ-{i}' for i in range(5)])
+
+    writer.close(timeout=5)
+
+    assert all(future.done() for future in futures)
+    assert sum(write.batches, []) == [f'REQ-{i}' for i in range(5)]
@@ -5,32 +5,63 @@ Run tests with:
     pytest test_fastapi_app.py -v
 """
 
+import asyncio
+import io
 import pytest
 import json
-import tempfile
+import re
 import os
-from pathlib import Path
-from unittest.mock import patch, mock_open, MagicMock
+from types import SimpleNamespace
+from unittest.mock import patch, mock_open, MagicMock, AsyncMock
+import httpx
 from fastapi.testclient import TestClient
 from io import BytesIO
 
 # Import the FastAPI app and utils
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
-from fastapi_app import app, load_config, TransportRequest
-from utils.excel_handler import save_to_excel
-from utils.email_handler import parse_email_list
+from fastapi_app import app, load_config, TransportRequest, transport_handler
+from utils.helpers.excel_helper import ExcelHelper
 
 
-@pytest.fixture
+class ZeroStream(io.RawIOBase):
+    """Read-only stream of `size` zero bytes, produced chunk by chunk on read"""
+    
+    def __init__(self, size: int):
+        self._size = size
+        self._pos = 0
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def tell(self):
+        return self._pos
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}[whence]
+        self._pos = min(max(base + offset, 0), self._size)
+        return self._pos
+    
+    def readinto(self, buffer):
+        n = min(len(buffer), self._size - self._pos)
+        buffer[:n] = bytes(n)
+        self._pos += n
+        return n
+
+
+@pytest.fixture(scope="session")
 def client():
-    """Create a test client for the FastAPI app"""
+    """Create a test client for the FastAPI app (one per session)"""
+    # Not entered as context manager - startup would start the background scheduler
     return TestClient(app)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_form_data():
-    """Sample valid form data for testing"""
+    """Sample valid form data for testing (built once per session - tests only read it)"""
     return {
         "deliveryNoteNumber": "DN123456",
         "truckLicensePlates": "AB123CD",
@@ -45,6 +76,34 @@ def sample_form_data():
     }
 
 
+@pytest.fixture(scope="session")
+def sample_form_json(sample_form_data):
+    """sample_form_data encoded once - the 'data' form field of submit requests"""
+    return json.dumps(sample_form_data)
+
+
+# Request ID format: REQ-YYYYMMDD-HHMMSS-XXX (XXX = random number)
+REQUEST_ID_RE = re.compile(r'REQ-\d{8}-\d{6}-\d{3}')
+
+# JSON backup index returned by the mocked save_initial_record()
+MOCK_JSON_INDEX = 0
+
+
+@pytest.fixture
+def patched_io():
+    """Patch JSON backup save and background processing once per test (common to submit tests)"""
+    with patch.object(transport_handler.json_helper, 'save_initial_record', return_value=MOCK_JSON_INDEX) as save, \
+         patch.object(transport_handler, 'process_submission', new_callable=AsyncMock) as process:
+        yield SimpleNamespace(save=save, process=process)
+
+
+@pytest.fixture
+def excel_helper():
+    """ExcelHelper with SharePoint disabled (JSON backup only, no network)"""
+    return ExcelHelper(config={}, transport_config={'sharepoint': {'enabled': False}},
+                       get_access_token_func=MagicMock())
+
+
 @pytest.fixture
 def sample_file():
     """Create a sample file for testing uploads"""
@@ -108,15 +167,9 @@ class TestTransportRequestModel:
 class TestConfigurationLoading:
     """Test configuration loading from YAML"""
     
-    @patch("builtins.open", mock_open(read_data="""
-default:
-  transport:
-    local_attachments_folder: "./test_attachments"
-    local_excel_file: "./test_data/requests.xlsx"
-"""))
     @patch("yaml.safe_load")
     def test_load_config(self, mock_yaml_load):
-        """Test configuration loading"""
+        """Test configuration loading (file read as-is, YAML parse mocked)"""
         mock_yaml_load.return_value = {
             "default": {
                 "transport": {
@@ -131,57 +184,47 @@ default:
         assert "transport" in config["default"]
 
 
+@pytest.mark.usefixtures("patched_io")
 class TestSubmitEndpoint:
     """Test the main submit endpoint"""
     
-    def test_submit_valid_request_no_file(self, client, sample_form_data):
+    def test_submit_valid_request_no_file(self, client, sample_form_json, patched_io):
         """Test submitting valid request without file"""
-        mock_excel_result = {
-            'local_saved': True,
-            'sharepoint_saved': False,
-            'sharepoint_error': None,
-            'local_error': None
-        }
-        with patch('fastapi_app.save_to_excel', return_value=mock_excel_result):
-            response = client.post(
-                "/api/submit",
-                data={"data": json.dumps(sample_form_data)}
-            )
+        response = client.post(
+            "/api/submit",
+            data={"data": sample_form_json}
+        )
         
         assert response.status_code == 200
         data = response.json()
         assert data["success"] is True
         assert "request_id" in data
         assert data["request_id"].startswith("REQ-")
-        assert data["attachment_saved"] is False
-        assert data["excel_saved"] is True
+        assert data["attachments_count"] == 0
+        assert data["processing_status"] == "background"
+        patched_io.save.assert_called_once_with(
+            request_id=data["request_id"], data_dict=json.loads(sample_form_json), has_attachments=False
+        )
     
-    def test_submit_valid_request_with_file(self, client, sample_form_data):
+    def test_submit_valid_request_with_file(self, client, sample_form_json, patched_io):
         """Test submitting valid request with file attachment"""
         file_content = b"Test PDF content"
-        mock_excel_result = {
-            'local_saved': True,
-            'sharepoint_saved': False,
-            'sharepoint_error': None,
-            'local_error': None
-        }
         
-        with patch('fastapi_app.save_to_excel', return_value=mock_excel_result), \
-             patch('builtins.open', mock_open()) as mock_file, \
-             patch('os.makedirs'), \
-             patch('pathlib.Path.mkdir'):
-            
-            response = client.post(
-                "/api/submit",
-                data={"data": json.dumps(sample_form_data)},
-                files={"attachment": ("test.pdf", BytesIO(file_content), "application/pdf")}
-            )
+        response = client.post(
+            "/api/submit",
+            data={"data": sample_form_json},
+            files={"attachments": ("test.pdf", BytesIO(file_content), "application/pdf")}
+        )
         
         assert response.status_code == 200
         data = response.json()
         assert data["success"] is True
-        assert data["attachment_saved"] is True
-        mock_file.assert_called()
+        assert data["attachments_count"] == 1
+        # Attachment content handed to background processing (read into memory, not saved by endpoint)
+        patched_io.process.assert_awaited_once()
+        kwargs = patched_io.process.await_args.kwargs
+        assert kwargs["json_index"] == MOCK_JSON_INDEX
+        assert kwargs["attachments_data"] == [{'filename': 'test.pdf', 'content': file_content, 'index': 0}]
     
     def test_submit_invalid_json(self, client):
         """Test submitting invalid JSON data"""
@@ -217,6 +260,7 @@ class TestSubmitEndpoint:
         assert response.status_code == 422  # Unprocessable Entity
 
 
+@pytest.mark.usefixtures("patched_io")
 class TestFileHandling:
     """Test file upload and storage functionality"""
     
@@ -228,144 +272,100 @@ class TestFileHandling:
         # File handling logic is integrated into the main endpoint
         pass
     
-    def test_file_extension_handling(self, client, sample_form_data):
+    def test_file_extension_handling(self, client, sample_form_json, patched_io):
         """Test proper file extension handling"""
-        mock_excel_result = {
-            'local_saved': True,
-            'sharepoint_saved': False,
-            'sharepoint_error': None,
-            'local_error': None
-        }
-        with patch('fastapi_app.save_to_excel', return_value=mock_excel_result), \
-             patch('builtins.open', mock_open()) as mock_file, \
-             patch('os.makedirs'), \
-             patch('pathlib.Path.mkdir'):
-            
-            # Test PDF file
-            response = client.post(
-                "/api/submit",
-                data={"data": json.dumps(sample_form_data)},
-                files={"attachment": ("document.pdf", BytesIO(b"content"), "application/pdf")}
-            )
-            
-            assert response.status_code == 200
-            # Verify file was saved with correct extension
-            mock_file.assert_called()
+        # Test PDF file
+        response = client.post(
+            "/api/submit",
+            data={"data": sample_form_json},
+            files={"attachments": ("document.pdf", BytesIO(b"content"), "application/pdf")}
+        )
+        
+        assert response.status_code == 200
+        # Verify file is passed on with its original name (extension kept)
+        attachments_data = patched_io.process.await_args.kwargs["attachments_data"]
+        assert [a['filename'] for a in attachments_data] == ["document.pdf"]
 
 
 class TestDataPersistence:
-    """Test data saving to JSON/Excel"""
+    """Test data saving to Excel/SharePoint (ExcelHelper)"""
     
-    @patch('builtins.open', mock_open())
-    @patch('json.load', return_value=[])
-    @patch('json.dump')
-    @patch('pathlib.Path.exists', return_value=False)
-    @patch('pathlib.Path.mkdir')
-    def test_save_to_excel_new_file(self, mock_mkdir, mock_exists, mock_json_dump, mock_json_load):
-        """Test saving data to new Excel/JSON file"""
-        request_id = "REQ-20251021-123456-789"
-        data = {
-            "deliveryNoteNumber": "DN123",
-            "carrierFullName": "Test Company",
-            "email": "test@example.com",
-            "phoneNumber": "+48 123 456 789"
-        }
-        
-        result = save_to_excel(request_id, data, True)
+    REQUEST_ID = "REQ-20251021-123456-789"
+    DATA = {
+        "deliveryNoteNumber": "DN123",
+        "carrierFullName": "Test Company",
+        "email": "test@example.com",
+        "phoneNumber": "+48 123 456 789"
+    }
+    
+    def test_save_to_excel_sharepoint_disabled(self, excel_helper):
+        """Test saving with SharePoint disabled (JSON backup only)"""
+        result = excel_helper.save_to_excel(self.REQUEST_ID, self.DATA, True, json_index=3)
         
-        # save_to_excel() returns dict with keys: local_saved, sharepoint_saved, sharepoint_error, local_error
-        assert isinstance(result, dict)
-        assert 'local_saved' in result
-        assert 'sharepoint_saved' in result
-        # In test environment, SharePoint will be mocked via SHAREPOINT_ACCESS_TOKEN
-        mock_json_dump.assert_called_once()
+        # save_to_excel() returns dict with keys: local_saved, sharepoint_saved, sharepoint_error, local_error, json_index
+        assert result['local_saved'] is True
+        assert result['sharepoint_saved'] is False
+        assert result['sharepoint_error'] is None
+        assert result['json_index'] == 3
     
-    @patch('builtins.open', mock_open())
-    @patch('json.load', return_value=[{"Request_ID": "REQ-OLD"}])
-    @patch('json.dump')
-    @patch('pathlib.Path.exists', return_value=True)
-    def test_save_to_excel_existing_file(self, mock_exists, mock_json_dump, mock_json_load):
-        """Test appending data to existing Excel/JSON file"""
-        request_id = "REQ-20251021-123456-789"
-        data = {
-            "deliveryNoteNumber": "DN123",
-            "carrierFullName": "Test Company",
-            "email": "test@example.com",
-            "phoneNumber": "+48 123 456 789"
-        }
+    def test_save_to_excel_updates_sync_status(self, excel_helper):
+        """Test successful SharePoint save marks JSON backup record as synced"""
+        excel_helper._sp_save = MagicMock()
+        update_sync = MagicMock()
         
-        result = save_to_excel(request_id, data, False)
+        result = excel_helper.save_to_excel(self.REQUEST_ID, self.DATA, False, json_index=5,
+                                            update_json_sync_status_func=update_sync)
         
-        # save_to_excel() returns dict, not bool
-        assert isinstance(result, dict)
-        assert 'local_saved' in result
-        assert 'sharepoint_saved' in result
-        # Verify that existing data was loaded and new data appended
-        mock_json_load.assert_called_once()
-        mock_json_dump.assert_called_once()
+        assert result['sharepoint_saved'] is True
+        # Row values passed in Excel column order, Request_ID first
+        request_id, row_data, row_values = excel_helper._sp_save.call_args.args
+        assert request_id == self.REQUEST_ID
+        assert row_values[0] == self.REQUEST_ID
+        update_sync.assert_called_once_with(self.REQUEST_ID, 5, synced=True)
     
-    @patch('builtins.open', side_effect=OSError("Permission denied"))
-    def test_save_to_excel_error_handling(self, mock_open_error):
+    def test_save_to_excel_error_handling(self, excel_helper):
         """Test error handling in save_to_excel"""
-        request_id = "REQ-20251021-123456-789"
-        data = {"deliveryNoteNumber": "DN123"}
+        excel_helper._sp_save = MagicMock(side_effect=OSError("Permission denied"))
+        update_sync = MagicMock()
         
-        result = save_to_excel(request_id, data, False)
+        result = excel_helper.save_to_excel(self.REQUEST_ID, {"deliveryNoteNumber": "DN123"}, False,
+                                            json_index=0, update_json_sync_status_func=update_sync)
         
         # Even on error, save_to_excel() returns dict with error information
-        assert isinstance(result, dict)
-        assert 'local_saved' in result
-        assert 'local_error' in result or 'sharepoint_error' in result
-        # At least one operation should have failed
-        assert result['local_saved'] == False or result.get('local_error') is not None
+        assert result['sharepoint_saved'] is False
+        assert result['sharepoint_error'] == "Permission denied"
+        # Record stays unsynced in JSON backup (picked up by background sync)
+        update_sync.assert_not_called()
 
 
+@pytest.mark.usefixtures("patched_io")
+@pytest.mark.xdist_group("id_tests")
 class TestRequestIDGeneration:
     """Test Request ID generation functionality"""
     
-    def test_request_id_format(self, client, sample_form_data):
+    def test_request_id_format(self, client, sample_form_json):
         """Test that request IDs follow the correct format"""
-        mock_excel_result = {
-            'local_saved': True,
-            'sharepoint_saved': False,
-            'sharepoint_error': None,
-            'local_error': None
-        }
-        with patch('fastapi_app.save_to_excel', return_value=mock_excel_result):
-            response = client.post(
-                "/api/submit",
-                data={"data": json.dumps(sample_form_data)}
-            )
+        response = client.post(
+            "/api/submit",
+            data={"data": sample_form_json}
+        )
         
         data = response.json()
         request_id = data["request_id"]
         
-        # Format: REQ-YYYYMMDD-HHMMSS-XXX
-        assert request_id.startswith("REQ-")
-        parts = request_id.split("-")
-        assert len(parts) == 4
-        assert len(parts[1]) == 8  # YYYYMMDD
-        assert len(parts[2]) == 6  # HHMMSS
-        assert len(parts[3]) == 3  # XXX (random number)
+        assert REQUEST_ID_RE.fullmatch(request_id) is not None
     
-    def test_request_id_uniqueness(self, client, sample_form_data):
-        """Test that multiple requests generate unique IDs"""
-        request_ids = []
-        mock_excel_result = {
-            'local_saved': True,
-            'sharepoint_saved': False,
-            'sharepoint_error': None,
-            'local_error': None
-        }
+    @pytest.mark.asyncio
+    async def test_request_id_uniqueness(self, sample_form_json):
+        """Test that multiple concurrent requests generate unique IDs"""
+        payload = {"data": sample_form_json}
+        
+        # Requests overlap on one event loop instead of running one after another
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+            responses = await asyncio.gather(*[ac.post("/api/submit", data=payload) for _ in range(5)])
         
-        with patch('fastapi_app.save_to_excel', return_value=mock_excel_result):
-            for _ in range(5):
-                response = client.post(
-                    "/api/submit",
-                    data={"data": json.dumps(sample_form_data)}
-                )
-                data = response.json()
-                request_ids.append(data["request_id"])
+        request_ids = [response.json()["request_id"] for response in responses]
+        assert all(REQUEST_ID_RE.fullmatch(request_id) for request_id in request_ids)
         
         # All IDs should be unique
         assert len(set(request_ids)) == len(request_ids)
@@ -379,15 +379,14 @@ class TestErrorHandling:
         response = client.post("/api/submit", data={"invalid": "data"})
         assert response.status_code == 422
     
-    def test_oversized_file(self, client, sample_form_data):
+    def test_oversized_file(self, client, sample_form_json):
         """Test handling of oversized files"""
         # Create a large file (this test would need actual size limits implemented)
-        large_content = b"x" * (100 * 1024 * 1024)  # 100MB
-        
+        # 100MB generated while the client reads it - nothing allocated up front, no disk writes
         response = client.post(
             "/api/submit",
-            data={"data": json.dumps(sample_form_data)},
-            files={"attachment": ("large.pdf", BytesIO(large_content), "application/pdf")}
+            data={"data": sample_form_json},
+            files={"attachments": ("large.pdf", ZeroStream(100 * 1024 * 1024), "application/pdf")}
         )
         
         # This would depend on actual file size validation implementation
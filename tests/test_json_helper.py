@@ -0,0 +1,195 @@
+"""
+Test JSONHelper - backup JSON Lines (zapis, aktualizacje w miejscu, odtwarzanie, konwersja, kompaktowanie)
+"""
+
+import json
+
+import pytest
+
+from utils.helpers import json_helper
+from utils.helpers.json_helper import JSONHelper
+
+FORM_DATA = {'deliveryNoteNumber': 'DN-1', 'carrierFullName': 'Test Transport', 'email': 'a@b.c'}
+
+
+@pytest.fixture
+def backup_path(tmp_path):
+    return tmp_path / 'backup.json'
+
+
+@pytest.fixture
+def make_helper(backup_path):
+    """JSONHelper instances over one backup file (new instance = application restart)"""
+    helpers = []
+
+    def create():
+        helper = JSONHelper({'paths': {'json_backup_file': str(backup_path)}})
+        helpers.append(helper)
+        return helper
+
+    yield create
+    for helper in helpers:
+        helper.close()
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_bytes().splitlines()]
+
+
+def test_save_and_load_round_trip(make_helper):
+    helper = make_helper()
+    assert helper.save_initial_record('REQ-1', FORM_DATA) == 0
+    assert helper.save_initial_record('REQ-2', FORM_DATA, has_attachments=True) == 1
+
+    records = make_helper().load_records()
+
+    assert records == helper.load_records()
+    assert [r['Request_ID'] for r in records] == ['REQ-1', 'REQ-2']
+    assert records[0]['Delivery_Note_Number'] == 'DN-1'
+    assert records[1]['Attachment_Status'] == 'Processing'
+    assert all(r['SharePoint_Synced'] is False for r in records)
+
+
+def test_sync_flag_patched_in_place(make_helper, backup_path):
+    helper = make_helper()
+    helper.save_initial_record('REQ-1', FORM_DATA)
+    size = backup_path.stat().st_size
+
+    helper.update_sync_status('REQ-1', 0, synced=True)
+
+    # Flag overwritten in the record line - nothing appended, line still valid JSON
+    assert backup_path.stat().st_size == size
+    assert read_lines(backup_path) == [helper.load_records()[0]]
+    assert make_helper().load_records()[0]['SharePoint_Synced'] is True
+
+
+def test_updates_replayed_after_reopen(make_helper, backup_path):
+    helper = make_helper()
+    helper.save_initial_record('REQ-1', FORM_DATA, has_attachments=True)
+    helper.save_initial_record('REQ-2', FORM_DATA)
+    helper.update_attachment_status('REQ-1', 0, ['a.pdf'], [])
+    helper.update_sync_status('REQ-1', 0, synced=True)
+    helper.update_sync_status('REQ-2', 1, synced=False)
+
+    assert len(read_lines(backup_path)) == 4  # 2 records + 2 update lines (synced=True patched in place)
+    reopened = make_helper()
+    records = reopened.load_records()
+
+    assert records == helper.load_records()
+    assert records[0]['Attachment_Status'] == 'Saved'
+    assert records[0]['SharePoint_Synced'] is True
+    assert reopened.unsynced_records() == (2, [(1, records[1])])
+
+
+@pytest.mark.parametrize("use_ijson", [False, True], ids=["stdlib", "ijson"])
+def test_legacy_array_converted_to_json_lines(make_helper, backup_path, monkeypatch, use_ijson):
+    if use_ijson:
+        pytest.importorskip('ijson')
+    else:
+        monkeypatch.setattr(json_helper, 'ijson', None)
+    legacy = [
+        {'Request_ID': 'REQ-1', 'Delivery_Note_Number': 'DN-1', 'SharePoint_Synced': True},
+        {'Request_ID': 'REQ-2', 'Delivery_Note_Number': 'DN-2', 'SharePoint_Synced': False},
+    ]
+    backup_path.write_text(json.dumps(legacy, indent=2), encoding='utf-8')
+
+    helper = make_helper()
+
+    assert helper.load_records() == legacy
+    assert read_lines(backup_path) == legacy
+    # Converted file keeps working: in-place flag patch on a converted record
+    helper.update_sync_status('REQ-2', 1, synced=True)
+    assert make_helper().load_records()[1]['SharePoint_Synced'] is True
+
+
+def test_delete_records_compacts_file(make_helper, backup_path):
+    helper = make_helper()
+    for i in range(3):
+        helper.save_initial_record(f'REQ-{i}', FORM_DATA)
+    helper.update_attachment_status('REQ-2', 2, [], ['too big'])
+    changes = helper.change_count
+
+    assert helper.delete_records(['REQ-0', 'REQ-missing']) == (1, 2)
+
+    assert helper.change_count > changes
+    lines = read_lines(backup_path)
+    assert [line['Request_ID'] for line in lines] == ['REQ-1', 'REQ-2']
+    assert not any(json_helper.UPDATE_KEY in line for line in lines)
+    assert lines[1]['Attachment_Status'] == 'Failed'
+    assert make_helper().load_records() == helper.load_records() == lines
+    # Request_ID index rebuilt - updates by stale index still find the record
+    helper.update_sync_status('REQ-2', 2, synced=True)
+    assert make_helper().load_records()[1]['SharePoint_Synced'] is True
+
+
+def test_torn_trailing_line_skipped(make_helper, backup_path):
+    helper = make_helper()
+    helper.save_initial_record('REQ-1', FORM_DATA)
+    helper.close()
+    with open(backup_path, 'ab') as f:
+        f.write(b'{"Request_ID":"REQ-2","Delivery_No')  # crash mid-write
+
+    records = make_helper().load_records()
+
+    assert [r['Request_ID'] for r in records] == ['REQ-1']
+
+
+def test_update_lines_compacted_after_threshold(make_helper, backup_path):
+    helper = make_helper()
+    helper.save_initial_record('REQ-1', FORM_DATA, has_attachments=True)
+    helper.save_initial_record('REQ-2', FORM_DATA)
+    for i in range(json_helper.COMPACT_AFTER_UPDATES + 1):
+        helper.update_attachment_status('REQ-1', 0, [f'{i}.pdf'], [])
+    helper.update_sync_status('REQ-2', 1, synced=True)
+    lines = read_lines(backup_path)
+    assert len(lines) == 2 + json_helper.COMPACT_AFTER_UPDATES + 1
+    # Expected state: update lines folded into record lines by hand
+    expected = [line for line in lines if json_helper.UPDATE_KEY not in line]
+    for line in lines[2:]:
+        expected[line.pop(json_helper.UPDATE_KEY)].update(line)
+
+    records = helper.load_records()
+
+    # Rewritten as record lines only, content unchanged
+    assert records == expected
+    assert read_lines(backup_path) == expected
+    assert make_helper().load_records() == expected
+    # Sync flags tracked again after the rewrite (patched in place, nothing appended)
+    size = backup_path.stat().st_size
+    helper.update_sync_status('REQ-1', 0, synced=True)
+    assert backup_path.stat().st_size == size
+
+
+def test_file_replaced_on_disk_reloaded(make_helper, backup_path, tmp_path):
+    helper = make_helper()
+    helper.save_initial_record('REQ-A', FORM_DATA)
+    changes = helper.change_count
+    # Backup restored from outside (docker cp): new file swapped in under the open handles
+    restored = tmp_path / 'restored.json'
+    restored.write_bytes(b''.join(json.dumps({'Request_ID': rid, 'SharePoint_Synced': True}).encode() + b'\n'
+                                  for rid in ('OLD-1', 'OLD-2')))
+    restored.replace(backup_path)
+
+    assert helper.change_count > changes
+    helper.save_initial_record('REQ-B', FORM_DATA)
+
+    expected = ['OLD-1', 'OLD-2', 'REQ-B']
+    assert [r['Request_ID'] for r in helper.load_records()] == expected
+    assert [line['Request_ID'] for line in read_lines(backup_path)] == expected
+    # Compaction (delete / shutdown) rewrites from up-to-date memory - restored records kept
+    assert helper.delete_records(['REQ-B']) == (1, 2)
+    assert [r['Request_ID'] for r in make_helper().load_records()] == ['OLD-1', 'OLD-2']
+
+
+def test_file_changed_in_place_reloaded(make_helper, backup_path):
+    helper = make_helper()
+    helper.save_initial_record('REQ-A', FORM_DATA)
+    with open(backup_path, 'ab') as f:
+        f.write(json.dumps({'Request_ID': 'EXT-1', 'SharePoint_Synced': False}).encode() + b'\n')
+
+    helper.compact()
+    helper.save_initial_record('REQ-B', FORM_DATA)
+
+    expected = ['REQ-A', 'EXT-1', 'REQ-B']
+    assert [r['Request_ID'] for r in helper.load_records()] == expected
+    assert [r['Request_ID'] for r in make_helper().load_records()] == expected
@@ -35,8 +35,7 @@ def test_submit_with_sharepoint():
     
     try:
         # Encode data as Base64 (matching frontend behavior)
-        json_string = json.dumps(test_data)
-        encoded_data = base64.b64encode(json_string.encode()).decode()
+        encoded_data = base64.b64encode(json.dumps(test_data, separators=(",", ":")).encode()).decode()
         
         print(f"\n🔐 Base64 encoded data: {encoded_data[:50]}...")
         
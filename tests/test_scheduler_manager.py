@@ -0,0 +1,136 @@
+"""
+Test SchedulerManager - synchronizacja JSON backup → SharePoint Excel (bez sieci)
+"""
+
+import os
+import sys
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from openpyxl import Workbook
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+from utils.helpers.json_helper import JSONHelper
+from utils.scheduler_manager import SchedulerManager
+
+
+def _excel_bytes(request_ids):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['Request_ID'])
+    for request_id in request_ids:
+        ws.append([request_id])
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def json_helper(tmp_path):
+    helper = JSONHelper({'paths': {'json_backup_file': str(tmp_path / 'backup.json')}})
+    yield helper
+    helper.close()
+
+
+def _scheduler(json_helper, **sharepoint):
+    transport_config = {'sharepoint': {
+        'enabled': True,
+        'folder_url': 'https://example.sharepoint.com/sites/x/Shared Documents/T',
+        'excel_file_name': 'requests.xlsx',
+        **sharepoint
+    }}
+    return SchedulerManager({}, transport_config, lambda: 'token', json_helper=json_helper)
+
+
+def test_sync_writes_missing_rows_in_chunks(json_helper):
+    for i in range(5):
+        json_helper.save_initial_record(f'REQ-{i}', {'email': f'{i}@x.pl'})
+
+    sp = MagicMock()
+    sp.get_excel_column_values.return_value = ['Request_ID', 'REQ-0']
+    with patch('utils.scheduler_manager.SharePointHelper', return_value=sp):
+        _scheduler(json_helper, excel_batch_max_rows=3).sync_json_to_sharepoint()
+
+    # REQ-0 already in Excel - remaining 4 rows written as 3 + 1
+    chunks = [c.kwargs['rows'] for c in sp.add_excel_rows.call_args_list]
+    assert [[row[0] for row in rows] for rows in chunks] == [['REQ-1', 'REQ-2', 'REQ-3'], ['REQ-4']]
+    assert json_helper.unsynced_records() == (5, [])
+
+
+def test_sync_failed_chunk_stays_unsynced(json_helper):
+    for i in range(4):
+        json_helper.save_initial_record(f'REQ-{i}', {})
+
+    sp = MagicMock()
+    sp.get_excel_column_values.return_value = ['Request_ID']
+    sp.add_excel_rows.side_effect = [None] + [Exception('503 Service Unavailable')] * 3
+    with patch('utils.scheduler_manager.SharePointHelper', return_value=sp):
+        _scheduler(json_helper, excel_batch_max_rows=2).sync_json_to_sharepoint()
+
+    _, unsynced = json_helper.unsynced_records()
+    assert [record['Request_ID'] for _, record in unsynced] == ['REQ-2', 'REQ-3']
+
+
+def test_sync_failed_chunk_falls_back_to_single_rows(json_helper):
+    for i in range(3):
+        json_helper.save_initial_record(f'REQ-{i}', {})
+
+    def add_rows(rows, **kwargs):
+        if any(row[0] == 'REQ-1' for row in rows):
+            raise Exception('400 Bad Request')
+
+    sp = MagicMock()
+    sp.get_excel_column_values.return_value = ['Request_ID']
+    sp.add_excel_rows.side_effect = add_rows
+    with patch('utils.scheduler_manager.SharePointHelper', return_value=sp):
+        _scheduler(json_helper).sync_json_to_sharepoint()
+
+    # Batch of 3 failed, then REQ-0 and REQ-2 written alone
+    assert sp.add_excel_rows.call_count == 4
+    _, unsynced = json_helper.unsynced_records()
+    assert [record['Request_ID'] for _, record in unsynced] == ['REQ-1']
+
+
+def test_sync_traditional_reads_ids_from_download(json_helper):
+    for i in range(3):
+        json_helper.save_initial_record(f'REQ-{i}', {})
+
+    sp = MagicMock()
+    sp.download_bytes.return_value = _excel_bytes(['REQ-0', ' REQ-1 '])
+    with patch('utils.scheduler_manager.SharePointHelper', return_value=sp):
+        _scheduler(json_helper, use_excel_api=False).sync_json_to_sharepoint()
+
+    sp.get_excel_column_values.assert_not_called()
+    assert sp.upload_bytes.call_count == 1
+    assert json_helper.unsynced_records() == (3, [])
+
+
+def test_cleanup_deletes_all_old_files(json_helper):
+    sp = MagicMock()
+    sp.get_files_older_than.return_value = [{'id': str(i), 'name': f'f{i}.pdf'} for i in range(20)]
+    sp.delete_file.side_effect = lambda item: item['id'] != '7'
+    with patch('utils.scheduler_manager.SharePointHelper', return_value=sp):
+        _scheduler(json_helper).cleanup_old_attachments()
+
+    assert sorted(c.args[0]['id'] for c in sp.delete_file.call_args_list) == sorted(str(i) for i in range(20))
+
+
+def test_sync_skips_scan_until_backup_changes(json_helper):
+    json_helper.save_initial_record('REQ-0', {})
+    json_helper.update_sync_status('REQ-0', 0, True)
+    scheduler = _scheduler(json_helper)
+
+    with patch.object(json_helper, 'unsynced_records', wraps=json_helper.unsynced_records) as scan:
+        scheduler.sync_json_to_sharepoint()
+        scheduler.sync_json_to_sharepoint()
+        assert scan.call_count == 1
+
+        json_helper.save_initial_record('REQ-1', {})
+        sp = MagicMock()
+        sp.get_excel_column_values.return_value = ['Request_ID', 'REQ-0']
+        with patch('utils.scheduler_manager.SharePointHelper', return_value=sp):
+            scheduler.sync_json_to_sharepoint()
+        assert scan.call_count == 2
+        assert sp.add_excel_rows.call_count == 1
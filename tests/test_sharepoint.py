@@ -1,6 +1,10 @@
 """
 Test script dla SharePoint Helper
-Sprawdza połączenie i podstawowe operacje
+Sprawdza połączenie i podstawowe operacje (połączenie, folder i plik Excel jako fixtures sesji)
+
+Uruchom:
+    SHAREPOINT_ACCESS_TOKEN=... pytest test_sharepoint.py -v -s
+    SHAREPOINT_ALLOW_WRITE=1 włącza test 6 (modyfikuje plik w SharePoint)
 """
 
 import pytest
@@ -11,8 +15,6 @@ from unittest.mock import Mock, patch
 # Add backend to path
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
 from sharepoint_helper import SharePointHelper
-from pathlib import Path
-import os
 
 # Wczytaj zmienne z pliku .env (jeśli istnieje)
 try:
@@ -32,134 +34,142 @@ SHAREPOINT_FOLDER_URL = "https://yourcompany.sharepoint.com/sites/transport-test
 # Nazwa pliku Excel
 EXCEL_FILE_NAME = "transport_requests.xlsx"
 
+# Liczba testowych wierszy dopisywanych w teście 6 (jeden save + jeden upload dla całej paczki)
+TEST_ROWS_COUNT = 10
+
+
+def _section(title):
+    """Nagłówek sekcji testu jako lista linii (wypisywana jednym print na koniec testu)"""
+    return ["\n" + "="*60, title, "="*60]
+
+
+@pytest.fixture(scope="session")
+def sp():
+    """Jeden SharePointHelper (token + sesja HTTP) na całą sesję testów"""
+    if ACCESS_TOKEN == 'WKLEJ_TUTAJ_TOKEN':
+        pytest.skip("Ustaw zmienną środowiskową SHAREPOINT_ACCESS_TOKEN")
+    return SharePointHelper(ACCESS_TOKEN)
+
+
+@pytest.fixture(scope="session")
+def folder(sp):
+    """Folder SharePoint pobrany raz na sesję"""
+    return sp.get_folder(SHAREPOINT_FOLDER_URL)
 
-def test_connection():
+
+@pytest.fixture(scope="session")
+def file_path(sp, folder, tmp_path_factory):
+    """Plik Excel pobrany raz na sesję do katalogu tymczasowego"""
+    if not sp.is_file_exists(folder, EXCEL_FILE_NAME):
+        pytest.skip(f"Brak pliku '{EXCEL_FILE_NAME}' w folderze")
+    return sp.download_file_from_folder(
+        download_path=str(tmp_path_factory.mktemp("sharepoint")),
+        folder=folder,
+        file_name=EXCEL_FILE_NAME
+    )
+
+
+def test_connection(folder):
     """Test 1: Sprawdź połączenie z SharePoint"""
-    print("\n" + "="*60)
-    print("TEST 1: Połączenie z SharePoint")
-    print("="*60)
+    log = _section("TEST 1: Połączenie z SharePoint")
     
     try:
-        sp = SharePointHelper(ACCESS_TOKEN)
-        folder = sp.get_folder(SHAREPOINT_FOLDER_URL)
-        
-        print(f"✅ Połączono z folderem: {folder['name']}")
-        print(f"   Folder ID: {folder['id']}")
-        print(f"   Web URL: {folder['webUrl']}")
-        return sp, folder
-        
-    except Exception as e:
-        print(f"❌ Błąd połączenia: {e}")
-        return None, None
+        assert folder['id']
+        log.append(f"✅ Połączono z folderem: {folder['name']}")
+        log.append(f"   Folder ID: {folder['id']}")
+        log.append(f"   Web URL: {folder['webUrl']}")
+    finally:
+        print("\n".join(log))
 
 
 def test_list_files(sp, folder):
     """Test 2: Lista plików w folderze"""
-    print("\n" + "="*60)
-    print("TEST 2: Lista plików w folderze")
-    print("="*60)
+    log = _section("TEST 2: Lista plików w folderze")
     
     try:
         children = sp.get_folder_childrens(folder)
         
-        print(f"✅ Znaleziono {len(children)} elementów:")
-        for child in children:
-            item_type = "📁 Folder" if 'folder' in child else "📄 Plik"
-            print(f"   {item_type}: {child['name']}")
-        
-        return children
+        log.append(f"✅ Znaleziono {len(children)} elementów:")
+        log.extend(
+            f"   {'📁 Folder' if 'folder' in child else '📄 Plik'}: {child['name']}"
+            for child in children
+        )
         
     except Exception as e:
-        print(f"❌ Błąd listowania: {e}")
-        return []
+        log.append(f"❌ Błąd listowania: {e}")
+        raise
+    finally:
+        print("\n".join(log))
 
 
 def test_file_exists(sp, folder):
     """Test 3: Sprawdź czy plik Excel istnieje"""
-    print("\n" + "="*60)
-    print("TEST 3: Sprawdzanie istnienia pliku Excel")
-    print("="*60)
+    log = _section("TEST 3: Sprawdzanie istnienia pliku Excel")
     
     try:
         exists = sp.is_file_exists(folder, EXCEL_FILE_NAME)
         
         if exists:
-            print(f"✅ Plik '{EXCEL_FILE_NAME}' istnieje w folderze")
+            log.append(f"✅ Plik '{EXCEL_FILE_NAME}' istnieje w folderze")
         else:
-            print(f"❌ Plik '{EXCEL_FILE_NAME}' NIE istnieje w folderze")
+            log.append(f"❌ Plik '{EXCEL_FILE_NAME}' NIE istnieje w folderze")
         
-        return exists
+        assert exists
         
-    except Exception as e:
-        print(f"❌ Błąd sprawdzania: {e}")
-        return False
+    finally:
+        print("\n".join(log))
 
 
-def test_download_file(sp, folder):
+def test_download_file(file_path):
     """Test 4: Pobierz plik Excel"""
-    print("\n" + "="*60)
-    print("TEST 4: Pobieranie pliku Excel")
-    print("="*60)
+    log = _section("TEST 4: Pobieranie pliku Excel")
     
     try:
-        # Pobierz do folderu temp
-        temp_dir = Path(__file__).parent / "temp"
-        temp_dir.mkdir(exist_ok=True)
-        
-        local_path = sp.download_file_from_folder(
-            download_path=str(temp_dir),
-            folder=folder,
-            file_name=EXCEL_FILE_NAME
-        )
+        size = file_path.stat().st_size
+        log.append(f"✅ Plik pobrany do: {file_path}")
+        log.append(f"   Rozmiar: {size} bajtów")
         
-        print(f"✅ Plik pobrany do: {local_path}")
-        print(f"   Rozmiar: {local_path.stat().st_size} bajtów")
+        assert size > 0
         
-        return local_path
-        
-    except Exception as e:
-        print(f"❌ Błąd pobierania: {e}")
-        return None
+    finally:
+        print("\n".join(log))
 
 
 def test_read_excel(file_path):
     """Test 5: Odczytaj plik Excel"""
-    print("\n" + "="*60)
-    print("TEST 5: Odczyt pliku Excel (openpyxl)")
-    print("="*60)
+    log = _section("TEST 5: Odczyt pliku Excel (openpyxl)")
     
     try:
         from openpyxl import load_workbook
         
-        wb = load_workbook(file_path)
+        # read_only: streaming parser - tylko pierwsze wiersze są parsowane
+        wb = load_workbook(file_path, read_only=True, data_only=True)
         ws = wb.active
         
-        print(f"✅ Plik Excel otwarty")
-        print(f"   Nazwa arkusza: {ws.title}")
-        print(f"   Wymiary: {ws.max_row} wierszy x {ws.max_column} kolumn")
+        log.append(f"✅ Plik Excel otwarty")
+        log.append(f"   Nazwa arkusza: {ws.title}")
+        log.append(f"   Wymiary: {ws.max_row} wierszy x {ws.max_column} kolumn")
         
         # Wyświetl pierwsze 3 wiersze
-        print(f"\n   Pierwsze wiersze:")
-        for row_idx in range(1, min(4, ws.max_row + 1)):
-            row_data = [cell.value for cell in ws[row_idx]]
-            print(f"   Row {row_idx}: {row_data[:5]}...")  # Pierwsze 5 kolumn
+        log.append(f"\n   Pierwsze wiersze:")
+        rows = ws.iter_rows(min_row=1, max_row=3, max_col=5, values_only=True)
+        for row_idx, row_data in enumerate(rows, start=1):
+            log.append(f"   Row {row_idx}: {list(row_data)}...")  # Pierwsze 5 kolumn
         
         wb.close()
-        return True
         
-    except ImportError:
-        print("⚠️  Brak biblioteki openpyxl - zainstaluj: pip install openpyxl")
-        return False
     except Exception as e:
-        print(f"❌ Błąd odczytu: {e}")
-        return False
+        log.append(f"❌ Błąd odczytu: {e}")
+        raise
+    finally:
+        print("\n".join(log))
 
 
+@pytest.mark.skipif(os.getenv('SHAREPOINT_ALLOW_WRITE') != '1',
+                    reason="Test 6 modyfikuje plik w SharePoint - ustaw SHAREPOINT_ALLOW_WRITE=1")
 def test_add_row_and_upload(sp, folder, file_path):
-    """Test 6: Dodaj wiersz do Excel i upload"""
-    print("\n" + "="*60)
-    print("TEST 6: Dodaj wiersz i upload")
-    print("="*60)
+    """Test 6: Dodaj paczkę wierszy do Excel i upload (MODYFIKUJE PLIK W SHAREPOINT)"""
+    log = _section("TEST 6: Dodaj wiersze i upload")
     
     try:
         from openpyxl import load_workbook
@@ -169,94 +179,50 @@ def test_add_row_and_upload(sp, folder, file_path):
         wb = load_workbook(file_path)
         ws = wb.active
         
-        # Dodaj testowy wiersz
-        test_row = [
-            f"TEST-{datetime.now().strftime('%Y%m%d-%H%M%S')}",  # Request_ID
-            datetime.now().isoformat(),  # Timestamp
-            "TEST Delivery Note",
-            "TEST-TRUCK-123",
-            "TEST-TRAILER-456",
-            "Poland",
-            "TEST-TAX-789",
-            "Test Carrier Name",
-            "Giurgiu",
-            "2025-11-14",
-            "No"
+        # Dodaj testowe wiersze
+        now = datetime.now()
+        test_rows = [
+            [
+                f"TEST-{now.strftime('%Y%m%d-%H%M%S')}-{i}",  # Request_ID
+                now.isoformat(),  # Timestamp
+                "TEST Delivery Note",
+                "TEST-TRUCK-123",
+                "TEST-TRAILER-456",
+                "Poland",
+                "TEST-TAX-789",
+                "Test Carrier Name",
+                "Giurgiu",
+                "2025-11-14",
+                "No"
+            ]
+            for i in range(1, TEST_ROWS_COUNT + 1)
         ]
         
         last_row = ws.max_row
-        ws.append(test_row)
+        for test_row in test_rows:
+            ws.append(test_row)
         
-        print(f"✅ Dodano testowy wiersz {last_row + 1}")
-        print(f"   Data: {test_row[:3]}")
+        log.append(f"✅ Dodano {len(test_rows)} testowych wierszy ({last_row + 1}-{ws.max_row})")
+        log.append(f"   Data: {test_rows[0][:3]}")
         
         # Zapisz lokalnie
         wb.save(file_path)
         wb.close()
-        print(f"✅ Zapisano lokalnie: {file_path}")
+        log.append(f"✅ Zapisano lokalnie: {file_path}")
         
         # Upload do SharePoint
         result = sp.upload_file(file_path, folder)
-        print(f"✅ Uploadowano do SharePoint")
-        print(f"   ID: {result.get('id', 'N/A')}")
+        log.append(f"✅ Uploadowano do SharePoint")
+        log.append(f"   ID: {result.get('id', 'N/A')}")
         
-        return True
+        assert result.get('id')
         
-    except ImportError:
-        print("⚠️  Brak biblioteki openpyxl - pomiń ten test")
-        return False
     except Exception as e:
-        print(f"❌ Błąd: {e}")
-        return False
-
-
-def main():
-    """Uruchom wszystkie testy"""
-    print("\n" + "="*60)
-    print("TESTY SharePoint Helper")
-    print("="*60)
-    
-    if ACCESS_TOKEN == 'WKLEJ_TUTAJ_TOKEN':
-        print("\n❌ BŁĄD: Ustaw ACCESS_TOKEN w pliku test_sharepoint.py")
-        print("   Lub ustaw zmienną środowiskową: SHAREPOINT_ACCESS_TOKEN")
-        return
-    
-    # Test 1: Połączenie
-    sp, folder = test_connection()
-    if not sp or not folder:
-        print("\n❌ Przerwano testy - brak połączenia")
-        return
-    
-    # Test 2: Lista plików
-    test_list_files(sp, folder)
-    
-    # Test 3: Sprawdź plik Excel
-    file_exists = test_file_exists(sp, folder)
-    if not file_exists:
-        print("\n❌ Przerwano testy - brak pliku Excel")
-        return
-    
-    # Test 4: Pobierz plik
-    local_file = test_download_file(sp, folder)
-    if not local_file:
-        print("\n❌ Przerwano testy - nie udało się pobrać pliku")
-        return
-    
-    # Test 5: Odczytaj Excel
-    test_read_excel(local_file)
-    
-    # Test 6: Dodaj wiersz i upload (opcjonalny - ZAKOMENTUJ JEŚLI NIE CHCESZ MODYFIKOWAĆ PLIKU)
-    print("\n⚠️  TEST 6 ZMODYFIKUJE PLIK W SHAREPOINT!")
-    response = input("   Czy kontynuować? (tak/nie): ")
-    if response.lower() in ['tak', 't', 'yes', 'y']:
-        test_add_row_and_upload(sp, folder, local_file)
-    else:
-        print("   Pominięto test 6")
-    
-    print("\n" + "="*60)
-    print("TESTY ZAKOŃCZONE")
-    print("="*60 + "\n")
+        log.append(f"❌ Błąd: {e}")
+        raise
+    finally:
+        print("\n".join(log))
 
 
 if __name__ == "__main__":
-    main()
+    pytest.main([__file__, "-v", "-s"])
@@ -2,132 +2,144 @@
 Test Token Manager - weryfikacja pobierania tokena z REST API
 """
 
-import sys
-import os
-from pathlib import Path
-
-# Dodaj backend folder do PYTHONPATH
-backend_dir = Path(__file__).parent
-sys.path.insert(0, str(backend_dir))
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
 
 import pytest
-import os
-import sys
-from unittest.mock import Mock, patch, MagicMock
-from datetime import datetime, timedelta
 
-# Add backend to path
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
-from token_manager import TokenManager
-import logging
+# Logi debug widoczne przez pytest: -o log_cli=true -o log_cli_level=DEBUG
+logger = logging.getLogger(__name__)
 
-# Setup logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Fixtures token_api / token_manager / token_manager_factory / fake_token_response: tests/conftest.py
+TOKEN_API_URL = "https://your-token-api.yourdomain.com/getaccesstoken"
 
-logger = logging.getLogger(__name__)
+
+# Atrapa API działa przed warstwą socketów - każde realne połączenie to błąd testu (pytest-socket)
+@pytest.mark.disable_socket
+def test_first_fetch(token_manager, token_api):
+    """TEST 1: Pobranie tokena z REST API (pusty cache)"""
+    token_manager.clear_cache()
+    calls = token_api.call_count
+    
+    token = token_manager.get_token()
+    
+    logger.debug("Token fetched: %s... (%s characters)", token[:50], len(token))
+    assert token.startswith('eyJ')
+    assert token_api.call_count == calls + 1
+    assert token_api.call_args.args[0] == TOKEN_API_URL
+    
+    info = token_manager.get_token_info()
+    logger.debug("Expires at: %s, minutes until expiry: %s", info['expires_at'], info['minutes_until_expiry'])
+    assert info['has_cached_token'] is True
+    assert info['is_valid'] is True
 
 
-def test_token_manager():
-    """Test pobierania tokena z REST API"""
+@pytest.mark.disable_socket
+@pytest.mark.parametrize("force_refresh, expect_same", [
+    (False, True),   # TEST 2: drugie pobranie - z cache, bez zapytania do API
+    (True, False),   # TEST 3: force_refresh - zawsze nowy token z API
+], ids=["cache_hit", "force_refresh"])
+def test_get_token(token_manager, token_api, force_refresh, expect_same):
+    """Drugie get_token() na ważnym tokenie - cache albo wymuszone odświeżenie"""
+    token = token_manager.get_token()  # Ważny token w cache (pobrany tu albo wcześniej)
+    calls = token_api.call_count
     
-    print("\n" + "="*70)
-    print("TOKEN MANAGER TEST")
-    print("="*70)
+    new_token = token_manager.get_token(force_refresh=force_refresh)
     
-    # Sprawdź czy hasło jest ustawione
-    password = os.getenv('RPA_BOT_PASSWORD')
-    if not password:
-        print("\n❌ BŁĄD: Nie znaleziono RPA_BOT_PASSWORD w zmiennych środowiskowych")
-        print("\nUstaw hasło:")
-        print("  Windows: $env:RPA_BOT_PASSWORD='YourPassword123!'")
-        print("  Linux:   export RPA_BOT_PASSWORD='YourPassword123!'")
-        print("  .env:    RPA_BOT_PASSWORD=YourPassword123!")
-        return False
+    logger.debug("force_refresh=%s -> %s...", force_refresh, new_token[:50])
+    assert (new_token == token) is expect_same
+    assert token_api.call_count == calls + (0 if expect_same else 1)
+    assert token_manager.get_token() == new_token
+
+
+@pytest.mark.disable_socket
+def test_concurrent_force_refresh_single_flight(token_manager_factory, fake_token_response):
+    """TEST 4: 10 równoległych force_refresh - jedno zapytanie do API, wszyscy dostają ten sam token"""
+    shared_token = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.shared.signature"
+    callers = 10
+    # Wszyscy wywołujący + wątek testu: bariera przechodzi, gdy każdy dołączył do pobierania
+    joined = threading.Barrier(callers + 1)
+    release = threading.Event()
     
-    print(f"\n✅ RPA_BOT_PASSWORD found (length: {len(password)})")
+    def blocking_post(*args, **kwargs):
+        assert release.wait(5)  # Lider czeka, aż pozostali dołączą do trwającego pobierania
+        return fake_token_response(shared_token)
     
-    # Inicjalizuj Token Manager
-    print("\n📋 Token Manager Configuration:")
-    print(f"  API URL: https://your-token-api.yourdomain.com/getaccesstoken")
-    print(f"  Email: transport-app@yourdomain.com")
-    print(f"  Application: your-app-name")
-    print(f"  Token lifetime: 1 hour")
+    manager = token_manager_factory()
+    manager._session.post = api = MagicMock(side_effect=blocking_post)
+    join_fetch = manager._join_fetch
     
-    try:
-        tm = TokenManager(
-            token_api_url="https://your-token-api.yourdomain.com/getaccesstoken",
-            email="transport-app@yourdomain.com",
-            password=password,
-            application_name="your-app-name",
-            token_lifetime_hours=1
-        )
-        
-        print("\n✅ TokenManager initialized")
-        
-        # Test 1: Pobierz token (pierwszy raz - z API)
-        print("\n" + "-"*70)
-        print("TEST 1: Fetching token from REST API (first time)")
-        print("-"*70)
-        
-        token = tm.get_token()
-        
-        print(f"\n✅ Token fetched successfully!")
-        print(f"  Token preview: {token[:50]}...")
-        print(f"  Token length: {len(token)} characters")
-        print(f"  Valid format: {'Yes' if token.startswith('eyJ') else 'No'}")
-        
-        # Pokaż info o tokenie
-        info = tm.get_token_info()
-        print(f"\n📊 Token Info:")
-        print(f"  Has cached token: {info['has_cached_token']}")
-        print(f"  Expires at: {info['expires_at']}")
-        print(f"  Is valid: {info['is_valid']}")
-        print(f"  Minutes until expiry: {info['minutes_until_expiry']}")
-        
-        # Test 2: Pobierz token drugi raz (z cache)
-        print("\n" + "-"*70)
-        print("TEST 2: Getting token again (should use cache)")
-        print("-"*70)
-        
-        token2 = tm.get_token()
-        
-        if token == token2:
-            print("\n✅ Token retrieved from cache (same as before)")
-        else:
-            print("\n⚠️ WARNING: Got different token (should be cached)")
-        
-        # Test 3: Force refresh
-        print("\n" + "-"*70)
-        print("TEST 3: Force refresh token")
-        print("-"*70)
-        
-        token3 = tm.get_token(force_refresh=True)
-        
-        print(f"\n✅ New token fetched!")
-        print(f"  New token preview: {token3[:50]}...")
-        print(f"  Same as old: {'Yes' if token3 == token else 'No (expected - new token)'}")
-        
-        print("\n" + "="*70)
-        print("✅ ALL TESTS PASSED!")
-        print("="*70)
-        
-        return True
-        
-    except Exception as e:
-        print("\n" + "="*70)
-        print(f"❌ TEST FAILED: {e}")
-        print("="*70)
-        
-        import traceback
-        print("\nFull error:")
-        print(traceback.format_exc())
-        
-        return False
+    def join_and_report(force_refresh):
+        result = join_fetch(force_refresh)
+        joined.wait(5)
+        return result
+    
+    manager._join_fetch = join_and_report
+    with ThreadPoolExecutor(callers) as executor:
+        results = [executor.submit(manager.get_token, force_refresh=True) for _ in range(callers)]
+        joined.wait(5)
+        release.set()
+        tokens = [future.result(5) for future in results]
+    
+    assert api.call_count == 1
+    assert set(tokens) == {shared_token}
+
+
+@pytest.mark.disable_socket
+@pytest.mark.asyncio
+async def test_async_joins_inflight_sync_fetch(token_manager_factory, fake_token_response):
+    """TEST 5: get_token_async() w trakcie pobierania w wątku - czeka na ten sam wynik, bez drugiego zapytania"""
+    shared_token = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.shared-async.signature"
+    entered, release = threading.Event(), threading.Event()
+    
+    def blocking_post(*args, **kwargs):
+        entered.set()
+        release.wait(5)
+        return fake_token_response(shared_token)
+    
+    manager = token_manager_factory()
+    manager._session.post = api = MagicMock(side_effect=blocking_post)
+    with ThreadPoolExecutor(1) as executor:
+        leader = executor.submit(manager.get_token, force_refresh=True)
+        assert entered.wait(5)
+        waiter = asyncio.create_task(manager.get_token_async(force_refresh=True))
+        await asyncio.sleep(0)  # Korutyna dołącza do trwającego pobierania
+        release.set()
+        
+        assert await asyncio.wait_for(waiter, 5) == shared_token
+        assert leader.result(5) == shared_token
+    assert api.call_count == 1
 
 
-if __name__ == "__main__":
-    success = test_token_manager()
-    sys.exit(0 if success else 1)
+@pytest.mark.disable_socket
+@pytest.mark.asyncio
+async def test_cancelled_async_waiter_does_not_break_inflight_fetch(token_manager_factory, fake_token_response):
+    """TEST 6: anulowana korutyna czekająca na token - lider i pozostali czekający dostają token, bez backoffu"""
+    shared_token = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.shared-cancel.signature"
+    entered, release = threading.Event(), threading.Event()
+    
+    def blocking_post(*args, **kwargs):
+        entered.set()
+        release.wait(5)
+        return fake_token_response(shared_token)
+    
+    manager = token_manager_factory()
+    manager._session.post = MagicMock(side_effect=blocking_post)
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(manager.get_token, force_refresh=True)
+        assert entered.wait(5)
+        follower = executor.submit(manager.get_token)
+        waiter = asyncio.create_task(manager.get_token_async(force_refresh=True))
+        await asyncio.sleep(0)  # Korutyna dołącza do trwającego pobierania
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        release.set()
+        
+        assert leader.result(5) == shared_token
+        assert follower.result(5) == shared_token
+    assert not manager._in_failure_backoff()
+    assert manager.get_token() == shared_token
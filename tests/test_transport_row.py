@@ -0,0 +1,55 @@
+"""
+Test transport_row - wspólna definicja wiersza (JSON backup / Excel)
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+from utils.helpers.transport_row import EXCEL_COLUMNS, attachment_fields, build_row, record_to_form_data, record_to_values
+
+
+@pytest.mark.parametrize("has_attachment, error, expected", [
+    (True, None, ('Yes', 'Saved', '')),
+    (True, 'partial', ('Yes', 'Saved', 'partial')),
+    (False, None, ('No', 'None', '')),
+    (False, 'too big', ('No', 'Failed', 'too big')),
+])
+def test_attachment_fields_table(has_attachment, error, expected):
+    assert attachment_fields(has_attachment, error) == expected
+
+
+def test_attachment_fields_override():
+    assert attachment_fields(False, None, 'Processing') == ('Processing', 'Processing', '')
+
+
+def test_build_row_record_matches_values():
+    data = {'deliveryNoteNumber': 'DN-1', 'email': 'a@b.c'}
+    record, values = build_row('REQ-1', data, attachment_status='Processing')
+
+    assert len(values) == len(EXCEL_COLUMNS)
+    assert [record[name] for name in EXCEL_COLUMNS] == list(values)
+    assert record['Truck_License_Plates'] == ''
+    assert record['Has_Attachment'] == 'Processing'
+    assert record['SharePoint_Synced'] is False
+    assert 'Timestamp' in record
+
+
+def test_record_to_form_data_round_trip():
+    data = {'deliveryNoteNumber': 'DN-1', 'phoneNumber': '+48 123'}
+    record, _ = build_row('REQ-1', data)
+
+    form_data = record_to_form_data(record)
+    assert form_data['deliveryNoteNumber'] == 'DN-1'
+    assert form_data['phoneNumber'] == '+48 123'
+    assert form_data['email'] == ''
+
+
+def test_record_to_values_matches_build_row():
+    data = {'deliveryNoteNumber': 'DN-1', 'email': 'a@b.c'}
+    record, values = build_row('REQ-1', data, has_attachment=True)
+
+    assert record_to_values(record) == values